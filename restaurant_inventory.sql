@@ -318,9 +318,20 @@ CREATE TABLE `inventory` (
   `reorder_level` int(11) NOT NULL,
   `expiry_date` date DEFAULT NULL,
   `supplier_id` int(11) DEFAULT NULL,
-  `last_updated` timestamp NOT NULL DEFAULT current_timestamp() ON UPDATE current_timestamp()
+  `last_updated` timestamp NOT NULL DEFAULT current_timestamp() ON UPDATE current_timestamp(),
+  `stock_gap` int(11) NOT NULL DEFAULT 0
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
 
+--
+-- Triggers `inventory`
+--
+DELIMITER $$
+CREATE TRIGGER `inventory_stock_gap_insert` BEFORE INSERT ON `inventory` FOR EACH ROW SET NEW.stock_gap = NEW.quantity - NEW.reorder_level
+$$
+CREATE TRIGGER `inventory_stock_gap_update` BEFORE UPDATE ON `inventory` FOR EACH ROW SET NEW.stock_gap = NEW.quantity - NEW.reorder_level
+$$
+DELIMITER ;
+
 --
 -- Dumping data for table `inventory`
 --
@@ -345,7 +356,9 @@ CREATE TABLE `orders` (
   `supplier_id` int(11) NOT NULL,
   `status` enum('pending','shipped','delivered','cancelled') DEFAULT 'pending',
   `order_date` timestamp NOT NULL DEFAULT current_timestamp(),
-  `expected_delivery` date DEFAULT NULL
+  `expected_delivery` date DEFAULT NULL,
+  `items_count` int(11) NOT NULL DEFAULT 0,
+  `total_quantity` int(11) NOT NULL DEFAULT 0
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
 
 --
@@ -549,7 +562,8 @@ ALTER TABLE `auth_permission`
 --
 ALTER TABLE `auth_user`
   ADD PRIMARY KEY (`id`),
-  ADD UNIQUE KEY `username` (`username`);
+  ADD UNIQUE KEY `username` (`username`),
+  ADD KEY `idx_auth_user_email` (`email`);
 
 --
 -- Indexes for table `auth_user_groups`
@@ -602,14 +616,19 @@ ALTER TABLE `inventory`
   ADD PRIMARY KEY (`id`),
   ADD UNIQUE KEY `sku` (`sku`),
   ADD KEY `supplier_id` (`supplier_id`),
-  ADD KEY `idx_item_name` (`item_name`);
+  ADD KEY `idx_item_name` (`item_name`),
+  ADD KEY `idx_category_item` (`category`,`item_name`,`id`),
+  ADD KEY `idx_stock_gap` (`stock_gap`),
+  ADD FULLTEXT KEY `ft_inventory_search` (`item_name`,`sku`) WITH PARSER ngram;
 
 --
 -- Indexes for table `orders`
 --
 ALTER TABLE `orders`
   ADD PRIMARY KEY (`id`),
-  ADD KEY `supplier_id` (`supplier_id`);
+  ADD KEY `supplier_id` (`supplier_id`),
+  ADD KEY `idx_order_date` (`order_date`,`id`),
+  ADD KEY `idx_supplier_order_date` (`supplier_id`,`order_date`,`id`);
 
 --
 -- Indexes for table `order_items`
@@ -644,7 +663,8 @@ ALTER TABLE `supplier_deliverynotification`
 -- Indexes for table `supplier_supplierperformance`
 --
 ALTER TABLE `supplier_supplierperformance`
-  ADD PRIMARY KEY (`id`);
+  ADD PRIMARY KEY (`id`),
+  ADD UNIQUE KEY `supplier_period_uniq` (`supplier_id`,`period_start`,`period_end`);
 
 --
 -- Indexes for table `supplier_supplierprofile`
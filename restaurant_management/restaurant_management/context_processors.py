@@ -4,15 +4,17 @@ Context processors for the restaurant management system.
 These functions add variables to the template context for all templates.
 """
 
-from store.models import Inventory
-from django.db.models import Sum, Count, F
+from store.counters import get_inventory_counters
+from store.user_context import get_user_role
 
 
 def global_stats(request):
     """
     Add global statistics to the template context.
     
-    This makes basic inventory statistics available to all templates.
+    This makes basic inventory statistics available to all templates. The
+    numbers come from the incrementally maintained counters row, so this costs
+    a single primary-key lookup per render.
     
     Args:
         request: The current HTTP request.
@@ -29,13 +31,14 @@ def global_stats(request):
     
     try:
         # Get inventory counts
-        total_inventory = Inventory.objects.count()
-        low_stock_count = Inventory.objects.filter(quantity__lte=F('reorder_level')).count()
+        counters = get_inventory_counters()
         
         # Add to context
         context.update({
-            'total_inventory': total_inventory,
-            'low_stock_count': low_stock_count,
+            'total_inventory': counters.total_items,
+            'low_stock_count': counters.low_stock_count,
+            'expired_count': counters.expired_count,
+            'expiring_count': counters.expiring_count,
         })
     except Exception:
         # If there's an error (e.g., database not yet set up), return empty context
@@ -48,7 +51,8 @@ def user_role(request):
     """
     Add user role information to the template context.
     
-    This makes the user's role available to all templates.
+    This makes the user's role available to all templates. The role is
+    cached on the request (see store.user_context), so this makes no query.
     
     Args:
         request: The current HTTP request.
@@ -63,20 +67,15 @@ def user_role(request):
         'is_supplier': False,
     }
     
-    if request.user.is_authenticated:
-        try:
-            profile = request.user.profile
-            role = profile.role
-            
-            context.update({
-                'user_role': role,
-                'is_admin': role == 'admin',
-                'is_manager': role == 'manager',
-                'is_staff': role == 'staff',
-                'is_supplier': role == 'supplier',
-            })
-        except Exception:
-            # If profile doesn't exist, leave defaults
-            pass
+    # Users without a profile keep the defaults
+    role = get_user_role(request)
+    if role is not None:
+        context.update({
+            'user_role': role,
+            'is_admin': role == 'admin',
+            'is_manager': role == 'manager',
+            'is_staff': role == 'staff',
+            'is_supplier': role == 'supplier',
+        })
     
     return context
\ No newline at end of file
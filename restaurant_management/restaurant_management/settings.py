@@ -47,6 +47,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'store.middleware.UserContextMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -64,6 +65,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'restaurant_management.context_processors.user_role',
             ],
         },
     },
@@ -88,6 +90,67 @@ DATABASES = {
     }
 }
 
+# Cache
+# Local memory by default. Switch to the file-based backend below to share
+# cached dashboards and model version counters between worker processes.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'restaurant-management',
+    },
+    # 'default': {
+    #     'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    #     'LOCATION': os.path.join(BASE_DIR, 'cache'),
+    # },
+    # API token revocation list (see store.tokens). On disk, so every worker
+    # sees a revocation and none is forgotten on restart; entries expire with
+    # their tokens, and MAX_ENTRIES is high so none is culled early
+    'tokens': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'tokens'),
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 1000000},
+    },
+}
+
+# Seconds a cached dashboard payload may be served without a model change
+DASHBOARD_CACHE_TIMEOUT = 300
+
+# Inventory search: 'auto' uses the database's full-text index when it exists
+# (MySQL FULLTEXT/ngram or SQLite FTS5), 'fallback' always uses icontains
+INVENTORY_SEARCH_BACKEND = 'auto'
+
+# Background report jobs (see store.report_jobs): where run_report_worker
+# writes report files, how long (seconds) a finished report is reused for,
+# and how long a running job may take before another worker claims it
+REPORT_ARTIFACT_DIR = os.path.join(BASE_DIR, 'report_artifacts')
+REPORT_ARTIFACT_TIMEOUT = 60 * 60
+REPORT_JOB_TIMEOUT = 30 * 60
+
+# Cache alias holding alert throttles (see restaurant_management.utils.throttle).
+# Keys expire on their own and the backend bounds how many it keeps; use a
+# shared backend so a throttle holds across worker processes
+THROTTLE_CACHE = 'default'
+
+# Cache alias holding the API token revocation list (see store.tokens). It
+# must be shared by every worker and keep entries until they expire; with
+# app servers on several hosts, point the 'tokens' alias at a shared
+# directory or at Redis/Memcached without eviction
+TOKEN_REVOCATION_CACHE = 'tokens'
+
+# Password hashing. The first hasher hashes new and rehashed passwords; the
+# others only verify passwords stored with them until their users log in.
+# PBKDF2 iterations per password check: raising it slows brute forcing and
+# every login alike (measure with the benchmark_login command)
+PASSWORD_HASHERS = [
+    'store.hashers.ConfiguredPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_HASH_ITERATIONS = 600000
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -134,8 +197,11 @@ LOGOUT_REDIRECT_URL = 'landing_page'
 
 # Custom authentication settings
 AUTHENTICATION_BACKENDS = [
-    'django.contrib.auth.backends.ModelBackend',
+    # The only backend that checks passwords: one lookup by username or email
+    # and one password hash per login
     'store.backends.CustomUserBackend',
+    # Only restores sessions it started, with the user's profiles in one query
+    'store.backends.UserContextBackend',
 ]
 
 # Custom user model
@@ -152,7 +218,7 @@ USER_ROLES = {
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'store.authentication.RevocableJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.BasicAuthentication',
     ],
@@ -179,7 +245,9 @@ ALLOWED_HOSTS = ['127.0.0.1', 'localhost']
 from datetime import timedelta
 
 SIMPLE_JWT = {
-    'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
+    # Access tokens carry the role and supplier as claims (see store.tokens);
+    # a short lifetime bounds how long the claims can be stale
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=15),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': False,
     'BLACKLIST_AFTER_ROTATION': True,
@@ -201,7 +269,7 @@ SIMPLE_JWT = {
 
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
-    'TOKEN_USER_CLASS': 'rest_framework_simplejwt.models.TokenUser',
+    'TOKEN_USER_CLASS': 'store.tokens.ClaimsTokenUser',
 
     'JTI_CLAIM': 'jti',
 
@@ -16,12 +16,14 @@ from store.views import (
     supplier_dashboard_api_view,
     orders_api_view,
     supplier_orders_api_view,
-    update_order_status, 
-
+    update_order_status_api_view,
+    token_refresh_api_view,
+    token_revoke_api_view,
+    
     manager_dashboard_api_view,
     suppliers_api_view,
     supplier_detail_api_view,
-
+    
     staff_dashboard_api_view,
     test_dashboard_view
 )
@@ -38,7 +40,7 @@ import jwt
 from datetime import datetime, timedelta
 import uuid
 
-from rest_framework_simplejwt.tokens import RefreshToken
+from store.tokens import ROLE_CLAIM, issue_tokens
 
 class APILoginView(View):
     def post(self, request):
@@ -59,24 +61,12 @@ class APILoginView(View):
             if user is not None:
                 login(request, user)
                 
-                # Get role from users table directly using raw SQL
-                from django.db import connection
-                user_role = None
-                
-                try:
-                    with connection.cursor() as cursor:
-                        cursor.execute(
-                            "SELECT role FROM users WHERE id = %s OR email = %s",
-                            [user.id, user.email]
-                        )
-                        result = cursor.fetchone()
-                        if result:
-                            user_role = result[0]
-                            print(f"Found role in users table: {user_role}")
-                except Exception as e:
-                    print(f"Error querying users table: {str(e)}")
+                # Tokens carry the profile's role and supplier as signed claims,
+                # which is what the API authorizes by
+                refresh = issue_tokens(user)
+                user_role = refresh[ROLE_CLAIM]
                 
-                # Fallback if no role found in users table
+                # Fallback if the user has no profile
                 if not user_role:
                     # Allow the selected role if user is a superuser
                     if user.is_superuser and selected_role:
@@ -98,8 +88,6 @@ class APILoginView(View):
                 if user_role not in valid_roles:
                     user_role = 'staff'  # Default to staff if invalid role
                 
-                # Generate standard JWT tokens
-                refresh = RefreshToken.for_user(user)
                 access_token = str(refresh.access_token)
                 
                 # Prepare user data
@@ -150,21 +138,23 @@ urlpatterns = [
     
     # API Endpoints
     path('api/auth/login/', csrf_exempt(APILoginView.as_view()), name='api_login'),
+    path('api/auth/refresh/', token_refresh_api_view, name='api_token_refresh'),
+    path('api/auth/logout/', token_revoke_api_view, name='api_token_revoke'),
     path('api/auth/register/', api_register_view, name='api_register'),  # New registration endpoint
     path('api/dashboard/', dashboard_api_view),
     path('api/inventory/', InventoryListCreateAPIView.as_view()),
     path('api/users/', UserListView.as_view()),
     path('api/users/<int:user_id>/', user_detail_api_view, name='user_detail_api'),
-
+    
     path('api/dashboard/supplier/', supplier_dashboard_api_view, name='supplier_dashboard_api'),
     path('api/orders/', orders_api_view, name='orders_api'),
     path('api/orders/supplier/', supplier_orders_api_view, name='supplier_orders_api'),
-    path('api/orders/<int:order_id>/status/', update_order_status, name='update_order_status'),
-
+    path('api/orders/<int:order_id>/status/', update_order_status_api_view, name='update_order_status'),
+    
     path('api/dashboard/manager/', manager_dashboard_api_view, name='manager_dashboard_api'),
     path('api/suppliers/', suppliers_api_view, name='suppliers_api'),
     path('api/suppliers/<int:supplier_id>/', supplier_detail_api_view, name='supplier_detail_api'),
-
+    
     path('api/dashboard/staff/', staff_dashboard_api_view, name='staff_dashboard_api'),
     path('api/test-dashboard/', test_dashboard_view, name='test_dashboard'),
 
@@ -0,0 +1,162 @@
+"""
+Versioned caching utilities for the restaurant management system.
+
+Cached payloads are stored under keys that include a version counter for each
+model they depend on. Signal handlers bump a model's counter whenever one of
+its rows is saved or deleted, so entries are never deleted explicitly: a write
+simply makes the next reader compute a new key. Counters are bumped once the
+write's transaction commits; bumped earlier, a reader could still see the old
+rows and cache them under the new key. The timeout bounds staleness for
+writes that bypass signals (e.g. queryset.update()).
+
+Works with any Django cache backend; use the file-based backend to share
+versions and payloads between worker processes without an external service.
+"""
+
+import functools
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY_PREFIX = 'model-version'
+STATS_KEY_PREFIX = 'cache-stats'
+PAYLOAD_KEY_PREFIX = 'payload'
+
+DEFAULT_TIMEOUT = 300
+
+# Names of all payloads declared with versioned_cache, for reporting
+registered_payloads = []
+
+
+def _model_label(model):
+    """Get the cache label for a model, treating proxies as their concrete model."""
+    return model._meta.concrete_model._meta.label_lower
+
+
+def _version_key(model):
+    return f'{VERSION_KEY_PREFIX}:{_model_label(model)}'
+
+
+def _initial_version():
+    # Seeded from the clock so a version evicted from the cache never restarts
+    # at a number that an older cached payload was stored under.
+    return time.time_ns() // 1000
+
+
+def get_model_versions(models):
+    """
+    Get the current version counter of each model.
+    
+    Args:
+        models (iterable): Model classes.
+    
+    Returns:
+        list: One version number per model, in the same order.
+    """
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _initial_version(), timeout=None)
+            versions[key] = cache.get(key)
+    
+    return [versions[key] for key in keys]
+
+
+def _increment_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _initial_version(), timeout=None)
+
+
+def bump_model_version(model):
+    """
+    Invalidate every cached payload that depends on a model.
+    
+    Inside a transaction the version is bumped when it commits (and not at
+    all if it rolls back); outside one it is bumped at once.
+    
+    Args:
+        model: The model class whose data changed.
+    """
+    key = _version_key(model)
+    transaction.on_commit(functools.partial(_increment_version, key))
+
+
+def _count(name, outcome):
+    """Increment the hit or miss counter of a payload."""
+    key = f'{STATS_KEY_PREFIX}:{name}:{outcome}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get_cache_stats():
+    """
+    Get hit and miss counts for every registered payload.
+    
+    Returns:
+        dict: Mapping of payload name to its hits, misses and hit ratio.
+    """
+    stats = {}
+    
+    for name in registered_payloads:
+        hits = cache.get(f'{STATS_KEY_PREFIX}:{name}:hits', 0)
+        misses = cache.get(f'{STATS_KEY_PREFIX}:{name}:misses', 0)
+        total = hits + misses
+        stats[name] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': (hits / total) if total else 0,
+        }
+    
+    return stats
+
+
+def versioned_cache(name, models, timeout=None):
+    """
+    Decorator to cache a payload function under the versions of its models.
+    
+    The positional arguments of the decorated function are part of the key,
+    so they must have a stable string form (ids, dates, role names).
+    
+    Args:
+        name (str): Name of the payload, used in keys and statistics.
+        models (iterable): Model classes the payload is computed from.
+        timeout (int, optional): Seconds to keep an entry. Defaults to
+            settings.DASHBOARD_CACHE_TIMEOUT.
+    
+    Returns:
+        function: Decorator function.
+    """
+    registered_payloads.append(name)
+    
+    def decorator(func):
+        @functools.wraps(func)
+        def _wrapped(*args):
+            versions = get_model_versions(models)
+            key = ':'.join(str(part) for part in (PAYLOAD_KEY_PREFIX, name, *versions, *args))
+            
+            payload = cache.get(key)
+            if payload is None:
+                _count(name, 'misses')
+                payload = func(*args)
+                cache.set(
+                    key, payload,
+                    timeout or getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', DEFAULT_TIMEOUT)
+                )
+            else:
+                _count(name, 'hits')
+            
+            return payload
+        
+        # Allow callers (and tests) to bypass the cache
+        _wrapped.uncached = func
+        return _wrapped
+    
+    return decorator
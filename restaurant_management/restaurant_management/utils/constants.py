@@ -44,6 +44,7 @@ TRANSACTION_TYPE_CHOICES = (
 
 # Pagination settings
 ITEMS_PER_PAGE = 10
+STOCK_REPORT_PAGE_SIZE = 50  # Items listed per category page of the stock report
 
 # Low stock and expiry thresholds
 LOW_STOCK_WARNING_DAYS = 3  # Show alert for items that are X days away from reaching reorder level
@@ -66,9 +67,11 @@ REPORT_TYPE_CHOICES = (
 PDF_EXPORT = 'pdf'
 CSV_EXPORT = 'csv'
 EXCEL_EXPORT = 'excel'
+JSONL_EXPORT = 'jsonl'
 
 EXPORT_FORMAT_CHOICES = (
     (PDF_EXPORT, 'PDF'),
     (CSV_EXPORT, 'CSV'),
     (EXCEL_EXPORT, 'Excel'),
+    (JSONL_EXPORT, 'JSON Lines'),
 )
\ No newline at end of file
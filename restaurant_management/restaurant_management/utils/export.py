@@ -0,0 +1,206 @@
+"""
+Streaming exports for the restaurant management system.
+
+Building a report into an HttpResponse holds every row, and the text written
+for it, in the worker's memory until the last row is done, and the client
+sees nothing until then. The helpers here stream instead: rows come from a
+generator (normally a row mapper over QuerySet.iterator(), which fetches the
+rows in chunks without filling the queryset cache), each row is encoded as it
+is produced, and StreamingHttpResponse sends it on straight away.
+
+CSV and JSON Lines (one JSON object per row, keyed by column header) can be
+streamed. An XLSX file is a zip archive that is only complete when closed, so
+Excel exports are written with xlsxwriter's constant_memory mode instead:
+each row is flushed to disk as soon as the next one starts, the workbook is
+assembled in a temporary file, and FileResponse sends that file in blocks.
+
+Run the benchmark_excel_export management command to compare its memory use
+with a workbook built in memory.
+"""
+
+import csv
+import tempfile
+
+import xlsxwriter
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import FileResponse, StreamingHttpResponse
+
+from restaurant_management.utils.constants import CSV_EXPORT, EXCEL_EXPORT, JSONL_EXPORT
+
+# Rows fetched from the database per round trip
+EXPORT_CHUNK_SIZE = 2000
+
+STREAMING_FORMATS = {
+    CSV_EXPORT: ('text/csv', 'csv'),
+    JSONL_EXPORT: ('application/x-ndjson', 'jsonl'),
+}
+
+EXCEL_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Content type and file extension of every format that can be written to disk
+EXPORT_FILE_TYPES = {
+    **STREAMING_FORMATS,
+    EXCEL_EXPORT: (EXCEL_CONTENT_TYPE, 'xlsx'),
+}
+
+
+class _Echo:
+    """File-like object whose write() returns the value instead of storing it."""
+    
+    def write(self, value):
+        return value
+
+
+def iter_csv(headers, rows):
+    """
+    Encode rows as CSV, one line at a time.
+    
+    Args:
+        headers (list): Column headers.
+        rows (iterable): Lists of cell values.
+    
+    Yields:
+        str: The header line, then one line per row.
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(headers)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def iter_jsonl(headers, rows):
+    """
+    Encode rows as JSON Lines, one object per row keyed by column header.
+    
+    Args:
+        headers (list): Column headers.
+        rows (iterable): Lists of cell values.
+    
+    Yields:
+        str: One line per row.
+    """
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(dict(zip(headers, row))) + '\n'
+
+
+ENCODERS = {
+    CSV_EXPORT: iter_csv,
+    JSONL_EXPORT: iter_jsonl,
+}
+
+
+def streaming_export(filename, headers, rows, format_type=CSV_EXPORT):
+    """
+    Stream rows to the client as a CSV or JSON Lines download.
+    
+    Args:
+        filename (str): Name of the file, without extension.
+        headers (list): Column headers.
+        rows (iterable): Lists of cell values; consumed lazily.
+        format_type (str, optional): CSV_EXPORT or JSONL_EXPORT.
+            Defaults to CSV_EXPORT.
+    
+    Returns:
+        StreamingHttpResponse: The export as a streaming HTTP response.
+    """
+    if format_type not in STREAMING_FORMATS:
+        raise ValueError(f"Format cannot be streamed: {format_type!r}")
+    
+    content_type, extension = STREAMING_FORMATS[format_type]
+    response = StreamingHttpResponse(
+        ENCODERS[format_type](headers, rows),
+        content_type=content_type
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{extension}"'
+    return response
+
+
+def write_excel(output, headers, rows, constant_memory=True):
+    """
+    Write rows to an XLSX workbook.
+    
+    Args:
+        output: A file name or binary file object to write the workbook to.
+        headers (list): Column headers, written in bold on the first row.
+        rows (iterable): Lists of cell values; consumed one at a time.
+        constant_memory (bool, optional): Flush each row to disk once the next
+            one starts, so memory use does not grow with the number of rows.
+            Defaults to True.
+    
+    Returns:
+        int: The number of data rows written.
+    """
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': constant_memory})
+    worksheet = workbook.add_worksheet()
+    
+    header_format = workbook.add_format({
+        'bold': True,
+        'bg_color': '#f0f0f0',
+        'border': 1
+    })
+    
+    # Column widths must be set before any row is flushed
+    for col_num, header in enumerate(headers):
+        worksheet.set_column(col_num, col_num, len(header) + 5)
+    
+    worksheet.write_row(0, 0, headers, header_format)
+    
+    row_num = 0
+    for row_num, row in enumerate(rows, 1):
+        worksheet.write_row(row_num, 0, row)
+    
+    workbook.close()
+    return row_num
+
+
+def excel_export(filename, headers, rows):
+    """
+    Send rows to the client as an XLSX download built in constant memory.
+    
+    Args:
+        filename (str): Name of the file, without extension.
+        headers (list): Column headers.
+        rows (iterable): Lists of cell values; consumed before the response
+            is returned.
+    
+    Returns:
+        FileResponse: The workbook, served from a temporary file that is
+        deleted once the response is closed.
+    """
+    output = tempfile.TemporaryFile(suffix='.xlsx')
+    try:
+        write_excel(output, headers, rows)
+    except BaseException:
+        output.close()
+        raise
+    
+    output.seek(0)
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=f'{filename}.xlsx',
+        content_type=EXCEL_CONTENT_TYPE
+    )
+
+
+def write_export(path, headers, rows, format_type=CSV_EXPORT):
+    """
+    Write rows to a file in any export format.
+    
+    Args:
+        path (str): Path of the file to create.
+        headers (list): Column headers.
+        rows (iterable): Lists of cell values; consumed one at a time.
+        format_type (str, optional): CSV_EXPORT, JSONL_EXPORT or EXCEL_EXPORT.
+            Defaults to CSV_EXPORT.
+    """
+    if format_type == EXCEL_EXPORT:
+        write_excel(path, headers, rows)
+        return
+    
+    if format_type not in ENCODERS:
+        raise ValueError(f"Unsupported export format: {format_type!r}")
+    
+    with open(path, 'w', encoding='utf-8', newline='') as output:
+        output.writelines(ENCODERS[format_type](headers, rows))
@@ -0,0 +1,371 @@
+"""
+Keyset (cursor) pagination for the restaurant management system.
+
+Django's Paginator counts the whole result set and then scans past every
+skipped row with OFFSET, so deep pages get slower the further you go. Keyset
+pagination instead remembers the ordering values of the last row shown and
+asks for the rows after it, which an index on the ordering columns serves
+directly no matter how deep the page is.
+
+The ordering must end in a unique column (normally 'id') and its columns must
+not be NULL. Cursors are signed, opaque tokens, so clients cannot forge
+positions or depend on their contents.
+"""
+
+from django.core import signing
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+from restaurant_management.utils.constants import ITEMS_PER_PAGE
+
+CURSOR_SALT = 'restaurant_management.keyset-cursor'
+
+# Query parameters that select keyset pagination in HTML views
+CURSOR_PARAM = 'cursor'
+PAGINATION_PARAM = 'pagination'
+KEYSET_MODE = 'keyset'
+
+
+class InvalidCursor(Exception):
+    """Raised when a cursor token is malformed or was not issued by us."""
+
+
+class _CursorSerializer(signing.JSONSerializer):
+    """Signing serializer that can encode dates and datetimes."""
+    
+    def dumps(self, obj):
+        return DjangoJSONEncoder(separators=(',', ':')).encode(obj).encode('latin-1')
+
+
+class KeysetPage:
+    """
+    A page of results from a KeysetPaginator.
+    
+    Exposes the parts of django.core.paginator.Page that templates use
+    (iteration, has_next, has_previous) plus the cursors for the
+    neighbouring pages. There is no page number or total count.
+    """
+    
+    is_keyset = True
+    
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+    
+    def __iter__(self):
+        return iter(self.object_list)
+    
+    def __len__(self):
+        return len(self.object_list)
+    
+    def __bool__(self):
+        return bool(self.object_list)
+    
+    def has_next(self):
+        return self.next_cursor is not None
+    
+    def has_previous(self):
+        return self.previous_cursor is not None
+    
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset by the values of its ordering columns.
+    
+    Args:
+        queryset (QuerySet): The rows to paginate.
+        ordering (tuple): Ordering columns, e.g. ('-order_date', '-id').
+        per_page (int, optional): Rows per page. Defaults to ITEMS_PER_PAGE.
+    """
+    
+    def __init__(self, queryset, ordering, per_page=ITEMS_PER_PAGE):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+        self.fields = [column.lstrip('-') for column in self.ordering]
+    
+    def _reversed_ordering(self):
+        return tuple(
+            column[1:] if column.startswith('-') else f'-{column}'
+            for column in self.ordering
+        )
+    
+    def _field(self, name):
+        # Ordering columns may be annotations, e.g. a search rank
+        annotation = self.queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return self.queryset.model._meta.get_field(name)
+    
+    def _position(self, obj):
+        # Rows may be model instances or values() dictionaries
+        if isinstance(obj, dict):
+            return [obj[field] for field in self.fields]
+        return [getattr(obj, field) for field in self.fields]
+    
+    def encode_cursor(self, obj, direction):
+        """
+        Build the cursor for the rows after (or before) an object.
+        
+        Args:
+            obj: The boundary row.
+            direction (str): 'next' or 'previous'.
+        
+        Returns:
+            str: An opaque, signed cursor token.
+        """
+        return signing.dumps(
+            {'p': self._position(obj), 'd': direction},
+            salt=CURSOR_SALT, serializer=_CursorSerializer, compress=True
+        )
+    
+    def decode_cursor(self, token):
+        """
+        Read a cursor token.
+        
+        Args:
+            token (str): A token issued by encode_cursor.
+        
+        Returns:
+            tuple: (position values, direction).
+        
+        Raises:
+            InvalidCursor: If the token is malformed or has been tampered with.
+        """
+        try:
+            data = signing.loads(token, salt=CURSOR_SALT)
+            position, direction = data['p'], data['d']
+        except (signing.BadSignature, KeyError, TypeError, ValueError):
+            raise InvalidCursor(token)
+        
+        if direction not in ('next', 'previous') or len(position) != len(self.fields):
+            raise InvalidCursor(token)
+        
+        try:
+            values = [
+                self._field(field).to_python(value)
+                for field, value in zip(self.fields, position)
+            ]
+        except Exception:
+            raise InvalidCursor(token)
+        
+        return values, direction
+    
+    def _seek_filter(self, values, ordering):
+        """
+        Build the filter for rows strictly after a position in an ordering.
+        
+        For ordering (a, b) this is a >= x AND (a > x OR (a = x AND b > y)).
+        The redundant leading range lets the database seek on the index
+        instead of evaluating the OR for every row.
+        """
+        def lookup(column, inclusive=False):
+            suffix = 'lt' if column.startswith('-') else 'gt'
+            return suffix + ('e' if inclusive else '')
+        
+        expansion = Q()
+        for i, column in enumerate(ordering):
+            clause = Q(**{f'{self.fields[i]}__{lookup(column)}': values[i]})
+            for field, value in zip(self.fields[:i], values[:i]):
+                clause &= Q(**{field: value})
+            expansion |= clause
+        
+        leading = Q(**{f'{self.fields[0]}__{lookup(ordering[0], inclusive=True)}': values[0]})
+        return leading & expansion
+    
+    def get_page(self, cursor=None):
+        """
+        Get the page a cursor points to.
+        
+        Args:
+            cursor (str, optional): A cursor token. Defaults to the first page.
+        
+        Returns:
+            KeysetPage: The requested page.
+        
+        Raises:
+            InvalidCursor: If the cursor is not valid.
+        """
+        if not cursor:
+            rows = list(self.queryset.order_by(*self.ordering)[:self.per_page + 1])
+            has_more = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            return KeysetPage(
+                rows,
+                next_cursor=self.encode_cursor(rows[-1], 'next') if has_more else None,
+            )
+        
+        values, direction = self.decode_cursor(cursor)
+        
+        if direction == 'next':
+            rows = list(
+                self.queryset.filter(self._seek_filter(values, self.ordering))
+                .order_by(*self.ordering)[:self.per_page + 1]
+            )
+            has_more = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            if not rows:
+                return KeysetPage(rows)
+            return KeysetPage(
+                rows,
+                next_cursor=self.encode_cursor(rows[-1], 'next') if has_more else None,
+                previous_cursor=self.encode_cursor(rows[0], 'previous'),
+            )
+        
+        reversed_ordering = self._reversed_ordering()
+        rows = list(
+            self.queryset.filter(self._seek_filter(values, reversed_ordering))
+            .order_by(*reversed_ordering)[:self.per_page + 1]
+        )
+        has_more = len(rows) > self.per_page
+        rows = list(reversed(rows[:self.per_page]))
+        if not rows:
+            return KeysetPage(rows)
+        return KeysetPage(
+            rows,
+            next_cursor=self.encode_cursor(rows[-1], 'next'),
+            previous_cursor=self.encode_cursor(rows[0], 'previous') if has_more else None,
+        )
+
+
+def use_keyset_pagination(request):
+    """
+    Check whether a request asked for keyset pagination.
+    
+    Args:
+        request: The current HTTP request.
+    
+    Returns:
+        bool: True if the request carries a cursor or pagination=keyset.
+    """
+    return CURSOR_PARAM in request.GET or request.GET.get(PAGINATION_PARAM) == KEYSET_MODE
+
+
+def paginate_queryset(request, queryset, ordering, per_page=ITEMS_PER_PAGE):
+    """
+    Paginate a queryset for an HTML view.
+    
+    Uses keyset pagination when the request asks for it and Django's page
+    number pagination otherwise, so existing ?page= links keep working.
+    An invalid cursor falls back to the first page, as Paginator.get_page does.
+    
+    Args:
+        request: The current HTTP request.
+        queryset (QuerySet): The rows to paginate.
+        ordering (tuple): Ordering columns ending in a unique column.
+        per_page (int, optional): Rows per page. Defaults to ITEMS_PER_PAGE.
+    
+    Returns:
+        Page or KeysetPage: The requested page.
+    """
+    if use_keyset_pagination(request):
+        paginator = KeysetPaginator(queryset, ordering, per_page)
+        try:
+            return paginator.get_page(request.GET.get(CURSOR_PARAM))
+        except InvalidCursor:
+            return paginator.get_page()
+    
+    paginator = Paginator(queryset.order_by(*ordering), per_page)
+    return paginator.get_page(request.GET.get('page'))
+
+
+def keyset_query_string(request, cursor):
+    """
+    Build the query string for a neighbouring keyset page.
+    
+    Args:
+        request: The current HTTP request.
+        cursor (str): The cursor of the page to link to.
+    
+    Returns:
+        str: The current filters with the page and cursor replaced.
+    """
+    params = request.GET.copy()
+    params.pop('page', None)
+    params[CURSOR_PARAM] = cursor
+    return params.urlencode()
+
+
+def keyset_links(request, page):
+    """
+    Build the query strings a template needs to link a keyset page.
+    
+    Args:
+        request: The current HTTP request.
+        page (Page or KeysetPage): The page being rendered.
+    
+    Returns:
+        dict: first_query, previous_query and next_query (None where there is
+        no such page), or an empty dict for page number pagination.
+    """
+    if not getattr(page, 'is_keyset', False):
+        return {}
+    
+    first = request.GET.copy()
+    first.pop('page', None)
+    first.pop(CURSOR_PARAM, None)
+    first[PAGINATION_PARAM] = KEYSET_MODE
+    
+    return {
+        'first_query': first.urlencode(),
+        'previous_query': (
+            keyset_query_string(request, page.previous_cursor)
+            if page.has_previous() else None
+        ),
+        'next_query': (
+            keyset_query_string(request, page.next_cursor)
+            if page.has_next() else None
+        ),
+    }
+
+
+class KeysetPagination(BasePagination):
+    """
+    DRF pagination class backed by KeysetPaginator.
+    
+    Opt-in per request: without ?cursor= or ?pagination=keyset the view
+    returns its full, unpaginated list as before, so existing API clients
+    are unaffected. Set `keyset_ordering` on the view to choose the order.
+    """
+    
+    page_size = ITEMS_PER_PAGE
+    ordering = ('id',)
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        if not use_keyset_pagination(request):
+            return None
+        
+        self.request = request
+        paginator = KeysetPaginator(
+            queryset,
+            getattr(view, 'keyset_ordering', self.ordering),
+            self.page_size
+        )
+        try:
+            self.page = paginator.get_page(request.query_params.get(CURSOR_PARAM))
+        except InvalidCursor:
+            raise NotFound('Invalid cursor')
+        
+        return list(self.page)
+    
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        return self.request.build_absolute_uri(
+            f'{self.request.path}?{keyset_query_string(self.request, cursor)}'
+        )
+    
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self._link(self.page.next_cursor),
+            'previous': self._link(self.page.previous_cursor),
+            'results': data,
+        })
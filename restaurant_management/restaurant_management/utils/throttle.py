@@ -0,0 +1,41 @@
+"""
+Throttles shared between worker processes.
+
+A throttle is claimed with cache.add(), which only stores a key that is not
+already there, so of all the processes sharing the cache exactly one claims
+a throttle per interval. Keys expire after their interval and the cache
+backend bounds how many it keeps (LocMemCache culls beyond MAX_ENTRIES), so
+memory stays flat however many keys are throttled. Set THROTTLE_CACHE to a
+shared backend (file-based, Redis, Memcached) for a throttle to hold across
+worker processes as well as within one.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+
+THROTTLE_KEY_PREFIX = 'throttle'
+
+
+def get_throttle_cache():
+    """Get the cache that throttles are stored in."""
+    return caches[getattr(settings, 'THROTTLE_CACHE', 'default')]
+
+
+def _throttle_key(name, key):
+    return f'{THROTTLE_KEY_PREFIX}:{name}:{key}'
+
+
+def claim_throttle(name, key, interval):
+    """
+    Claim a throttle unless it was claimed within the last interval.
+    
+    Args:
+        name (str): Name of the throttled action.
+        key: What the action is throttled for, e.g. a supplier id.
+        interval (int): Seconds before the throttle can be claimed again.
+    
+    Returns:
+        bool: True if the caller claimed the throttle and should act.
+    """
+    return get_throttle_cache().add(_throttle_key(name, key), 1, timeout=interval)
+
@@ -7,6 +7,7 @@ from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import User
 
 from .models import UserProfile, Inventory, Order, OrderItem, Transaction, Supplier
+from .search import search_inventory
 
 
 class UserProfileInline(admin.StackedInline):
@@ -52,6 +53,12 @@ class InventoryAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         queryset = super().get_queryset(request)
         return queryset.select_related('supplier')
+    
+    def get_search_results(self, request, queryset, search_term):
+        # Use the full-text index instead of LIKE '%term%' on search_fields
+        if not search_term.strip():
+            return queryset, False
+        return search_inventory(queryset, search_term), False
 
 
 @admin.register(Order)
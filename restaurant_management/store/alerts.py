@@ -0,0 +1,120 @@
+"""
+Daily inventory alert digest for the store application.
+
+The digest tells store users once a day how many items are expiring, expired
+or at their reorder level. The counts come from the shared InventoryCounters
+row (see store.counters), which every worker reads with one primary-key
+lookup and which only one worker rebuilds each day, so no worker scans the
+inventory table to raise an alert.
+
+Whether a user has seen today's digest is recorded in AlertDigestReceipt, so
+the digest is shown once per user whichever worker serves them, and is
+remembered in the session, so later requests that day need no query at all.
+"""
+
+from django.contrib import messages
+from django.urls import reverse
+from django.utils import timezone
+
+from restaurant_management.utils.constants import EXPIRY_WARNING_DAYS
+from .counters import get_inventory_counters
+from .models import AlertDigestReceipt
+
+# Session key holding the date of the last digest the user was shown
+SESSION_KEY = 'alert_digest_date'
+
+
+def claim_alert_digest(user, digest_date):
+    """
+    Record that a user is being shown a digest, unless they already were.
+    
+    The receipt is updated with a conditional UPDATE, so of several requests
+    racing on different workers only one claims the digest.
+    
+    Args:
+        user (User): The user.
+        digest_date (date): The date of the digest.
+    
+    Returns:
+        bool: True if the user had not seen this digest yet.
+    """
+    claimed = AlertDigestReceipt.objects.filter(user=user).exclude(
+        digest_date=digest_date
+    ).update(digest_date=digest_date, seen_at=timezone.now())
+    if claimed:
+        return True
+    
+    _, created = AlertDigestReceipt.objects.get_or_create(
+        user=user, defaults={'digest_date': digest_date}
+    )
+    return created
+
+
+def get_alert_digest():
+    """
+    Get today's alert counts.
+    
+    Returns:
+        dict: 'date' of the counts and the 'expiring', 'expired' and
+        'low_stock' item counts.
+    """
+    counters = get_inventory_counters()
+    return {
+        'date': counters.as_of,
+        'expiring': counters.expiring_count,
+        'expired': counters.expired_count,
+        'low_stock': counters.low_stock_count,
+    }
+
+
+def add_alert_messages(request, digest):
+    """
+    Add a digest's alerts to the request's messages.
+    
+    Args:
+        request: The current HTTP request.
+        digest (dict): The digest, as returned by get_alert_digest.
+    """
+    if digest['expiring'] > 0:
+        messages.warning(
+            request,
+            f"{digest['expiring']} inventory items will expire within the next "
+            f"{EXPIRY_WARNING_DAYS} days. "
+            f"<a href='{reverse('store:expiry_dates')}'>View expiring items</a>"
+        )
+    
+    if digest['expired'] > 0:
+        messages.error(
+            request,
+            f"{digest['expired']} inventory items have expired. "
+            f"<a href='{reverse('store:expiry_dates')}'>View expired items</a>"
+        )
+    
+    if digest['low_stock'] > 0:
+        messages.warning(
+            request,
+            f"{digest['low_stock']} inventory items are at or below their reorder level. "
+            f"<a href='{reverse('store:low_stock_alerts')}'>View low stock items</a>"
+        )
+
+
+def show_alert_digest(request):
+    """
+    Show today's digest to the request's user if they have not seen it yet.
+    
+    Args:
+        request: The current HTTP request, with an authenticated user.
+    
+    Returns:
+        bool: True if the digest was shown.
+    """
+    today = timezone.now().date()
+    if request.session.get(SESSION_KEY) == today.isoformat():
+        return False
+    
+    request.session[SESSION_KEY] = today.isoformat()
+    if not claim_alert_digest(request.user, today):
+        return False
+    
+    add_alert_messages(request, get_alert_digest())
+    return True
@@ -0,0 +1,68 @@
+"""
+API authentication classes for the restaurant management system.
+
+Both classes reject tokens on the revocation list (see store.tokens).
+RevocableJWTAuthentication loads the token's user like simplejwt's
+JWTAuthentication; ClaimsJWTAuthentication makes no query at all and
+authenticates a ClaimsTokenUser, for views that only need the user's id,
+role and supplier, such as the dashboards the frontend polls.
+"""
+
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .tokens import ROLE_CLAIM, ClaimsTokenUser, is_token_revoked
+
+
+class RevocableJWTAuthentication(JWTAuthentication):
+    """JWT authentication that rejects revoked tokens."""
+    
+    def get_validated_token(self, raw_token):
+        """
+        Validate a token and check it against the revocation list.
+        
+        Args:
+            raw_token (bytes): The encoded token.
+        
+        Returns:
+            Token: The validated token.
+        
+        Raises:
+            InvalidToken: If the token is invalid, expired or revoked.
+        """
+        token = super().get_validated_token(raw_token)
+        if is_token_revoked(token):
+            raise InvalidToken(_("Token has been revoked"))
+        return token
+
+
+class ClaimsJWTAuthentication(RevocableJWTAuthentication):
+    """
+    JWT authentication that trusts the token's claims instead of the database.
+    
+    Views using it get a ClaimsTokenUser as request.user, which has no
+    profile; they read the role and supplier with get_user_role and
+    get_user_supplier_id.
+    """
+    
+    def get_user(self, validated_token):
+        """
+        Get the stateless user of a token.
+        
+        Args:
+            validated_token (Token): The validated token.
+        
+        Returns:
+            ClaimsTokenUser: The user the token was issued to.
+        
+        Raises:
+            InvalidToken: If the token has no user id or was issued without
+                role claims.
+        """
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        if ROLE_CLAIM not in validated_token:
+            raise InvalidToken(_("Token contained no role claim"))
+        return ClaimsTokenUser(validated_token)
@@ -7,15 +7,48 @@ user roles and specialized login flows.
 
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth.models import User
-from django.db.models import Q
 
 from .models import UserProfile
+from .user_context import load_login_user, load_user_context
 
 
-class CustomUserBackend(ModelBackend):
+class UserContextBackend(ModelBackend):
+    """
+    Authentication backend that loads a session's user with its profiles.
+    
+    The user, UserProfile, SupplierProfile and supplier are read in one
+    query (see store.user_context), so role checks later in the request
+    need none. It authenticates no credentials itself; CustomUserBackend
+    does, and this backend stays listed so sessions it started stay valid.
+    """
+    
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        """Leave logins to CustomUserBackend, so each costs one lookup and one hash."""
+        return None
+    
+    def get_user(self, user_id):
+        """
+        Get the user of a session.
+        
+        Args:
+            user_id: The user's primary key.
+        
+        Returns:
+            User: The active user with its profiles loaded, or None.
+        """
+        user = load_user_context(user_id)
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+
+class CustomUserBackend(UserContextBackend):
     """
     Custom authentication backend that allows users to login with
     either username or email and validates user role permissions.
+    
+    It is the only backend that checks passwords. A login makes one query,
+    which finds the user by username or email and loads its profiles, and
+    one password hash, also when no user matches. A correct password stored
+    with an outdated hasher or work factor is rehashed and saved.
     """
     
     def authenticate(self, request, username=None, password=None, **kwargs):
@@ -30,37 +63,38 @@ class CustomUserBackend(ModelBackend):
         Returns:
             User: The authenticated user if successful, None otherwise.
         """
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
         if username is None or password is None:
             return None
         
-        # Try to find a user that matches either username or email
-        try:
-            user = User.objects.get(Q(username=username) | Q(email=username))
-        except User.DoesNotExist:
-            # Run the default password hasher to prevent timing attacks
+        user = load_login_user(username)
+        if user is None:
+            # Hash the password anyway, so an unknown user takes as long as a wrong password
             User().set_password(password)
             return None
         
-        # Check password
-        if user.check_password(password):
-            # Check if user has the required profile for the current app
-            app_name = request.path.split('/')[1] if request.path else ''
+        # check_password saves a rehashed password if the hasher has changed
+        if not (user.check_password(password) and self.user_can_authenticate(user)):
+            return None
+        
+        # Check if user has the required profile for the current app
+        path = getattr(request, 'path', '')
+        app_name = path.split('/')[1] if path else ''
+        
+        try:
+            profile = user.profile
             
-            try:
-                profile = user.profile
-                
-                # If trying to access supplier functionality, ensure user has supplier role
-                if app_name == 'supplier' and profile.role != 'supplier':
-                    return None
-                
-                # If trying to access store functionality, ensure user is not a supplier
-                if app_name == 'store' and profile.role == 'supplier':
-                    return None
-                
-            except UserProfile.DoesNotExist:
-                # User doesn't have a profile, which is required for our system
+            # If trying to access supplier functionality, ensure user has supplier role
+            if app_name == 'supplier' and profile.role != 'supplier':
                 return None
             
-            return user
+            # If trying to access store functionality, ensure user is not a supplier
+            if app_name == 'store' and profile.role == 'supplier':
+                return None
+        
+        except UserProfile.DoesNotExist:
+            # User doesn't have a profile, which is required for our system
+            return None
         
-        return None
\ No newline at end of file
+        return user
@@ -0,0 +1,135 @@
+"""
+Incrementally maintained inventory counters.
+
+The header statistics shown on every page are read from the single
+InventoryCounters row instead of scanning the inventory table. Every write to
+an Inventory row applies the change in counter membership to that row with
+F() expressions, inside the caller's transaction. The expiry counters depend
+on the current date, so the row is rebuilt, by a single worker, the first time
+it is read on a new day, and the reconcile_inventory_counters command can
+rebuild it at any time.
+"""
+
+import datetime
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from restaurant_management.utils.constants import EXPIRY_WARNING_DAYS
+from .models import InventoryCounters
+
+COUNTERS_PK = 1
+
+COUNTER_NAMES = ('total_items', 'low_stock_count', 'expired_count', 'expiring_count')
+
+
+def _counter_membership(state, today):
+    """
+    Get the counters an inventory state contributes to.
+    
+    Args:
+        state (tuple): (quantity, reorder_level, expiry_date), or None for no row.
+        today (date): The date the expiry counters are relative to.
+    
+    Returns:
+        tuple: 0/1 contribution to each counter in COUNTER_NAMES.
+    """
+    if state is None:
+        return (0, 0, 0, 0)
+    
+    quantity, reorder_level, expiry_date = state
+    expiry_threshold = today + datetime.timedelta(days=EXPIRY_WARNING_DAYS)
+    
+    return (
+        1,
+        int(quantity <= reorder_level),
+        int(expiry_date is not None and expiry_date < today),
+        int(expiry_date is not None and today <= expiry_date <= expiry_threshold),
+    )
+
+
+def record_inventory_change(before, after):
+    """
+    Apply an inventory row change to the counters.
+    
+    Args:
+        before (tuple): State before the write, or None if the row was created.
+        after (tuple): State after the write, or None if the row was deleted.
+    """
+    record_inventory_changes([(before, after)])
+
+
+def record_inventory_changes(changes):
+    """
+    Apply several inventory row changes to the counters in one UPDATE.
+    
+    Args:
+        changes (iterable): (before, after) state pairs, as for
+            record_inventory_change.
+    """
+    today = timezone.now().date()
+    deltas = [0] * len(COUNTER_NAMES)
+    for before, after in changes:
+        for i, (old, new) in enumerate(zip(
+            _counter_membership(before, today),
+            _counter_membership(after, today)
+        )):
+            deltas[i] += new - old
+    
+    if not any(deltas):
+        return
+    
+    # A stale row is left alone; it is rebuilt on the next read.
+    InventoryCounters.objects.filter(pk=COUNTERS_PK, as_of=today).update(**{
+        name: F(name) + delta for name, delta in zip(COUNTER_NAMES, deltas) if delta
+    })
+
+
+def invalidate_inventory_counters():
+    """Mark the counters stale when a change could not be tracked incrementally."""
+    InventoryCounters.objects.filter(pk=COUNTERS_PK).update(as_of=None)
+
+
+def rebuild_inventory_counters():
+    """
+    Recompute the counters from the inventory table.
+    
+    Returns:
+        InventoryCounters: The rebuilt counters row.
+    """
+    from .utils import get_inventory_summary
+    
+    summary = get_inventory_summary()
+    counters, _ = InventoryCounters.objects.update_or_create(
+        pk=COUNTERS_PK,
+        defaults={
+            'total_items': summary['total_inventory_items'],
+            'low_stock_count': summary['low_stock_count'],
+            'expired_count': summary['expired_count'],
+            'expiring_count': summary['expiring_count'],
+            'as_of': timezone.now().date(),
+        }
+    )
+    
+    return counters
+
+
+def get_inventory_counters():
+    """
+    Get the current inventory counters.
+    
+    Returns:
+        InventoryCounters: The counters row, rebuilt first if it is missing or stale.
+    """
+    today = timezone.now().date()
+    counters = InventoryCounters.objects.filter(pk=COUNTERS_PK).first()
+    
+    if counters is None or counters.as_of != today:
+        with transaction.atomic():
+            # The first worker to read a stale row rebuilds it; the others
+            # wait on the row lock and then use its result
+            counters = InventoryCounters.objects.select_for_update().filter(pk=COUNTERS_PK).first()
+            if counters is None or counters.as_of != today:
+                counters = rebuild_inventory_counters()
+    
+    return counters
@@ -10,6 +10,7 @@ from django.http import HttpResponseForbidden
 from functools import wraps
 
 from .models import UserProfile
+from .user_context import get_user_role
 
 
 def role_required(roles):
@@ -26,9 +27,8 @@ def role_required(roles):
     def decorator(view_func):
         @wraps(view_func)
         def _wrapped_view(request, *args, **kwargs):
-            try:
-                profile = request.user.profile
-            except UserProfile.DoesNotExist:
+            role = get_user_role(request)
+            if role is None:
                 messages.error(request, "You need a profile to access this page.")
                 return redirect('landing_page')
             
@@ -39,7 +39,7 @@ def role_required(roles):
                 required_roles = roles
             
             # Check if user has any of the required roles
-            if profile.role not in required_roles:
+            if role not in required_roles:
                 messages.error(request, "You don't have permission to access this page.")
                 return redirect('landing_page')
             
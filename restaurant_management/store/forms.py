@@ -12,6 +12,7 @@ from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 
 from .models import Inventory, Supplier, Order, OrderItem, Transaction, UserProfile
+from .order_status import can_transition
 
 
 class CustomAuthenticationForm(AuthenticationForm):
@@ -157,6 +158,18 @@ class OrderUpdateForm(forms.ModelForm):
         widgets = {
             'status': forms.Select(attrs={'class': 'form-control'}),
         }
+    
+    def clean_status(self):
+        status = self.cleaned_data.get('status')
+        current_status = self.instance.loaded_status or self.instance.status
+        
+        if not can_transition(current_status, status):
+            raise ValidationError(
+                _("An order cannot change from %(current)s to %(new)s."),
+                params={'current': current_status, 'new': status}
+            )
+        
+        return status
 
 
 class DateRangeForm(forms.Form):
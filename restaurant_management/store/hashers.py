@@ -0,0 +1,19 @@
+"""
+Password hashers for the restaurant management system.
+
+The PBKDF2 work factor is the PASSWORD_HASH_ITERATIONS setting rather than
+the count built into the Django release, so login CPU can be sized to the
+app servers. Stored hashes with another count are rehashed with the
+configured one the next time their user logs in (see CustomUserBackend).
+"""
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ConfiguredPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2 + HMAC + SHA256 with PASSWORD_HASH_ITERATIONS iterations."""
+    
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_HASH_ITERATIONS', PBKDF2PasswordHasher.iterations)
@@ -0,0 +1,355 @@
+"""
+Bulk inventory import for the store application.
+
+Reads inventory rows from a CSV or JSON Lines stream and upserts them on SKU,
+a chunk at a time, so files of any size are imported in constant memory. Each
+chunk is one database transaction that:
+
+- locks the existing rows for the chunk's SKUs (one query);
+- upserts every row with bulk_create(update_conflicts=True);
+- writes the ledger rows for created items and quantity changes with
+  bulk_create, and applies the changes to the inventory counters.
+
+Rows that fail validation or name an unknown supplier are reported with
+their line number and skipped; the rest of the file is still imported.
+"""
+
+import csv
+import datetime
+import io
+import json
+import time
+
+from django.db import connection, transaction as db_transaction, DatabaseError
+from django.utils import timezone
+
+from restaurant_management.utils.cache import bump_model_version
+from .counters import record_inventory_changes
+from .models import Inventory, Supplier, Transaction
+
+CSV_FORMAT = 'csv'
+JSONL_FORMAT = 'jsonl'
+IMPORT_FORMATS = (CSV_FORMAT, JSONL_FORMAT)
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# Errors kept in the report; the total is always counted
+MAX_REPORTED_ERRORS = 100
+
+# Columns overwritten when a SKU already exists
+UPSERT_UPDATE_FIELDS = [
+    'item_name', 'category', 'quantity', 'reorder_level', 'expiry_date',
+    'supplier', 'stock_gap', 'last_updated',
+]
+
+
+class ImportRowError(ValueError):
+    """Raised when an import row cannot be turned into an inventory item."""
+
+
+def guess_format(filename):
+    """
+    Guess the import format from a file name.
+    
+    Args:
+        filename (str): The file name.
+    
+    Returns:
+        str: CSV_FORMAT or JSONL_FORMAT.
+    """
+    lowered = filename.lower()
+    if lowered.endswith(('.jsonl', '.ndjson', '.json')):
+        return JSONL_FORMAT
+    return CSV_FORMAT
+
+
+def iter_records(stream, fmt):
+    """
+    Read raw records from a text stream one at a time.
+    
+    Args:
+        stream: A text file object.
+        fmt (str): CSV_FORMAT or JSONL_FORMAT.
+    
+    Yields:
+        tuple: (line number, dict of field values), or (line number, None)
+        for a line that could not be parsed.
+    """
+    if fmt == CSV_FORMAT:
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield line_number, None
+            continue
+        yield line_number, record if isinstance(record, dict) else None
+
+
+def _integer(record, field, default=None):
+    value = record.get(field)
+    if value is None or value == '':
+        if default is None:
+            raise ImportRowError(f"{field} is required")
+        return default
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ImportRowError(f"{field} must be a whole number")
+    if number < 0:
+        raise ImportRowError(f"{field} cannot be negative")
+    return number
+
+
+def _text(record, field, required=False, max_length=None):
+    value = record.get(field)
+    value = str(value).strip() if value is not None else ''
+    if required and not value:
+        raise ImportRowError(f"{field} is required")
+    if max_length and len(value) > max_length:
+        raise ImportRowError(f"{field} is longer than {max_length} characters")
+    return value or None
+
+
+def parse_record(record):
+    """
+    Validate a raw record and build an unsaved Inventory item from it.
+    
+    Args:
+        record (dict): Field values from the import file.
+    
+    Returns:
+        Inventory: The item to upsert.
+    
+    Raises:
+        ImportRowError: If the record is not valid.
+    """
+    if record is None:
+        raise ImportRowError("line could not be parsed")
+    
+    expiry_date = _text(record, 'expiry_date')
+    if expiry_date:
+        try:
+            expiry_date = datetime.date.fromisoformat(expiry_date)
+        except ValueError:
+            raise ImportRowError("expiry_date must be YYYY-MM-DD")
+    
+    supplier_id = record.get('supplier_id') or None
+    if supplier_id is not None:
+        supplier_id = _integer(record, 'supplier_id')
+    
+    quantity = _integer(record, 'quantity', default=0)
+    reorder_level = _integer(record, 'reorder_level')
+    
+    return Inventory(
+        sku=_text(record, 'sku', required=True, max_length=50),
+        item_name=_text(record, 'item_name', required=True, max_length=255),
+        category=_text(record, 'category', max_length=100),
+        quantity=quantity,
+        reorder_level=reorder_level,
+        stock_gap=quantity - reorder_level,
+        expiry_date=expiry_date,
+        supplier_id=supplier_id,
+    )
+
+
+class InventoryImport:
+    """
+    Import inventory rows from a stream, a chunk at a time.
+    
+    Args:
+        user (UserProfile): The user the ledger rows are recorded against.
+        chunk_size (int, optional): Rows per database transaction.
+    """
+    
+    def __init__(self, user, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.user = user
+        self.chunk_size = chunk_size
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.error_count = 0
+        self.errors = []
+        self.elapsed = 0.0
+        # Supplier ids already looked up, and whether each exists
+        self._suppliers = {}
+    
+    def _error(self, line_number, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line_number, 'error': message})
+    
+    def run(self, stream, fmt):
+        """
+        Import every record in a text stream.
+        
+        Args:
+            stream: A text file object.
+            fmt (str): CSV_FORMAT or JSONL_FORMAT.
+        
+        Returns:
+            InventoryImport: self, with the counts filled in.
+        """
+        started = time.perf_counter()
+        chunk = []
+        
+        for line_number, record in iter_records(stream, fmt):
+            self.rows += 1
+            try:
+                chunk.append((line_number, parse_record(record)))
+            except ImportRowError as e:
+                self._error(line_number, str(e))
+                continue
+            
+            if len(chunk) >= self.chunk_size:
+                self._import_chunk(chunk)
+                chunk = []
+        
+        if chunk:
+            self._import_chunk(chunk)
+        
+        if self.created or self.updated:
+            # Bulk operations send no signals
+            bump_model_version(Inventory)
+            bump_model_version(Transaction)
+        
+        self.elapsed = time.perf_counter() - started
+        return self
+    
+    def _check_suppliers(self, chunk):
+        """Look up the chunk's supplier ids not seen before, with one query."""
+        unseen = {item.supplier_id for _, item in chunk} - set(self._suppliers) - {None}
+        if unseen:
+            found = set(Supplier.objects.filter(pk__in=unseen).values_list('pk', flat=True))
+            for supplier_id in unseen:
+                self._suppliers[supplier_id] = supplier_id in found
+    
+    def _import_chunk(self, chunk):
+        self._check_suppliers(chunk)
+        
+        # A SKU repeated within a chunk keeps its last row
+        items = {}
+        for line_number, item in chunk:
+            if item.supplier_id is not None and not self._suppliers[item.supplier_id]:
+                # One unknown supplier would fail the whole chunk's upsert
+                self._error(line_number, f"supplier {item.supplier_id} does not exist")
+                continue
+            items[item.sku] = (line_number, item)
+        
+        if not items:
+            return
+        
+        try:
+            with db_transaction.atomic():
+                self._upsert(items)
+        except DatabaseError as e:
+            for line_number, _ in items.values():
+                self._error(line_number, f"database error: {e}")
+    
+    def _upsert(self, items):
+        skus = list(items)
+        existing = {
+            row[0]: row[1:]
+            for row in Inventory.objects.select_for_update().filter(sku__in=skus)
+            .values_list('sku', 'pk', *Inventory.COUNTER_FIELDS)
+        }
+        
+        now = timezone.now()
+        objs = []
+        for _, item in items.values():
+            item.last_updated = now
+            objs.append(item)
+        
+        options = {'update_conflicts': True, 'update_fields': UPSERT_UPDATE_FIELDS}
+        # MySQL upserts on any unique key and cannot name one
+        if connection.features.supports_update_conflicts_with_target:
+            options['unique_fields'] = ['sku']
+        Inventory.objects.bulk_create(objs, batch_size=self.chunk_size, **options)
+        
+        # Primary keys of upserted rows are not returned on every backend
+        new_ids = dict(
+            Inventory.objects.filter(sku__in=[sku for sku in skus if sku not in existing])
+            .values_list('sku', 'pk')
+        )
+        
+        ledger_rows = []
+        changes = []
+        for sku, (_, item) in items.items():
+            after = item.counter_state
+            if sku in existing:
+                inventory_id, old_quantity = existing[sku][0], existing[sku][1]
+                changes.append((existing[sku][1:], after))
+                difference = item.quantity - old_quantity
+                if difference:
+                    ledger_rows.append(Transaction(
+                        inventory_id=inventory_id,
+                        user=self.user,
+                        quantity_used=abs(difference),
+                        transaction_type='added' if difference > 0 else 'removed'
+                    ))
+            else:
+                changes.append((None, after))
+                ledger_rows.append(Transaction(
+                    inventory_id=new_ids[sku],
+                    user=self.user,
+                    quantity_used=item.quantity,
+                    transaction_type='added'
+                ))
+        
+        Transaction.objects.bulk_create(ledger_rows, batch_size=self.chunk_size)
+        record_inventory_changes(changes)
+        
+        self.created += len(new_ids)
+        self.updated += len(existing)
+    
+    @property
+    def throughput(self):
+        """Rows imported per second."""
+        imported = self.created + self.updated
+        return imported / self.elapsed if self.elapsed else 0.0
+    
+    def report(self):
+        """
+        Summarize the import.
+        
+        Returns:
+            dict: Row, created, updated and error counts, timing and the
+            first MAX_REPORTED_ERRORS errors.
+        """
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'updated': self.updated,
+            'error_count': self.error_count,
+            'errors': self.errors,
+            'elapsed_seconds': round(self.elapsed, 3),
+            'rows_per_second': round(self.throughput, 1),
+        }
+
+
+def import_inventory(stream, fmt, user, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Import inventory rows from a text or binary stream.
+    
+    Args:
+        stream: A file object; binary streams are decoded as UTF-8.
+        fmt (str): CSV_FORMAT or JSONL_FORMAT.
+        user (UserProfile): The user the ledger rows are recorded against.
+        chunk_size (int, optional): Rows per database transaction.
+    
+    Returns:
+        dict: The import report.
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported import format: {fmt!r}")
+    
+    if not isinstance(stream, io.TextIOBase):
+        stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    
+    return InventoryImport(user, chunk_size).run(stream, fmt).report()
@@ -0,0 +1,131 @@
+"""
+Management command to benchmark the memory used by Excel exports.
+
+This command writes synthetic transaction-ledger rows to an XLSX workbook in
+two ways and reports the peak Python memory, time and file size of each:
+
+- in-memory: xlsxwriter's normal mode writing to a BytesIO, which keeps every
+  cell until the workbook is closed (how Excel exports used to be built);
+- constant-memory: xlsxwriter's constant_memory mode writing to a temporary
+  file, as restaurant_management.utils.export.excel_export does.
+
+No database access is needed, so it measures the workbook writer alone.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from io import BytesIO
+import datetime
+import tempfile
+import time
+import tracemalloc
+
+from restaurant_management.utils.export import write_excel
+
+HEADERS = [
+    'Transaction ID', 'Item', 'Category', 'User', 'Type',
+    'Quantity', 'Date/Time'
+]
+
+TRANSACTION_TYPES = ('added', 'removed', 'adjusted')
+
+MODES = ('constant', 'memory')
+
+
+def ledger_rows(count):
+    """
+    Produce synthetic transaction report rows.
+    
+    Args:
+        count (int): Number of rows.
+    
+    Yields:
+        list: One row in the transaction report layout.
+    """
+    start = datetime.datetime(2024, 1, 1)
+    for number in range(1, count + 1):
+        yield [
+            number,
+            f'Item {number % 5000}',
+            f'Category {number % 40}',
+            f'user{number % 25}',
+            TRANSACTION_TYPES[number % 3],
+            number % 100 + 1,
+            (start + datetime.timedelta(seconds=number * 30)).strftime('%Y-%m-%d %H:%M')
+        ]
+
+
+class Command(BaseCommand):
+    """Command to benchmark the memory used by Excel exports."""
+    
+    help = 'Compare peak memory of constant-memory and in-memory Excel exports'
+    
+    def add_arguments(self, parser):
+        """
+        Add command arguments.
+        
+        Args:
+            parser: The argument parser.
+        """
+        parser.add_argument(
+            '--rows',
+            type=int,
+            nargs='+',
+            default=[100000, 500000, 1000000],
+            help='Row counts to export (default: 100000 500000 1000000)'
+        )
+        parser.add_argument(
+            '--mode',
+            choices=MODES,
+            action='append',
+            help='Export mode to run; repeat for both (default: both)'
+        )
+    
+    def handle(self, *args, **options):
+        """
+        Execute the command.
+        
+        Args:
+            *args: Variable length argument list.
+            **options: Arbitrary keyword arguments.
+        """
+        modes = options['mode'] or list(MODES)
+        if any(rows < 1 for rows in options['rows']):
+            raise CommandError("Row counts must be positive")
+        
+        self.stdout.write(f"{'Rows':>10}  {'Mode':<10}  {'Peak MiB':>9}  {'Seconds':>8}  {'File MiB':>9}")
+        
+        for rows in options['rows']:
+            for mode in modes:
+                peak, elapsed, size = self.run_export(rows, mode)
+                self.stdout.write(
+                    f"{rows:>10}  {mode:<10}  {peak / 2**20:>9.1f}  {elapsed:>8.1f}  {size / 2**20:>9.1f}"
+                )
+    
+    def run_export(self, rows, mode):
+        """
+        Export synthetic rows and measure the run.
+        
+        Args:
+            rows (int): Number of rows.
+            mode (str): 'constant' or 'memory'.
+        
+        Returns:
+            tuple: Peak traced memory in bytes, elapsed seconds and file size
+            in bytes.
+        """
+        tracemalloc.start()
+        began = time.perf_counter()
+        try:
+            if mode == 'constant':
+                with tempfile.TemporaryFile(suffix='.xlsx') as output:
+                    write_excel(output, HEADERS, ledger_rows(rows))
+                    size = output.tell()
+            else:
+                output = BytesIO()
+                write_excel(output, HEADERS, ledger_rows(rows), constant_memory=False)
+                size = output.getbuffer().nbytes
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        
+        return peak, time.perf_counter() - began, size
@@ -0,0 +1,204 @@
+"""
+Management command to benchmark login throughput.
+
+This command creates scratch users, logs in on many threads at once through
+django.contrib.auth.authenticate() with the configured backends, and reports
+logins per second and the average time of each kind of attempt: by username,
+by email, with a wrong password and for an unknown user. Every kind should
+take about one password hash; an unknown user or a wrong password that takes
+much less reveals which accounts exist, and one that takes a multiple of it
+is paying for extra lookups or hashes. Pass --backends to compare another
+backend list, e.g. django.contrib.auth.backends.ModelBackend in front of
+store.backends.CustomUserBackend, and set PASSWORD_HASH_ITERATIONS to see
+what a work factor costs; users created here are hashed with it.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import override_settings
+from contextlib import nullcontext
+import threading
+import time
+import uuid
+
+from store.models import UserProfile
+
+PASSWORD = 'Bench-login-pass-1'
+
+ATTEMPT_KINDS = ('username', 'email', 'wrong_password', 'unknown_user')
+
+
+class Command(BaseCommand):
+    """Command to benchmark login throughput."""
+    
+    help = 'Log scratch users in on many threads and report login throughput'
+    
+    def add_arguments(self, parser):
+        """
+        Add command arguments.
+        
+        Args:
+            parser: The argument parser.
+        """
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=4,
+            help='Number of concurrent workers (default: 4)'
+        )
+        parser.add_argument(
+            '--logins',
+            type=int,
+            default=200,
+            help='Total number of login attempts, spread over the attempt kinds (default: 200)'
+        )
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=50,
+            help='Number of scratch users (default: 50)'
+        )
+        parser.add_argument(
+            '--backends',
+            nargs='+',
+            help='Authentication backends to use instead of AUTHENTICATION_BACKENDS'
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Keep the scratch users'
+        )
+    
+    def handle(self, *args, **options):
+        """
+        Execute the command.
+        
+        Args:
+            *args: Variable length argument list.
+            **options: Arbitrary keyword arguments.
+        """
+        threads = options['threads']
+        logins = options['logins']
+        user_count = options['users']
+        
+        if threads < 1 or logins < 1 or user_count < 1:
+            raise CommandError("threads, logins and users must be positive")
+        
+        prefix = f'bench-login-{uuid.uuid4().hex[:8]}'
+        # One hash shared by every scratch user, so setup costs one hash
+        password = make_password(PASSWORD)
+        users = User.objects.bulk_create([
+            User(username=f'{prefix}-{i}', email=f'{prefix}-{i}@example.com', password=password)
+            for i in range(user_count)
+        ])
+        if not all(user.pk for user in users):
+            users = list(User.objects.filter(username__startswith=f'{prefix}-'))
+        UserProfile.objects.bulk_create([UserProfile(user=user, role='staff') for user in users])
+        
+        backends = options['backends']
+        settings_override = (
+            override_settings(AUTHENTICATION_BACKENDS=backends) if backends else nullcontext()
+        )
+        try:
+            with settings_override:
+                results = self.run_logins(users, prefix, threads, logins)
+        finally:
+            if not options['keep']:
+                User.objects.filter(username__startswith=f'{prefix}-').delete()
+        
+        self.report(results)
+    
+    def run_logins(self, users, prefix, threads, logins):
+        """
+        Run the login attempts on the worker threads.
+        
+        Args:
+            users (list): The scratch users.
+            prefix (str): The scratch usernames' prefix.
+            threads (int): Number of concurrent workers.
+            logins (int): Total number of attempts.
+        
+        Returns:
+            dict: 'elapsed' seconds and, per attempt kind, the 'count',
+            'seconds' spent and 'unexpected' outcomes.
+        """
+        results = {kind: {'count': 0, 'seconds': 0.0, 'unexpected': 0} for kind in ATTEMPT_KINDS}
+        results_lock = threading.Lock()
+        remaining = iter(range(logins))
+        remaining_lock = threading.Lock()
+        start = threading.Barrier(threads)
+        
+        def attempt(number):
+            user = users[number % len(users)]
+            kind = ATTEMPT_KINDS[number % len(ATTEMPT_KINDS)]
+            credentials = {
+                'username': (prefix + '-missing') if kind == 'unknown_user'
+                else user.email if kind == 'email' else user.username,
+                'password': PASSWORD + 'x' if kind == 'wrong_password' else PASSWORD,
+            }
+            began = time.perf_counter()
+            authenticated = authenticate(None, **credentials)
+            seconds = time.perf_counter() - began
+            expected = kind in ('username', 'email')
+            return kind, seconds, (authenticated is not None) != expected
+        
+        def worker():
+            local = {kind: {'count': 0, 'seconds': 0.0, 'unexpected': 0} for kind in ATTEMPT_KINDS}
+            try:
+                start.wait()
+                while True:
+                    with remaining_lock:
+                        number = next(remaining, None)
+                    if number is None:
+                        break
+                    kind, seconds, unexpected = attempt(number)
+                    local[kind]['count'] += 1
+                    local[kind]['seconds'] += seconds
+                    local[kind]['unexpected'] += int(unexpected)
+            finally:
+                with results_lock:
+                    for kind, values in local.items():
+                        for key, value in values.items():
+                            results[kind][key] += value
+                # Each thread has its own database connection
+                connection.close()
+        
+        self.stdout.write(f"Running {logins} login attempts on {threads} threads...")
+        
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        began = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        results['elapsed'] = time.perf_counter() - began
+        return results
+    
+    def report(self, results):
+        """
+        Write the benchmark results.
+        
+        Args:
+            results (dict): The results of run_logins.
+        """
+        elapsed = results['elapsed']
+        attempts = sum(results[kind]['count'] for kind in ATTEMPT_KINDS)
+        self.stdout.write(
+            f"Elapsed: {elapsed:.2f}s, throughput: {attempts / elapsed:.1f} logins/s"
+        )
+        for kind in ATTEMPT_KINDS:
+            values = results[kind]
+            average = values['seconds'] / values['count'] * 1000 if values['count'] else 0
+            self.stdout.write(
+                f"  {kind}: {values['count']} attempts, {average:.1f} ms average"
+            )
+        
+        unexpected = sum(results[kind]['unexpected'] for kind in ATTEMPT_KINDS)
+        if unexpected:
+            raise CommandError(f"{unexpected} login attempts had an unexpected outcome")
+        
+        self.stdout.write(self.style.SUCCESS("All login attempts had the expected outcome."))
+
@@ -0,0 +1,173 @@
+"""
+Management command to benchmark concurrent stock removals.
+
+This command creates a scratch inventory item, removes stock from it from many
+threads at once through the stock service, and then checks that no update was
+lost: the final quantity must equal the starting quantity minus every
+successful removal, and there must be exactly one ledger row per removal.
+Run it against the production database engine (MySQL); SQLite serializes
+writers and will mostly measure lock waits.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from django.db import connection, OperationalError
+import threading
+import time
+import uuid
+
+from store.models import Inventory, Transaction, UserProfile
+from store.stock import remove_stock, InsufficientStock
+
+# Attempts per removal before it is counted as a database error
+MAX_ATTEMPTS = 20
+
+
+class Command(BaseCommand):
+    """Command to benchmark concurrent stock removals."""
+    
+    help = 'Remove stock from one item on many threads and check that no update is lost'
+    
+    def add_arguments(self, parser):
+        """
+        Add command arguments.
+        
+        Args:
+            parser: The argument parser.
+        """
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=16,
+            help='Number of concurrent workers (default: 16)'
+        )
+        parser.add_argument(
+            '--removals',
+            type=int,
+            default=2000,
+            help='Total number of removals to attempt (default: 2000)'
+        )
+        parser.add_argument(
+            '--quantity',
+            type=int,
+            default=1,
+            help='Units taken by each removal (default: 1)'
+        )
+        parser.add_argument(
+            '--stock',
+            type=int,
+            help='Starting quantity; set it below removals x quantity to test overselling'
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Keep the scratch item and its ledger rows'
+        )
+    
+    def handle(self, *args, **options):
+        """
+        Execute the command.
+        
+        Args:
+            *args: Variable length argument list.
+            **options: Arbitrary keyword arguments.
+        """
+        threads = options['threads']
+        removals = options['removals']
+        quantity = options['quantity']
+        stock = options['stock']
+        if stock is None:
+            stock = removals * quantity
+        
+        if threads < 1 or removals < 1 or quantity < 1 or stock < 0:
+            raise CommandError("threads, removals and quantity must be positive")
+        
+        user, _ = User.objects.get_or_create(
+            username='system',
+            defaults={'email': 'system@example.com'}
+        )
+        profile, _ = UserProfile.objects.get_or_create(user=user, defaults={'role': 'admin'})
+        
+        item = Inventory.objects.create(
+            item_name='Stock contention benchmark',
+            sku=f'BENCH-{uuid.uuid4().hex[:12]}',
+            quantity=stock,
+            reorder_level=0
+        )
+        
+        results = {'removed': 0, 'insufficient': 0, 'errors': 0}
+        results_lock = threading.Lock()
+        remaining = iter(range(removals))
+        remaining_lock = threading.Lock()
+        start = threading.Barrier(threads)
+        
+        def remove_with_retry():
+            # Lock timeouts and deadlocks roll the whole movement back, so
+            # retrying cannot apply it twice
+            for attempt in range(MAX_ATTEMPTS):
+                try:
+                    remove_stock(item.pk, quantity, profile)
+                    return 'removed'
+                except InsufficientStock:
+                    return 'insufficient'
+                except OperationalError:
+                    time.sleep(0.001 * (attempt + 1))
+            return 'errors'
+        
+        def worker():
+            local = {'removed': 0, 'insufficient': 0, 'errors': 0}
+            try:
+                start.wait()
+                while True:
+                    with remaining_lock:
+                        if next(remaining, None) is None:
+                            break
+                    local[remove_with_retry()] += 1
+            finally:
+                with results_lock:
+                    for key, value in local.items():
+                        results[key] += value
+                # Each thread has its own database connection
+                connection.close()
+        
+        self.stdout.write(
+            f"Removing {quantity} x {removals} from {stock} units on {threads} threads..."
+        )
+        
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        began = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - began
+        
+        item.refresh_from_db()
+        ledger_rows = Transaction.objects.filter(inventory=item).count()
+        expected_quantity = stock - results['removed'] * quantity
+        
+        self.stdout.write(
+            f"Removed: {results['removed']}, insufficient stock: {results['insufficient']}, "
+            f"database errors: {results['errors']}"
+        )
+        self.stdout.write(
+            f"Elapsed: {elapsed:.2f}s, throughput: {results['removed'] / elapsed:.0f} removals/s"
+        )
+        self.stdout.write(
+            f"Final quantity: {item.quantity} (expected {expected_quantity}), "
+            f"ledger rows: {ledger_rows} (expected {results['removed']})"
+        )
+        
+        consistent = (
+            item.quantity == expected_quantity
+            and item.quantity >= 0
+            and ledger_rows == results['removed']
+        )
+        
+        if not options['keep']:
+            item.delete()
+        
+        if not consistent:
+            raise CommandError("Lost update detected: stock and ledger do not agree")
+        
+        self.stdout.write(self.style.SUCCESS("No lost updates."))
@@ -0,0 +1,31 @@
+"""
+Management command to report dashboard cache statistics.
+
+This command prints the hit and miss counts of every versioned cache payload.
+With a shared cache backend the counts cover all worker processes.
+"""
+
+from django.core.management.base import BaseCommand
+
+from restaurant_management.utils.cache import get_cache_stats
+import store.utils  # noqa: registers the dashboard payloads
+
+
+class Command(BaseCommand):
+    """Command to report dashboard cache statistics."""
+    
+    help = 'Show hit and miss counts for the cached dashboard payloads'
+    
+    def handle(self, *args, **options):
+        """
+        Handle the command execution.
+        
+        Args:
+            *args: Command arguments.
+            **options: Command options.
+        """
+        for name, stats in get_cache_stats().items():
+            self.stdout.write(
+                f"{name}: {stats['hits']} hits, {stats['misses']} misses "
+                f"({stats['hit_ratio'] * 100:.1f}% hit ratio)"
+            )
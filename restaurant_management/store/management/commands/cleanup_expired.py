@@ -10,7 +10,8 @@ from django.db import transaction
 import datetime
 import logging
 
-from store.models import Inventory, Transaction, UserProfile
+from store.models import Inventory, UserProfile
+from store.stock import clear_stock
 from django.contrib.auth.models import User
 
 
@@ -111,21 +112,14 @@ class Command(BaseCommand):
                 original_quantity = item.quantity
                 
                 if remove:
-                    # Create transaction record
-                    Transaction.objects.create(
-                        inventory=item,
-                        user=system_profile,
-                        quantity_used=original_quantity,
-                        transaction_type='removed'
-                    )
-                    
-                    # Set quantity to 0
-                    item.quantity = 0
-                    item.save()
+                    # Remove what is left now, not what was read above, and
+                    # record the removal in the same transaction
+                    change = clear_stock(item, system_profile)
+                    removed_quantity = change.transaction.quantity_used if change.transaction else 0
                     
                     self.stdout.write(
                         f"Removed: {item.item_name} (ID: {item.id}), "
-                        f"Expired on: {item.expiry_date}, Removed quantity: {original_quantity}"
+                        f"Expired on: {item.expiry_date}, Removed quantity: {removed_quantity}"
                     )
                 else:
                     self.stdout.write(
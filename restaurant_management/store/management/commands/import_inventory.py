@@ -0,0 +1,103 @@
+"""
+Management command to import inventory items from a file.
+
+This command streams a CSV or JSON Lines file and upserts the rows on SKU in
+chunks, recording a ledger transaction for every new item and quantity change.
+Columns: sku, item_name, category, quantity, reorder_level, expiry_date
+(YYYY-MM-DD) and supplier_id.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+import logging
+
+from store.importer import (
+    import_inventory, guess_format, IMPORT_FORMATS, DEFAULT_CHUNK_SIZE
+)
+from store.models import UserProfile
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """Command to import inventory items from a file."""
+    
+    help = 'Import inventory items from a CSV or JSON Lines file, upserting on SKU'
+    
+    def add_arguments(self, parser):
+        """
+        Add command arguments.
+        
+        Args:
+            parser: The argument parser.
+        """
+        parser.add_argument(
+            'path',
+            help='CSV or JSON Lines file to import'
+        )
+        parser.add_argument(
+            '--format',
+            choices=IMPORT_FORMATS,
+            help='File format (default: guessed from the file extension)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f'Rows per database transaction (default: {DEFAULT_CHUNK_SIZE})'
+        )
+        parser.add_argument(
+            '--user',
+            default='system',
+            help='Username the ledger transactions are recorded against (default: system)'
+        )
+    
+    def handle(self, *args, **options):
+        """
+        Execute the command.
+        
+        Args:
+            *args: Variable length argument list.
+            **options: Arbitrary keyword arguments.
+        """
+        path = options['path']
+        fmt = options['format'] or guess_format(path)
+        chunk_size = options['chunk_size']
+        
+        if chunk_size < 1:
+            raise CommandError("--chunk-size must be positive")
+        
+        try:
+            profile = UserProfile.objects.get(user__username=options['user'])
+        except UserProfile.DoesNotExist:
+            if options['user'] != 'system':
+                raise CommandError(f"No user profile for '{options['user']}'")
+            system_user, _ = User.objects.get_or_create(
+                username='system',
+                defaults={'email': 'system@example.com'}
+            )
+            profile, _ = UserProfile.objects.get_or_create(user=system_user, defaults={'role': 'admin'})
+        
+        self.stdout.write(f"Importing {path} as {fmt} in chunks of {chunk_size}...")
+        
+        try:
+            with open(path, encoding='utf-8-sig', newline='') as stream:
+                report = import_inventory(stream, fmt, profile, chunk_size=chunk_size)
+        except OSError as e:
+            raise CommandError(f"Cannot read {path}: {e}")
+        
+        for error in report['errors']:
+            self.stdout.write(self.style.WARNING(f"Line {error['line']}: {error['error']}"))
+        if report['error_count'] > len(report['errors']):
+            self.stdout.write(self.style.WARNING(
+                f"... and {report['error_count'] - len(report['errors'])} more errors"
+            ))
+        
+        logger.info("Inventory import of %s: %s", path, report)
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Read {report['rows']} rows: {report['created']} created, {report['updated']} updated, "
+            f"{report['error_count']} errors in {report['elapsed_seconds']}s "
+            f"({report['rows_per_second']} rows/s)."
+        ))
@@ -0,0 +1,86 @@
+"""
+Management command to reconcile the inventory counters.
+
+This command compares the incrementally maintained inventory counters with the
+inventory table and rebuilds them. It can be run periodically, or after bulk
+changes made outside the application (e.g. directly in MySQL).
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+import logging
+
+from store.counters import COUNTER_NAMES, COUNTERS_PK, rebuild_inventory_counters
+from store.models import InventoryCounters
+from store.utils import get_inventory_summary
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """Command to reconcile the inventory counters."""
+    
+    help = 'Compare the inventory counters with the inventory table and rebuild them'
+    
+    def add_arguments(self, parser):
+        """
+        Add command arguments.
+        
+        Args:
+            parser: The argument parser.
+        """
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show any drift without rebuilding the counters'
+        )
+    
+    def handle(self, *args, **options):
+        """
+        Handle the command execution.
+        
+        Args:
+            *args: Command arguments.
+            **options: Command options.
+        """
+        dry_run = options['dry_run']
+        
+        stored = InventoryCounters.objects.filter(pk=COUNTERS_PK).first()
+        summary = get_inventory_summary()
+        actual = {
+            'total_items': summary['total_inventory_items'],
+            'low_stock_count': summary['low_stock_count'],
+            'expired_count': summary['expired_count'],
+            'expiring_count': summary['expiring_count'],
+        }
+        
+        if stored is None:
+            self.stdout.write("No inventory counters found.")
+        else:
+            drift = 0
+            for name in COUNTER_NAMES:
+                stored_value = getattr(stored, name)
+                if stored_value != actual[name]:
+                    drift += 1
+                    self.stdout.write(self.style.WARNING(
+                        f"  {name}: stored {stored_value}, actual {actual[name]}"
+                    ))
+            
+            if drift == 0:
+                self.stdout.write(f"Counters (as of {stored.as_of}) match the inventory table.")
+            else:
+                logger.warning("Inventory counters drifted on %d field(s)", drift)
+        
+        if dry_run:
+            self.stdout.write(self.style.WARNING("DRY RUN - No changes will be made."))
+            return
+        
+        with transaction.atomic():
+            counters = rebuild_inventory_counters()
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt inventory counters: {counters.total_items} items, "
+            f"{counters.low_stock_count} low stock, {counters.expired_count} expired, "
+            f"{counters.expiring_count} expiring soon."
+        ))
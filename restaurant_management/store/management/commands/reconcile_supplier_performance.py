@@ -0,0 +1,89 @@
+"""
+Management command to reconcile the supplier performance counters.
+
+This command compares the incrementally maintained SupplierPerformance
+counters with the orders table and recomputes the suppliers whose counters
+have drifted. It can be run periodically, or after bulk changes made outside
+the application (e.g. directly in MySQL).
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+import logging
+
+from store.models import Supplier
+from supplier.counters import find_performance_drift
+from supplier.utils import get_month_periods, recompute_supplier_performance
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """Command to reconcile the supplier performance counters."""
+    
+    help = 'Compare the supplier performance counters with the orders table and repair them'
+    
+    def add_arguments(self, parser):
+        """
+        Add command arguments.
+        
+        Args:
+            parser: The argument parser.
+        """
+        parser.add_argument(
+            '--months',
+            type=int,
+            default=2,
+            help='Number of months to check, starting with the current one (default: 2)'
+        )
+        parser.add_argument(
+            '--supplier-id',
+            type=int,
+            help='Check only this supplier ID'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show any drift without repairing the counters'
+        )
+    
+    def handle(self, *args, **options):
+        """
+        Handle the command execution.
+        
+        Args:
+            *args: Command arguments.
+            **options: Command options.
+        """
+        if options['months'] < 1:
+            raise CommandError("--months must be at least 1")
+        
+        supplier_ids = None
+        if options['supplier_id']:
+            if not Supplier.objects.filter(id=options['supplier_id']).exists():
+                raise CommandError(f"Supplier with ID {options['supplier_id']} does not exist.")
+            supplier_ids = [options['supplier_id']]
+        
+        periods = get_month_periods(options['months'], include_current=True)
+        drift = find_performance_drift(periods, supplier_ids)
+        
+        for supplier_id, period_start, name, stored, actual in drift:
+            self.stdout.write(self.style.WARNING(
+                f"  Supplier {supplier_id}, {period_start:%b %Y}: {name} stored {stored}, actual {actual}"
+            ))
+        
+        if not drift:
+            self.stdout.write(f"Counters for {len(periods)} months match the orders table.")
+            return
+        
+        drifted = sorted({supplier_id for supplier_id, *_ in drift})
+        logger.warning("Supplier performance counters drifted for %d supplier(s)", len(drifted))
+        
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING("DRY RUN - No changes will be made."))
+            return
+        
+        recompute_supplier_performance(periods, drifted)
+        self.stdout.write(self.style.SUCCESS(
+            f"Recomputed counters for {len(drifted)} suppliers over {len(periods)} months."
+        ))
@@ -0,0 +1,76 @@
+"""
+Management command to repair the denormalized order totals.
+
+This command compares the items_count and total_quantity stored on each order
+with its order_items rows and recounts the orders that have drifted. It can
+be run periodically, or after changes made outside the application (e.g.
+directly in MySQL).
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+import logging
+
+from store.models import Order
+from store.order_totals import find_order_totals_drift, refresh_order_totals
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """Command to repair the denormalized order totals."""
+    
+    help = 'Compare the stored order totals with the order items and repair them'
+    
+    def add_arguments(self, parser):
+        """
+        Add command arguments.
+        
+        Args:
+            parser: The argument parser.
+        """
+        parser.add_argument(
+            '--order-id',
+            type=int,
+            help='Check only this order ID'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show any drift without repairing the totals'
+        )
+    
+    def handle(self, *args, **options):
+        """
+        Handle the command execution.
+        
+        Args:
+            *args: Command arguments.
+            **options: Command options.
+        """
+        order_ids = None
+        if options['order_id']:
+            if not Order.objects.filter(id=options['order_id']).exists():
+                raise CommandError(f"Order with ID {options['order_id']} does not exist.")
+            order_ids = [options['order_id']]
+        
+        drift = find_order_totals_drift(order_ids)
+        
+        for order_id, stored_count, actual_count, stored_quantity, actual_quantity in drift:
+            self.stdout.write(self.style.WARNING(
+                f"  Order {order_id}: items_count stored {stored_count}, actual {actual_count}; "
+                f"total_quantity stored {stored_quantity}, actual {actual_quantity}"
+            ))
+        
+        if not drift:
+            self.stdout.write("Order totals match the order items.")
+            return
+        
+        logger.warning("Order totals drifted for %d order(s)", len(drift))
+        
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING("DRY RUN - No changes will be made."))
+            return
+        
+        repaired = refresh_order_totals([order_id for order_id, *_ in drift])
+        self.stdout.write(self.style.SUCCESS(f"Recounted totals for {repaired} orders."))
@@ -0,0 +1,93 @@
+"""
+Management command to run the background report worker.
+
+This command claims queued report jobs one at a time and writes each report
+to REPORT_ARTIFACT_DIR (see store.report_jobs). Run one or more of these
+processes alongside the web server, e.g. under the same process supervisor;
+with --once it works through the queue and exits, which suits cron.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+import time
+
+from store.report_jobs import claim_next_job, run_job, purge_report_jobs
+
+
+class Command(BaseCommand):
+    """Command to run the background report worker."""
+    
+    help = 'Generate queued report jobs'
+    
+    def add_arguments(self, parser):
+        """
+        Add command arguments.
+        
+        Args:
+            parser: The argument parser.
+        """
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit when the queue is empty instead of waiting for new jobs'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Seconds to wait between checks of an empty queue (default: 2)'
+        )
+        parser.add_argument(
+            '--max-jobs',
+            type=int,
+            help='Exit after generating this many reports'
+        )
+        parser.add_argument(
+            '--purge',
+            action='store_true',
+            help='First delete finished jobs and files that can no longer be reused'
+        )
+    
+    def handle(self, *args, **options):
+        """
+        Execute the command.
+        
+        Args:
+            *args: Variable length argument list.
+            **options: Arbitrary keyword arguments.
+        """
+        if options['poll_interval'] <= 0:
+            raise CommandError("--poll-interval must be positive")
+        
+        if options['purge']:
+            purged = purge_report_jobs()
+            self.stdout.write(f"Purged {purged} expired report jobs.")
+        
+        processed = 0
+        try:
+            while options['max_jobs'] is None or processed < options['max_jobs']:
+                # Long-running process: drop connections the server has timed out
+                close_old_connections()
+                
+                job = claim_next_job()
+                if job is None:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+                
+                started = time.perf_counter()
+                run_job(job)
+                processed += 1
+                
+                elapsed = time.perf_counter() - started
+                if job.status == job.DONE:
+                    self.stdout.write(self.style.SUCCESS(
+                        f"Job #{job.id}: {job.file_name} in {elapsed:.1f}s"
+                    ))
+                else:
+                    self.stderr.write(f"Job #{job.id} failed:\n{job.error}")
+        except KeyboardInterrupt:
+            self.stdout.write("Stopped.")
+        
+        self.stdout.write(f"Processed {processed} report jobs.")
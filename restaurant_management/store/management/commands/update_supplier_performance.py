@@ -8,12 +8,14 @@ It can be run periodically to maintain up-to-date supplier performance data.
 from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
 from django.db import transaction
-import datetime
 import logging
 
 from store.models import Supplier, Order
 from supplier.models import SupplierPerformance
-from supplier.utils import calculate_supplier_metrics
+from supplier.utils import (
+    calculate_supplier_metrics, calculate_all_supplier_metrics,
+    recompute_supplier_performance, get_month_periods
+)
 
 
 logger = logging.getLogger(__name__)
@@ -55,6 +57,19 @@ class Command(BaseCommand):
             action='store_true',
             help='Show what would be done without making changes'
         )
+        
+        parser.add_argument(
+            '--recompute',
+            action='store_true',
+            help='Calculate all suppliers and months in one grouped query and bulk upsert the results'
+        )
+        
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='With --recompute, split suppliers across this many processes (default: 1)'
+        )
     
     def handle(self, *args, **options):
         """
@@ -86,15 +101,17 @@ class Command(BaseCommand):
         if dry_run:
             self.stdout.write(self.style.WARNING("DRY RUN - No changes will be made."))
         
+        periods = get_month_periods(months, today)
+        
+        if options['recompute']:
+            self.recompute(suppliers, periods, force, dry_run, options['workers'])
+            return
+        
         # Calculate metrics for each supplier and month
         for supplier in suppliers:
             self.stdout.write(f"Processing supplier: {supplier.name} (ID: {supplier.id})")
             
-            for i in range(months):
-                # Calculate month period
-                month_end = today.replace(day=1) - datetime.timedelta(days=1) - datetime.timedelta(days=30*i)
-                month_start = month_end.replace(day=1)
-                
+            for month_start, month_end in periods:
                 self.stdout.write(f"  Calculating metrics for period: {month_start} to {month_end}")
                 
                 # Check if metrics already exist for this period
@@ -144,4 +161,37 @@ class Command(BaseCommand):
                             
                             self.stdout.write(self.style.SUCCESS(f"  Created new metrics record."))
         
-        self.stdout.write(self.style.SUCCESS("Successfully updated supplier performance metrics."))
\ No newline at end of file
+        self.stdout.write(self.style.SUCCESS("Successfully updated supplier performance metrics."))
+    
+    def recompute(self, suppliers, periods, force, dry_run, workers):
+        """
+        Recompute metrics with one grouped query and a bulk upsert.
+        
+        Args:
+            suppliers: The suppliers to process.
+            periods (list): (start, end) date tuples of the months to process.
+            force (bool): Overwrite existing metrics.
+            dry_run (bool): Only show the calculated metrics.
+            workers (int): Number of processes for the grouped query.
+        """
+        supplier_ids = [supplier.id for supplier in suppliers]
+        
+        if dry_run:
+            metrics = calculate_all_supplier_metrics(periods, supplier_ids)
+            for (supplier_id, month_start), values in sorted(metrics.items()):
+                self.stdout.write(
+                    f"  Supplier {supplier_id}, {month_start:%b %Y}: "
+                    f"Total Orders: {values['total_orders']}, "
+                    f"On-Time: {values['on_time_deliveries']}, "
+                    f"Late: {values['late_deliveries']}"
+                )
+            return
+        
+        records = recompute_supplier_performance(
+            periods, supplier_ids, force=force, workers=workers
+        )
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Recomputed {len(records)} supplier-month metrics "
+            f"({len(supplier_ids)} suppliers x {len(periods)} months)."
+        ))
\ No newline at end of file
@@ -0,0 +1,44 @@
+from django.db import migrations
+
+# The orders table is not managed by Django, so the indexes that serve keyset
+# pagination on (order_date, id) are added here for existing MySQL databases.
+# New databases get them from restaurant_inventory.sql.
+ORDER_INDEXES = {
+    'idx_order_date': '(`order_date`, `id`)',
+    'idx_supplier_order_date': '(`supplier_id`, `order_date`, `id`)',
+}
+
+
+def add_order_indexes(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'mysql':
+        return
+
+    with connection.cursor() as cursor:
+        existing = set(connection.introspection.get_constraints(cursor, 'orders'))
+        for name, columns in ORDER_INDEXES.items():
+            if name not in existing:
+                cursor.execute(f'ALTER TABLE `orders` ADD KEY `{name}` {columns}')
+
+
+def remove_order_indexes(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'mysql':
+        return
+
+    with connection.cursor() as cursor:
+        existing = set(connection.introspection.get_constraints(cursor, 'orders'))
+        for name in ORDER_INDEXES:
+            if name in existing:
+                cursor.execute(f'ALTER TABLE `orders` DROP KEY `{name}`')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0002_inventorycounters'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_order_indexes, remove_order_indexes),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations
+
+
+def has_inventory(connection):
+    with connection.cursor() as cursor:
+        return 'inventory' in connection.introspection.table_names(cursor)
+
+
+def create_index(apps, schema_editor):
+    from store.search import create_search_index
+    connection = schema_editor.connection
+    if not has_inventory(connection):
+        return
+    create_search_index(connection)
+
+
+def drop_index(apps, schema_editor):
+    from store.search import drop_search_index
+    connection = schema_editor.connection
+    if not has_inventory(connection):
+        return
+    drop_search_index(connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0003_order_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
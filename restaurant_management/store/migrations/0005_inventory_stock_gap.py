@@ -0,0 +1,86 @@
+from django.db import migrations
+
+# The inventory table is not managed by Django, so stock_gap, its index and
+# the triggers that keep it equal to quantity - reorder_level are installed
+# here. Triggers (rather than a generated column) let the ORM keep writing
+# every field, and also cover raw updates such as reduce_stock_after_order.
+# New MySQL databases get the same schema from restaurant_inventory.sql.
+
+MYSQL_FORWARD = [
+    'ALTER TABLE `inventory` ADD COLUMN `stock_gap` int(11) NOT NULL DEFAULT 0',
+    'UPDATE `inventory` SET `stock_gap` = `quantity` - `reorder_level`',
+    'CREATE TRIGGER `inventory_stock_gap_insert` BEFORE INSERT ON `inventory` FOR EACH ROW '
+    'SET NEW.stock_gap = NEW.quantity - NEW.reorder_level',
+    'CREATE TRIGGER `inventory_stock_gap_update` BEFORE UPDATE ON `inventory` FOR EACH ROW '
+    'SET NEW.stock_gap = NEW.quantity - NEW.reorder_level',
+    'ALTER TABLE `inventory` ADD KEY `idx_stock_gap` (`stock_gap`)',
+]
+
+MYSQL_BACKWARD = [
+    'DROP TRIGGER IF EXISTS `inventory_stock_gap_insert`',
+    'DROP TRIGGER IF EXISTS `inventory_stock_gap_update`',
+    'ALTER TABLE `inventory` DROP KEY `idx_stock_gap`, DROP COLUMN `stock_gap`',
+]
+
+# SQLite cannot assign to NEW, so its triggers update the row afterwards
+SQLITE_FORWARD = [
+    'ALTER TABLE inventory ADD COLUMN stock_gap integer NOT NULL DEFAULT 0',
+    'UPDATE inventory SET stock_gap = quantity - reorder_level',
+    'CREATE TRIGGER inventory_stock_gap_insert AFTER INSERT ON inventory BEGIN '
+    'UPDATE inventory SET stock_gap = NEW.quantity - NEW.reorder_level WHERE id = NEW.id; END',
+    'CREATE TRIGGER inventory_stock_gap_update AFTER UPDATE OF quantity, reorder_level ON inventory BEGIN '
+    'UPDATE inventory SET stock_gap = NEW.quantity - NEW.reorder_level WHERE id = NEW.id; END',
+    'CREATE INDEX idx_stock_gap ON inventory (stock_gap)',
+]
+
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS inventory_stock_gap_insert',
+    'DROP TRIGGER IF EXISTS inventory_stock_gap_update',
+    'DROP INDEX IF EXISTS idx_stock_gap',
+    'ALTER TABLE inventory DROP COLUMN stock_gap',
+]
+
+STATEMENTS = {
+    'mysql': (MYSQL_FORWARD, MYSQL_BACKWARD),
+    'sqlite': (SQLITE_FORWARD, SQLITE_BACKWARD),
+}
+
+
+def has_stock_gap(connection, cursor):
+    if 'inventory' not in connection.introspection.table_names(cursor):
+        return None
+    columns = connection.introspection.get_table_description(cursor, 'inventory')
+    return any(column.name == 'stock_gap' for column in columns)
+
+
+def add_stock_gap(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor not in STATEMENTS:
+        return
+
+    with connection.cursor() as cursor:
+        if has_stock_gap(connection, cursor) is False:
+            for statement in STATEMENTS[connection.vendor][0]:
+                cursor.execute(statement)
+
+
+def remove_stock_gap(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor not in STATEMENTS:
+        return
+
+    with connection.cursor() as cursor:
+        if has_stock_gap(connection, cursor):
+            for statement in STATEMENTS[connection.vendor][1]:
+                cursor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0004_inventory_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_stock_gap, remove_stock_gap),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations
+
+# The inventory table is not managed by Django. The stock report groups items
+# by category and lists each category in (item_name, id) order, which this
+# index serves without a sort. New databases get it from restaurant_inventory.sql.
+INDEX_NAME = 'idx_category_item'
+
+
+def add_category_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'mysql':
+        return
+
+    with connection.cursor() as cursor:
+        existing = set(connection.introspection.get_constraints(cursor, 'inventory'))
+        if INDEX_NAME not in existing:
+            cursor.execute(
+                f'ALTER TABLE `inventory` ADD KEY `{INDEX_NAME}` (`category`, `item_name`, `id`)'
+            )
+
+
+def remove_category_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'mysql':
+        return
+
+    with connection.cursor() as cursor:
+        existing = set(connection.introspection.get_constraints(cursor, 'inventory'))
+        if INDEX_NAME in existing:
+            cursor.execute(f'ALTER TABLE `inventory` DROP KEY `{INDEX_NAME}`')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0006_reportjob'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_category_index, remove_category_index),
+    ]
@@ -0,0 +1,80 @@
+from django.db import migrations
+
+# The orders table is not managed by Django, so the denormalized items_count
+# and total_quantity columns are added, and filled from order_items, here.
+# The application keeps them current (see store.order_totals) and the
+# repair_order_totals command corrects any drift. New MySQL databases get the
+# columns from restaurant_inventory.sql.
+
+BACKFILL = (
+    'UPDATE orders SET '
+    'items_count = (SELECT COUNT(*) FROM order_items WHERE order_items.order_id = orders.id), '
+    'total_quantity = (SELECT COALESCE(SUM(quantity_ordered), 0) FROM order_items '
+    'WHERE order_items.order_id = orders.id)'
+)
+
+MYSQL_FORWARD = [
+    'ALTER TABLE `orders` ADD COLUMN `items_count` int(11) NOT NULL DEFAULT 0, '
+    'ADD COLUMN `total_quantity` int(11) NOT NULL DEFAULT 0',
+    BACKFILL,
+]
+
+MYSQL_BACKWARD = [
+    'ALTER TABLE `orders` DROP COLUMN `items_count`, DROP COLUMN `total_quantity`',
+]
+
+SQLITE_FORWARD = [
+    'ALTER TABLE orders ADD COLUMN items_count integer NOT NULL DEFAULT 0',
+    'ALTER TABLE orders ADD COLUMN total_quantity integer NOT NULL DEFAULT 0',
+    BACKFILL,
+]
+
+SQLITE_BACKWARD = [
+    'ALTER TABLE orders DROP COLUMN items_count',
+    'ALTER TABLE orders DROP COLUMN total_quantity',
+]
+
+STATEMENTS = {
+    'mysql': (MYSQL_FORWARD, MYSQL_BACKWARD),
+    'sqlite': (SQLITE_FORWARD, SQLITE_BACKWARD),
+}
+
+
+def has_order_totals(connection, cursor):
+    if 'orders' not in connection.introspection.table_names(cursor):
+        return None
+    columns = connection.introspection.get_table_description(cursor, 'orders')
+    return any(column.name == 'items_count' for column in columns)
+
+
+def add_order_totals(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor not in STATEMENTS:
+        return
+    
+    with connection.cursor() as cursor:
+        if has_order_totals(connection, cursor) is False:
+            for statement in STATEMENTS[connection.vendor][0]:
+                cursor.execute(statement)
+
+
+def remove_order_totals(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor not in STATEMENTS:
+        return
+    
+    with connection.cursor() as cursor:
+        if has_order_totals(connection, cursor):
+            for statement in STATEMENTS[connection.vendor][1]:
+                cursor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0007_inventory_category_index'),
+    ]
+    
+    operations = [
+        migrations.RunPython(add_order_totals, remove_order_totals),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:38
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('store', '0008_order_totals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlertDigestReceipt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest_date', models.DateField()),
+                ('seen_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='alert_digest_receipt', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations
+
+# Logins look users up by username or email (see store.user_context). auth_user
+# belongs to django.contrib.auth and only indexes the username, so the email
+# index is added here. New MySQL databases get it from restaurant_inventory.sql.
+INDEX_NAME = 'idx_auth_user_email'
+
+
+def add_email_index(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        existing = set(connection.introspection.get_constraints(cursor, 'auth_user'))
+    if INDEX_NAME not in existing:
+        schema_editor.execute(
+            f'CREATE INDEX {schema_editor.quote_name(INDEX_NAME)} '
+            f'ON {schema_editor.quote_name("auth_user")} ({schema_editor.quote_name("email")})'
+        )
+
+
+def remove_email_index(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        existing = set(connection.introspection.get_constraints(cursor, 'auth_user'))
+    if INDEX_NAME in existing:
+        if connection.vendor == 'mysql':
+            schema_editor.execute(f'DROP INDEX `{INDEX_NAME}` ON `auth_user`')
+        else:
+            schema_editor.execute(f'DROP INDEX {schema_editor.quote_name(INDEX_NAME)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('store', '0009_alertdigestreceipt'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_email_index, remove_email_index),
+    ]
@@ -5,10 +5,12 @@ These models directly correspond to the tables in the database schema.
 The models use Django's ORM and mirror the structure provided in the restaurant_inventory.sql file.
 """
 
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+from restaurant_management.utils.constants import EXPORT_FORMAT_CHOICES, REPORT_TYPE_CHOICES
+
 class UserProfile(models.Model):
     """
     Extends the built-in Django User model with additional fields for role-based access.
@@ -27,22 +29,30 @@ class UserProfile(models.Model):
     
     def __str__(self):
         return f"{self.user.username} - {self.role}"
-
+    
     class Meta:
         managed = True
-        
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the loaded role so role changes are noticed without a read."""
+        instance = super().from_db(db, field_names, values)
+        if 'role' in field_names:
+            instance._loaded_role = instance.role
+        return instance
+    
     @property
     def is_admin(self):
         return self.role == 'admin'
-        
+    
     @property
     def is_manager(self):
         return self.role == 'manager'
-        
+    
     @property
     def is_staff(self):
         return self.role == 'staff'
-        
+    
     @property
     def is_supplier(self):
         return self.role == 'supplier'
@@ -67,6 +77,17 @@ class Supplier(models.Model):
         managed = False  # Using existing database table
 
 
+class InventoryQuerySet(models.QuerySet):
+    """Query helpers for inventory items."""
+    
+    # quantity <= reorder_level, expressed on the indexed stock_gap column
+    LOW_STOCK = models.Q(stock_gap__lte=0)
+    
+    def low_stock(self):
+        """Items at or below their reorder level, served by the stock_gap index."""
+        return self.filter(self.LOW_STOCK)
+
+
 class Inventory(models.Model):
     """
     Represents inventory items in stock.
@@ -80,16 +101,45 @@ class Inventory(models.Model):
     expiry_date = models.DateField(blank=True, null=True)
     supplier = models.ForeignKey(Supplier, on_delete=models.SET_NULL, blank=True, null=True)
     last_updated = models.DateTimeField(auto_now=True)
+    # quantity - reorder_level; kept in step by database triggers so the
+    # low-stock check (stock_gap <= 0) can use an index
+    stock_gap = models.IntegerField(default=0, editable=False)
+    
+    objects = InventoryQuerySet.as_manager()
+    
+    COUNTER_FIELDS = ('quantity', 'reorder_level', 'expiry_date')
     
     def __str__(self):
         return f"{self.item_name} - {self.quantity} units"
     
+    def save(self, *args, **kwargs):
+        """Set stock_gap so the saved instance matches what the triggers store."""
+        self.stock_gap = self.quantity - self.reorder_level
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'quantity', 'reorder_level'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'stock_gap'}
+        super().save(*args, **kwargs)
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the loaded stock state so counter updates need no extra read."""
+        instance = super().from_db(db, field_names, values)
+        if all(field in field_names for field in cls.COUNTER_FIELDS):
+            instance._loaded_counter_state = instance.counter_state
+        return instance
+    
+    @property
+    def counter_state(self):
+        """The fields that decide which inventory counters this item belongs to."""
+        return tuple(getattr(self, field) for field in self.COUNTER_FIELDS)
+    
     class Meta:
         db_table = 'inventory'
         managed = False  # Using existing database table
         verbose_name_plural = "Inventory Items"
         indexes = [
             models.Index(fields=['item_name']),
+            models.Index(fields=['stock_gap'], name='idx_stock_gap'),
         ]
     
     @property
@@ -105,6 +155,27 @@ class Inventory(models.Model):
         return False
 
 
+class InventoryCounters(models.Model):
+    """
+    Single-row table of inventory header statistics.
+    
+    Maintained incrementally on every inventory write (see store.counters) so
+    pages can read their header numbers with one primary-key lookup.
+    """
+    total_items = models.IntegerField(default=0)
+    low_stock_count = models.IntegerField(default=0)
+    expired_count = models.IntegerField(default=0)
+    expiring_count = models.IntegerField(default=0)
+    as_of = models.DateField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Inventory counters as of {self.as_of}"
+    
+    class Meta:
+        verbose_name_plural = "Inventory Counters"
+
+
 class Order(models.Model):
     """
     Represents orders placed with suppliers.
@@ -121,15 +192,132 @@ class Order(models.Model):
     status = models.CharField(max_length=10, choices=ORDER_STATUS, default='pending')
     order_date = models.DateTimeField(default=timezone.now)
     expected_delivery = models.DateField(blank=True, null=True)
+    # Number of order lines and total quantity ordered; maintained on every
+    # order item write (see store.order_totals), never by saving the order
+    items_count = models.IntegerField(default=0, editable=False)
+    total_quantity = models.IntegerField(default=0, editable=False)
+    
+    TOTALS_FIELDS = ('items_count', 'total_quantity')
+    
+    # Fields that decide which supplier performance counters an order
+    # belongs to (see supplier.counters)
+    COUNTER_FIELDS = ('supplier_id', 'order_date', 'status', 'expected_delivery')
     
     def __str__(self):
         return f"Order #{self.id} - {self.supplier.name} - {self.status}"
     
+    def save(self, *args, **kwargs):
+        """
+        Save the order; its post_save handlers still see the previous state.
+        
+        An existing order is saved without its totals, so a stale instance
+        cannot overwrite counts its items have changed since it was loaded.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.TOTALS_FIELDS
+            ]
+        super().save(*args, **kwargs)
+        self._loaded_counter_state = self.counter_state
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the loaded status so status changes need no extra read."""
+        instance = super().from_db(db, field_names, values)
+        if all(field in field_names for field in cls.COUNTER_FIELDS):
+            instance._loaded_counter_state = instance.counter_state
+        return instance
+    
+    @property
+    def counter_state(self):
+        """The fields that decide which performance counters this order belongs to."""
+        return tuple(getattr(self, field) for field in self.COUNTER_FIELDS)
+    
+    @property
+    def loaded_status(self):
+        """The status when the order was loaded or last saved, or None if unknown."""
+        state = getattr(self, '_loaded_counter_state', None)
+        return state[self.COUNTER_FIELDS.index('status')] if state is not None else None
+    
     class Meta:
         db_table = 'orders'
         managed = False  # Using existing database table
 
 
+class AlertDigestReceipt(models.Model):
+    """
+    The last inventory alert digest a user was shown.
+    
+    Shared by every worker process, so each user sees the daily digest once
+    however many workers serve them (see store.alerts).
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='alert_digest_receipt')
+    digest_date = models.DateField()
+    seen_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.user.username} saw the {self.digest_date} alert digest"
+
+
+class OrderItemQuerySet(models.QuerySet):
+    """Order item queries whose bulk writes keep the order totals current."""
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        """Create the items, then recount the orders they were added to."""
+        from .order_totals import refresh_order_totals
+        
+        objs = super().bulk_create(objs, *args, **kwargs)
+        refresh_order_totals({item.order_id for item in objs})
+        for item in objs:
+            item._loaded_totals_state = item.totals_state
+        return objs
+    
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        """Update the items; update() recounts their orders batch by batch."""
+        objs = list(objs)
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        for item in objs:
+            item._loaded_totals_state = item.totals_state
+        return rows
+    
+    def update(self, **kwargs):
+        """Update the items, then recount the orders they left or joined."""
+        from .order_totals import refresh_order_totals
+        
+        if not {'order', 'order_id', 'quantity_ordered'} & set(kwargs):
+            return super().update(**kwargs)
+        
+        with transaction.atomic(using=self.db):
+            before = dict(self.values_list('pk', 'order_id'))
+            rows = super().update(**kwargs)
+            order_ids = set(before.values())
+            if 'order' in kwargs or 'order_id' in kwargs:
+                order_ids.update(
+                    self.model._base_manager.using(self.db)
+                    .filter(pk__in=list(before)).values_list('order_id', flat=True)
+                )
+            refresh_order_totals(order_ids)
+        return rows
+    
+    update.alters_data = True
+    
+    def delete(self):
+        """Delete the items, then recount the orders they belonged to."""
+        from .order_totals import refresh_order_totals
+        
+        with transaction.atomic(using=self.db):
+            order_ids = set(self.values_list('order_id', flat=True))
+            # post_delete skips items deleted through a queryset (see
+            # store.signals), so this is the only totals update
+            deleted = super().delete()
+            refresh_order_totals(order_ids)
+        return deleted
+    
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
 class OrderItem(models.Model):
     """
     Represents individual items within an order.
@@ -139,9 +327,24 @@ class OrderItem(models.Model):
     inventory = models.ForeignKey(Inventory, on_delete=models.CASCADE)
     quantity_ordered = models.IntegerField()
     
+    objects = OrderItemQuerySet.as_manager()
+    
     def __str__(self):
         return f"{self.inventory.item_name} - {self.quantity_ordered} units"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the loaded order and quantity so total updates need no extra read."""
+        instance = super().from_db(db, field_names, values)
+        if 'order_id' in field_names and 'quantity_ordered' in field_names:
+            instance._loaded_totals_state = instance.totals_state
+        return instance
+    
+    @property
+    def totals_state(self):
+        """The order this item counts towards and the quantity it adds."""
+        return self.order_id, self.quantity_ordered
+    
     class Meta:
         db_table = 'order_items'
         managed = False  # Using existing database table
@@ -169,4 +372,56 @@ class Transaction(models.Model):
     
     class Meta:
         db_table = 'transactions'
-        managed = False  # Using existing database table
\ No newline at end of file
+        managed = False  # Using existing database table
+
+
+class ReportJob(models.Model):
+    """
+    A report generated in the background by the report worker.
+    
+    Jobs are queued by store.report_jobs.submit_report, claimed and written
+    to disk by the run_report_worker management command, and downloaded once
+    done. cache_key identifies the report type, format, parameters and the
+    data versions of the models the report reads, so a finished job is
+    reused for identical requests until its data changes.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    
+    STATUS_CHOICES = (
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    )
+    
+    report_type = models.CharField(max_length=20, choices=REPORT_TYPE_CHOICES)
+    format_type = models.CharField(max_length=10, choices=EXPORT_FORMAT_CHOICES)
+    parameters = models.JSONField(default=dict)
+    cache_key = models.CharField(max_length=64, db_index=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    requested_by = models.ForeignKey(
+        UserProfile, on_delete=models.SET_NULL, blank=True, null=True, related_name='report_jobs'
+    )
+    file_name = models.CharField(max_length=255, blank=True)
+    file_path = models.CharField(max_length=500, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    
+    def __str__(self):
+        return f"Report job #{self.id} - {self.report_type} ({self.status})"
+    
+    @property
+    def is_finished(self):
+        """Check if the job has stopped, successfully or not."""
+        return self.status in (self.DONE, self.FAILED)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='idx_report_job_status'),
+        ]
+
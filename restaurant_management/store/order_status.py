@@ -0,0 +1,194 @@
+"""
+Order status state machine for the store application.
+
+An order moves pending -> shipped -> delivered and can be cancelled until it
+has been delivered; delivered and cancelled orders are final.
+
+Orders remember the status they were loaded with (see Order.from_db), so a
+status change is detected without reading the row again. Every change, from
+saving one order, transition_order or bulk_transition_orders, is announced
+once through the order_status_changed signal, and the work that follows a
+transition (delivery notifications, supplier performance counters)
+subscribes to it instead of comparing statuses itself.
+"""
+
+from collections import namedtuple
+
+from django.db import transaction as db_transaction
+from django.dispatch import Signal
+
+from restaurant_management.utils.cache import bump_model_version
+from .models import Order
+
+PENDING = 'pending'
+SHIPPED = 'shipped'
+DELIVERED = 'delivered'
+CANCELLED = 'cancelled'
+
+ALLOWED_TRANSITIONS = {
+    PENDING: (SHIPPED, CANCELLED),
+    SHIPPED: (DELIVERED, CANCELLED),
+    DELIVERED: (),
+    CANCELLED: (),
+}
+
+# Outcome of each order of a bulk transition
+TRANSITIONED = 'transitioned'
+UNCHANGED = 'unchanged'
+INVALID_TRANSITION = 'invalid_transition'
+NOT_FOUND = 'not_found'
+
+# Rows per UPDATE statement for bulk transitions
+BATCH_SIZE = 500
+
+# One order's status change. While order_status_changed is being sent,
+# order._loaded_counter_state still holds the order's state before the change.
+OrderTransition = namedtuple('OrderTransition', ['order', 'old_status', 'new_status'])
+
+# Sent with transitions=[OrderTransition, ...] once per save or bulk transition
+order_status_changed = Signal()
+
+
+class InvalidTransition(ValueError):
+    """Raised when an order cannot move from its status to the requested one."""
+    
+    def __init__(self, order_id, old_status, new_status):
+        self.order_id = order_id
+        self.old_status = old_status
+        self.new_status = new_status
+        super().__init__(
+            f"Order {order_id} cannot change from {old_status!r} to {new_status!r}"
+        )
+
+
+def can_transition(old_status, new_status):
+    """
+    Check whether a status change is allowed.
+    
+    Args:
+        old_status (str): The current status.
+        new_status (str): The requested status.
+    
+    Returns:
+        bool: True if the change is allowed or changes nothing.
+    """
+    return new_status == old_status or new_status in ALLOWED_TRANSITIONS.get(old_status, ())
+
+
+def send_transitions(transitions):
+    """
+    Announce applied status changes to the order_status_changed receivers.
+    
+    Args:
+        transitions (list): OrderTransition tuples.
+    """
+    if transitions:
+        order_status_changed.send(sender=Order, transitions=transitions)
+
+
+def transition_order(order, new_status):
+    """
+    Change one order's status, if the state machine allows it.
+    
+    Args:
+        order (Order): The order, as loaded.
+        new_status (str): The requested status.
+    
+    Returns:
+        Order: The order, saved with its new status.
+    
+    Raises:
+        InvalidTransition: If the change is not allowed, or the order's
+            status was changed by someone else since it was loaded.
+    """
+    old_status = order.loaded_status or order.status
+    if not can_transition(old_status, new_status):
+        raise InvalidTransition(order.pk, old_status, new_status)
+    
+    if new_status == old_status:
+        return order
+    
+    with db_transaction.atomic():
+        # Only the request that still sees the old status makes the change,
+        # so a transition is never applied or announced twice
+        updated = Order.objects.filter(pk=order.pk, status=old_status).update(status=new_status)
+        if not updated:
+            raise InvalidTransition(order.pk, old_status, new_status)
+        
+        order.status = new_status
+        send_transitions([OrderTransition(order, old_status, new_status)])
+        order._loaded_counter_state = order.counter_state
+    
+    # Queryset updates send no signals
+    bump_model_version(Order)
+    
+    return order
+
+
+def bulk_transition_orders(order_ids, new_status):
+    """
+    Change the status of many orders in one database transaction.
+    
+    The orders are locked and read once, the allowed changes are written
+    with one UPDATE per BATCH_SIZE orders, and order_status_changed is sent
+    once with every transition. Orders that cannot make the change are left
+    alone.
+    
+    Args:
+        order_ids (iterable): Primary keys of the orders.
+        new_status (str): The requested status.
+    
+    Returns:
+        list: One dict per order with 'order' (primary key), 'status'
+        (TRANSITIONED, UNCHANGED, INVALID_TRANSITION or NOT_FOUND) and, where
+        the order exists, its 'previous_status'.
+    
+    Raises:
+        ValueError: If new_status is not an order status.
+    """
+    if new_status not in ALLOWED_TRANSITIONS:
+        raise ValueError(f"Unknown order status: {new_status!r}")
+    
+    order_ids = list(dict.fromkeys(order_ids))
+    
+    with db_transaction.atomic():
+        orders = {
+            order.pk: order
+            for order in Order.objects.select_for_update().filter(pk__in=order_ids).order_by('pk')
+        }
+        
+        results = []
+        transitions = []
+        for order_id in order_ids:
+            result = {'order': order_id}
+            results.append(result)
+            
+            order = orders.get(order_id)
+            if order is None:
+                result['status'] = NOT_FOUND
+                continue
+            
+            result['previous_status'] = order.status
+            if order.status == new_status:
+                result['status'] = UNCHANGED
+            elif can_transition(order.status, new_status):
+                result['status'] = TRANSITIONED
+                transitions.append(OrderTransition(order, order.status, new_status))
+            else:
+                result['status'] = INVALID_TRANSITION
+        
+        changed_ids = [transition.order.pk for transition in transitions]
+        for start in range(0, len(changed_ids), BATCH_SIZE):
+            Order.objects.filter(pk__in=changed_ids[start:start + BATCH_SIZE]).update(status=new_status)
+        
+        for transition in transitions:
+            transition.order.status = new_status
+        send_transitions(transitions)
+        for transition in transitions:
+            transition.order._loaded_counter_state = transition.order.counter_state
+    
+    if transitions:
+        # Queryset updates send no signals
+        bump_model_version(Order)
+    
+    return results
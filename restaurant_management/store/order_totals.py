@@ -0,0 +1,125 @@
+"""
+Denormalized order totals for the store application.
+
+Each order stores the number of its lines (items_count) and the sum of their
+quantities (total_quantity), so order lists, serializers and exports can show
+them without reading order_items.
+
+Saving or deleting a single OrderItem applies the change to its order with
+F() expressions (see the OrderItem signal handlers). The bulk paths of
+OrderItem.objects (bulk_create, bulk_update, update and delete) recount the
+orders they touched instead, with one UPDATE per BATCH_SIZE orders. Changes
+the application cannot see, such as writes made directly in MySQL, are
+corrected by the repair_order_totals command.
+"""
+
+from collections import defaultdict
+
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from restaurant_management.utils.cache import bump_model_version
+from .models import Order, OrderItem
+
+# Orders per UPDATE statement when recounting
+BATCH_SIZE = 500
+
+
+def _counted_totals():
+    """Get expressions counting an order's items, for use in Order queries."""
+    items = OrderItem.objects.filter(order=OuterRef('pk')).order_by().values('order')
+    return {
+        'items_count': Coalesce(
+            Subquery(items.annotate(count=Count('id')).values('count'), output_field=IntegerField()),
+            0
+        ),
+        'total_quantity': Coalesce(
+            Subquery(items.annotate(quantity=Sum('quantity_ordered')).values('quantity'),
+                     output_field=IntegerField()),
+            0
+        ),
+    }
+
+
+def record_item_changes(changes):
+    """
+    Apply order item writes to the totals of their orders, one UPDATE per order.
+    
+    Args:
+        changes (iterable): (before, after) pairs of OrderItem.totals_state,
+            None for a created or deleted item.
+    """
+    deltas = defaultdict(lambda: [0, 0])
+    for before, after in changes:
+        for state, sign in ((before, -1), (after, 1)):
+            if state is None:
+                continue
+            order_id, quantity = state
+            deltas[order_id][0] += sign
+            deltas[order_id][1] += sign * quantity
+    
+    changed = False
+    for order_id, (count_delta, quantity_delta) in deltas.items():
+        if not (count_delta or quantity_delta):
+            continue
+        changed = Order.objects.filter(pk=order_id).update(
+            items_count=F('items_count') + count_delta,
+            total_quantity=F('total_quantity') + quantity_delta,
+        ) or changed
+    
+    if changed:
+        # Queryset updates send no signals
+        bump_model_version(Order)
+
+
+def refresh_order_totals(order_ids=None):
+    """
+    Recount the stored totals of orders from their items.
+    
+    Args:
+        order_ids (iterable, optional): The orders to recount. Defaults to
+            every order.
+    
+    Returns:
+        int: The number of orders updated.
+    """
+    if order_ids is None:
+        updated = Order.objects.update(**_counted_totals())
+    else:
+        order_ids = sorted(set(order_ids))
+        updated = 0
+        for start in range(0, len(order_ids), BATCH_SIZE):
+            updated += Order.objects.filter(
+                pk__in=order_ids[start:start + BATCH_SIZE]
+            ).update(**_counted_totals())
+    
+    if updated:
+        bump_model_version(Order)
+    return updated
+
+
+def find_order_totals_drift(order_ids=None):
+    """
+    Compare the stored order totals with the order items.
+    
+    Args:
+        order_ids (list, optional): Restrict to these orders.
+    
+    Returns:
+        list: (order_id, stored items_count, actual items_count, stored
+        total_quantity, actual total_quantity) for every order that differs.
+    """
+    actual = _counted_totals()
+    orders = Order.objects.annotate(
+        actual_items_count=actual['items_count'],
+        actual_total_quantity=actual['total_quantity'],
+    ).exclude(
+        items_count=F('actual_items_count'),
+        total_quantity=F('actual_total_quantity'),
+    )
+    if order_ids is not None:
+        orders = orders.filter(pk__in=order_ids)
+    
+    return list(orders.order_by('pk').values_list(
+        'pk', 'items_count', 'actual_items_count', 'total_quantity', 'actual_total_quantity'
+    ))
@@ -0,0 +1,45 @@
+"""
+Role-based API permissions for the store and supplier applications.
+
+The role is read with get_user_role, so for requests authenticated by
+ClaimsJWTAuthentication it comes from the token's signed claims and the
+check needs no query; for session users it comes from the profile the
+authentication backend already loaded.
+"""
+
+from rest_framework.permissions import BasePermission
+
+from .user_context import get_user_role, get_user_supplier_id
+
+
+class HasRole(BasePermission):
+    """Allow authenticated users whose role is in `roles`."""
+    
+    roles = ()
+    message = "You don't have permission to access this resource."
+    
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated) and (
+            get_user_role(request) in self.roles
+        )
+
+
+class IsAdmin(HasRole):
+    roles = ('admin',)
+
+
+class IsAdminOrManager(HasRole):
+    roles = ('admin', 'manager')
+
+
+class IsStoreUser(HasRole):
+    roles = ('admin', 'manager', 'staff')
+
+
+class IsSupplier(HasRole):
+    """Allow supplier users who are linked to a supplier."""
+    
+    roles = ('supplier',)
+    
+    def has_permission(self, request, view):
+        return super().has_permission(request, view) and get_user_supplier_id(request) is not None
@@ -0,0 +1,279 @@
+"""
+Background report jobs for the store application.
+
+Generating a long report inside a web request ties up a WSGI worker for as
+long as the report takes. Instead, a request is recorded as a ReportJob and
+answered at once with the job's id; the run_report_worker management command
+claims queued jobs, writes each report to a file under REPORT_ARTIFACT_DIR,
+and the client polls the job until it can download the file.
+
+Each job has a cache key built from the report type, format, parameters and
+a fingerprint of the tables the report reads, taken from the database itself
+so that writes made by other workers, or directly in MySQL, change it too.
+Submitting a report that matches a finished job whose data has not changed
+since returns that job, so the file is served without being generated again;
+one that matches a queued or running job joins it.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import traceback
+
+from django.conf import settings
+from django.db import connection, transaction as db_transaction
+from django.db import models
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import Length
+from django.utils import timezone
+
+from .models import ReportJob
+from .reports import get_report_generator
+
+# Seconds a finished report is reused for, even if its data has not changed
+DEFAULT_ARTIFACT_TIMEOUT = 60 * 60
+
+# Seconds after which a running job is assumed to have lost its worker
+DEFAULT_JOB_TIMEOUT = 30 * 60
+
+
+def get_artifact_dir():
+    """Get the directory report files are written to, creating it if needed."""
+    path = getattr(settings, 'REPORT_ARTIFACT_DIR', os.path.join(settings.BASE_DIR, 'report_artifacts'))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _artifact_timeout():
+    return getattr(settings, 'REPORT_ARTIFACT_TIMEOUT', DEFAULT_ARTIFACT_TIMEOUT)
+
+
+def _job_timeout():
+    return getattr(settings, 'REPORT_JOB_TIMEOUT', DEFAULT_JOB_TIMEOUT)
+
+
+def get_job_generator(job):
+    """
+    Build the report generator for a job.
+    
+    Args:
+        job (ReportJob): The job.
+    
+    Returns:
+        ReportGenerator: The generator for the job's report and parameters.
+    """
+    parameters = dict(job.parameters)
+    start_date = parameters.pop('start_date', None)
+    end_date = parameters.pop('end_date', None)
+    return get_report_generator(
+        job.report_type,
+        start_date and datetime.date.fromisoformat(start_date),
+        end_date and datetime.date.fromisoformat(end_date),
+        job.format_type,
+        **parameters
+    )
+
+
+def _fingerprint_aggregates(model):
+    """Get aggregates of a model's table that change when its rows do."""
+    aggregates = {'rows': Count('pk'), 'last_pk': Max('pk')}
+    for field in model._meta.concrete_fields:
+        if field.primary_key:
+            continue
+        name = field.attname
+        if field.choices:
+            for number, (value, _) in enumerate(field.flatchoices):
+                aggregates[f'{name}_{number}'] = Count('pk', filter=Q(**{name: value}))
+        elif isinstance(field, models.BooleanField):
+            aggregates[name] = Count('pk', filter=Q(**{name: True}))
+        elif isinstance(field, (models.DateField, models.TimeField)):
+            aggregates[name] = Max(name)
+        elif isinstance(field, (models.IntegerField, models.DecimalField, models.FloatField,
+                                models.ForeignKey)):
+            aggregates[name] = Sum(name)
+        elif isinstance(field, (models.CharField, models.TextField)):
+            aggregates[name] = Sum(Length(name))
+    return aggregates
+
+
+def get_data_fingerprint(report_models):
+    """
+    Fingerprint the data of the tables a report reads, one query per table.
+    
+    The fingerprint holds each table's row count, highest primary key,
+    latest dates, per-choice counts and the sums of its numbers and text
+    lengths, so inserts, deletes and nearly every update change it. An
+    update that keeps all of them equal, such as swapping two values, goes
+    unnoticed until REPORT_ARTIFACT_TIMEOUT expires the finished job.
+    
+    Args:
+        report_models (iterable): Model classes.
+    
+    Returns:
+        list: One dict of aggregates per model, in the same order.
+    """
+    return [
+        model._default_manager.order_by().aggregate(**_fingerprint_aggregates(model))
+        for model in report_models
+    ]
+
+
+def report_cache_key(generator, report_type):
+    """
+    Build the cache key of a report.
+    
+    Args:
+        generator (ReportGenerator): The configured report generator.
+        report_type (str): The report type.
+    
+    Returns:
+        str: A hex digest of the report type, format, parameters and the
+        current data fingerprint of the models the report reads.
+    """
+    identity = [
+        report_type,
+        generator.export_format,
+        generator.parameters,
+        get_data_fingerprint(generator.models),
+    ]
+    return hashlib.sha256(
+        json.dumps(identity, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def submit_report(report_type, format_type, user=None, start_date=None, end_date=None, **options):
+    """
+    Request a report, reusing a matching job where possible.
+    
+    Args:
+        report_type (str): One of the REPORT_TYPE_CHOICES.
+        format_type (str): One of the EXPORT_FORMAT_CHOICES.
+        user (UserProfile, optional): The user requesting the report.
+        start_date (date, optional): Start of the report period.
+        end_date (date, optional): End of the report period.
+        **options: Report-specific options, such as by_month.
+    
+    Returns:
+        ReportJob: A finished job with an up-to-date file, a queued or
+        running job for the same report, or a newly queued job.
+    """
+    generator = get_report_generator(report_type, start_date, end_date, format_type, **options)
+    cache_key = report_cache_key(generator, report_type)
+    
+    fresh = timezone.now() - datetime.timedelta(seconds=_artifact_timeout())
+    matching = ReportJob.objects.filter(cache_key=cache_key).filter(
+        Q(status=ReportJob.DONE, finished_at__gte=fresh)
+        | Q(status__in=[ReportJob.QUEUED, ReportJob.RUNNING])
+    ).order_by('-created_at')
+    
+    for job in matching:
+        if job.status != ReportJob.DONE or os.path.exists(job.file_path):
+            return job
+    
+    return ReportJob.objects.create(
+        report_type=report_type,
+        format_type=generator.export_format,
+        parameters=generator.parameters,
+        cache_key=cache_key,
+        requested_by=user,
+    )
+
+
+def claim_next_job():
+    """
+    Claim the oldest queued job for this worker.
+    
+    Running jobs whose worker has not finished them within REPORT_JOB_TIMEOUT
+    are claimed again. Where the database supports it, rows locked by other
+    workers are skipped, so several workers can run side by side.
+    
+    Returns:
+        ReportJob: The claimed job, now RUNNING, or None if there is none.
+    """
+    stale = timezone.now() - datetime.timedelta(seconds=_job_timeout())
+    
+    with db_transaction.atomic():
+        jobs = ReportJob.objects.filter(
+            Q(status=ReportJob.QUEUED) | Q(status=ReportJob.RUNNING, started_at__lt=stale)
+        ).order_by('created_at', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            jobs = jobs.select_for_update(skip_locked=True)
+        else:
+            jobs = jobs.select_for_update()
+        
+        job = jobs.first()
+        if job is None:
+            return None
+        
+        job.status = ReportJob.RUNNING
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'started_at'])
+    
+    return job
+
+
+def run_job(job):
+    """
+    Generate a claimed job's report file.
+    
+    The file is written under a temporary name and renamed into place, so a
+    half-written file is never served. Failures are recorded on the job.
+    
+    Args:
+        job (ReportJob): A RUNNING job.
+    
+    Returns:
+        ReportJob: The job, now DONE or FAILED.
+    """
+    partial_path = None
+    try:
+        generator = get_job_generator(job)
+        file_name = f'{generator.get_filename()}.{generator.file_extension}'
+        path = os.path.join(get_artifact_dir(), f'{job.id}-{job.cache_key[:16]}-{file_name}')
+        partial_path = path + '.part'
+        
+        generator.write(partial_path)
+        os.replace(partial_path, path)
+    except Exception:
+        job.status = ReportJob.FAILED
+        job.error = traceback.format_exc()
+        if partial_path and os.path.exists(partial_path):
+            os.remove(partial_path)
+    else:
+        job.status = ReportJob.DONE
+        job.file_name = file_name
+        job.file_path = path
+    
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'file_name', 'file_path', 'finished_at'])
+    return job
+
+
+def purge_report_jobs(older_than=None):
+    """
+    Delete finished jobs, and their files, that can no longer be reused.
+    
+    Args:
+        older_than (timedelta, optional): Age of the jobs to delete. Defaults
+            to REPORT_ARTIFACT_TIMEOUT.
+    
+    Returns:
+        int: The number of jobs deleted.
+    """
+    if older_than is None:
+        older_than = datetime.timedelta(seconds=_artifact_timeout())
+    
+    expired = ReportJob.objects.filter(
+        status__in=[ReportJob.DONE, ReportJob.FAILED],
+        finished_at__lt=timezone.now() - older_than
+    )
+    
+    for path in expired.exclude(file_path='').values_list('file_path', flat=True).iterator():
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    
+    deleted, _ = expired.delete()
+    return deleted
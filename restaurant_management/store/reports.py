@@ -5,22 +5,26 @@ This module contains functions for generating various reports for inventory,
 orders, transactions, and suppliers.
 """
 
-import csv
 import io
 import datetime
-from django.db.models import Sum, Count, Q, F, Avg
+from django.db.models import (
+    Count, Q, F, Avg, DateField, DurationField, ExpressionWrapper
+)
+from django.db.models.functions import TruncDate, TruncMonth
 from django.utils import timezone
-from django.http import HttpResponse
 from django.template.loader import render_to_string
+from django.contrib.auth.models import User
 
-import xlsxwriter
-from io import BytesIO
-
-from .models import Inventory, Order, OrderItem, Transaction, Supplier
+from supplier.models import DeliveryNotification
+from .models import Inventory, Order, OrderItem, Transaction, Supplier, UserProfile
+from .utils import order_export_rows
 from restaurant_management.utils.constants import (
-    CSV_EXPORT, EXCEL_EXPORT, PDF_EXPORT,
+    CSV_EXPORT, EXCEL_EXPORT, PDF_EXPORT, JSONL_EXPORT,
     STOCK_REPORT, ORDER_REPORT, SUPPLIER_REPORT, TRANSACTION_REPORT
 )
+from restaurant_management.utils.export import (
+    EXPORT_CHUNK_SIZE, EXPORT_FILE_TYPES, excel_export, streaming_export, write_export
+)
 
 
 class ReportGenerator:
@@ -48,107 +52,161 @@ class ReportGenerator:
         
         self.format_type = format_type
     
+    # Column headers; set by subclasses
+    headers = []
+    
+    # Models the report reads, whose data fingerprint identifies its data
+    models = []
+    
+    def get_filename(self):
+        """
+        Get the file name of the report, without extension.
+        
+        This method should be implemented by subclasses.
+        
+        Returns:
+            str: The file name.
+        """
+        raise NotImplementedError("Subclasses must implement this method.")
+    
+    def rows(self):
+        """
+        Produce the report rows one at a time.
+        
+        This method should be implemented by subclasses as a generator, so
+        that streamed reports never hold more than a chunk of rows.
+        
+        Yields:
+            list: The cell values of one row.
+        """
+        raise NotImplementedError("Subclasses must implement this method.")
+    
+    @property
+    def export_format(self):
+        """The format the report is written in; unsupported formats fall back to CSV."""
+        if self.format_type in (EXCEL_EXPORT, JSONL_EXPORT):
+            return self.format_type
+        return CSV_EXPORT
+    
+    @property
+    def content_type(self):
+        """The content type of the report file."""
+        return EXPORT_FILE_TYPES[self.export_format][0]
+    
+    @property
+    def file_extension(self):
+        """The extension of the report file."""
+        return EXPORT_FILE_TYPES[self.export_format][1]
+    
+    @property
+    def parameters(self):
+        """
+        The options that determine the report's content, as JSON-safe values.
+        
+        Subclasses with extra options add them here.
+        """
+        return {
+            'start_date': self.start_date.isoformat(),
+            'end_date': self.end_date.isoformat(),
+        }
+    
     def generate(self):
         """
         Generate the report.
         
-        This method should be implemented by subclasses.
+        CSV and JSON Lines reports are streamed; Excel reports are written
+        to a temporary file in constant memory. Unsupported formats fall
+        back to CSV.
         
         Returns:
             HttpResponse: The report as an HTTP response.
         """
-        raise NotImplementedError("Subclasses must implement this method.")
+        filename = self.get_filename()
+        if self.export_format == EXCEL_EXPORT:
+            return self._generate_excel(filename, self.headers, self.rows())
+        if self.export_format == JSONL_EXPORT:
+            return self._generate_jsonl(filename, self.headers, self.rows())
+        return self._generate_csv(filename, self.headers, self.rows())
+    
+    def write(self, path):
+        """
+        Write the report to a file, for background report jobs.
+        
+        Args:
+            path (str): Path of the file to create.
+        """
+        write_export(path, self.headers, self.rows(), self.export_format)
     
     def _generate_csv(self, filename, headers, data):
         """
-        Generate a CSV report.
+        Generate a streaming CSV report.
         
         Args:
             filename (str): Name of the file.
             headers (list): List of column headers.
-            data (list): List of data rows.
+            data (iterable): Data rows; consumed while the response is sent.
         
         Returns:
-            HttpResponse: The CSV report as an HTTP response.
+            StreamingHttpResponse: The CSV report as a streaming HTTP response.
         """
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
-        
-        writer = csv.writer(response)
-        writer.writerow(headers)
+        return streaming_export(filename, headers, data, CSV_EXPORT)
+    
+    def _generate_jsonl(self, filename, headers, data):
+        """
+        Generate a streaming JSON Lines report.
         
-        for row in data:
-            writer.writerow(row)
+        Args:
+            filename (str): Name of the file.
+            headers (list): List of column headers, used as the object keys.
+            data (iterable): Data rows; consumed while the response is sent.
         
-        return response
+        Returns:
+            StreamingHttpResponse: The JSON Lines report as a streaming HTTP response.
+        """
+        return streaming_export(filename, headers, data, JSONL_EXPORT)
     
     def _generate_excel(self, filename, headers, data):
         """
-        Generate an Excel report.
+        Generate an Excel report in constant memory.
+        
+        The workbook is written a row at a time to a temporary file, which is
+        then served with FileResponse.
         
         Args:
             filename (str): Name of the file.
             headers (list): List of column headers.
-            data (list): List of data rows.
+            data (iterable): Data rows.
         
         Returns:
-            HttpResponse: The Excel report as an HTTP response.
+            FileResponse: The Excel report as an HTTP response.
         """
-        output = BytesIO()
-        workbook = xlsxwriter.Workbook(output)
-        worksheet = workbook.add_worksheet()
-        
-        # Add header row with formatting
-        header_format = workbook.add_format({
-            'bold': True,
-            'bg_color': '#f0f0f0',
-            'border': 1
-        })
-        
-        for col_num, header in enumerate(headers):
-            worksheet.write(0, col_num, header, header_format)
-        
-        # Add data rows
-        for row_num, row_data in enumerate(data, 1):
-            for col_num, cell_value in enumerate(row_data):
-                worksheet.write(row_num, col_num, cell_value)
-        
-        # Adjust column widths
-        for col_num, header in enumerate(headers):
-            worksheet.set_column(col_num, col_num, len(header) + 5)
-        
-        workbook.close()
-        output.seek(0)
-        
-        response = HttpResponse(
-            output.read(),
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        response['Content-Disposition'] = f'attachment; filename="{filename}.xlsx"'
-        
-        return response
+        return excel_export(filename, headers, data)
 
 
 class InventoryReportGenerator(ReportGenerator):
     """Generator for inventory reports."""
     
-    def generate(self):
+    models = [Inventory, Supplier]
+    
+    headers = [
+        'ID', 'SKU', 'Item Name', 'Category', 'Quantity', 
+        'Reorder Level', 'Expiry Date', 'Supplier', 'Low Stock', 'Last Updated'
+    ]
+    
+    def get_filename(self):
+        return 'inventory_report'
+    
+    def rows(self):
         """
-        Generate an inventory report.
+        Produce the inventory report rows.
         
-        Returns:
-            HttpResponse: The inventory report as an HTTP response.
+        Yields:
+            list: One row per inventory item.
         """
-        inventory_items = Inventory.objects.select_related('supplier').all()
+        inventory_items = Inventory.objects.select_related('supplier').order_by('id')
         
-        headers = [
-            'ID', 'SKU', 'Item Name', 'Category', 'Quantity', 
-            'Reorder Level', 'Expiry Date', 'Supplier', 'Low Stock', 'Last Updated'
-        ]
-        
-        data = []
-        for item in inventory_items:
-            row = [
+        for item in inventory_items.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            yield [
                 item.id,
                 item.sku or '',
                 item.item_name,
@@ -160,199 +218,217 @@ class InventoryReportGenerator(ReportGenerator):
                 'Yes' if item.is_low_stock else 'No',
                 item.last_updated.strftime('%Y-%m-%d %H:%M')
             ]
-            data.append(row)
-        
-        if self.format_type == CSV_EXPORT:
-            return self._generate_csv('inventory_report', headers, data)
-        elif self.format_type == EXCEL_EXPORT:
-            return self._generate_excel('inventory_report', headers, data)
-        else:
-            # Default to CSV if format not supported
-            return self._generate_csv('inventory_report', headers, data)
 
 
 class OrderReportGenerator(ReportGenerator):
     """Generator for order reports."""
     
-    def generate(self):
+    models = [Order, OrderItem, Supplier]
+    
+    headers = [
+        'Order ID', 'Supplier', 'Status', 'Order Date', 
+        'Expected Delivery', 'Items Count', 'Total Quantity'
+    ]
+    
+    def get_filename(self):
+        return f'order_report_{self.start_date}_to_{self.end_date}'
+    
+    def rows(self):
         """
-        Generate an order report.
+        Produce the order report rows.
         
         Returns:
-            HttpResponse: The order report as an HTTP response.
+            generator: One row per order in the report period.
         """
         orders = Order.objects.filter(
             order_date__date__gte=self.start_date,
             order_date__date__lte=self.end_date
-        ).select_related('supplier')
-        
-        headers = [
-            'Order ID', 'Supplier', 'Status', 'Order Date', 
-            'Expected Delivery', 'Items Count', 'Total Quantity'
-        ]
+        ).select_related('supplier').order_by('order_date', 'id')
         
-        data = []
-        for order in orders:
-            items_count = OrderItem.objects.filter(order=order).count()
-            total_quantity = OrderItem.objects.filter(order=order).aggregate(
-                total=Sum('quantity_ordered')
-            )['total'] or 0
-            
-            row = [
-                order.id,
-                order.supplier.name,
-                order.status,
-                order.order_date.strftime('%Y-%m-%d %H:%M'),
-                order.expected_delivery.strftime('%Y-%m-%d') if order.expected_delivery else 'Not specified',
-                items_count,
-                total_quantity
-            ]
-            data.append(row)
-        
-        if self.format_type == CSV_EXPORT:
-            return self._generate_csv(f'order_report_{self.start_date}_to_{self.end_date}', headers, data)
-        elif self.format_type == EXCEL_EXPORT:
-            return self._generate_excel(f'order_report_{self.start_date}_to_{self.end_date}', headers, data)
-        else:
-            # Default to CSV if format not supported
-            return self._generate_csv(f'order_report_{self.start_date}_to_{self.end_date}', headers, data)
+        return order_export_rows(
+            orders, datetime_format='%Y-%m-%d %H:%M', no_expected_delivery='Not specified'
+        )
 
 
 class TransactionReportGenerator(ReportGenerator):
     """Generator for transaction reports."""
     
-    def generate(self):
+    models = [Transaction, Inventory, UserProfile, User]
+    
+    headers = [
+        'Transaction ID', 'Item', 'Category', 'User', 'Type', 
+        'Quantity', 'Date/Time'
+    ]
+    
+    def get_filename(self):
+        return f'transaction_report_{self.start_date}_to_{self.end_date}'
+    
+    def rows(self):
         """
-        Generate a transaction report.
+        Produce the transaction report rows.
         
-        Returns:
-            HttpResponse: The transaction report as an HTTP response.
+        Only the columns in the report are fetched, so long periods stream
+        without building model instances.
+        
+        Yields:
+            list: One row per transaction in the report period.
         """
         transactions = Transaction.objects.filter(
             created_at__date__gte=self.start_date,
             created_at__date__lte=self.end_date
-        ).select_related('inventory', 'user__user')
-        
-        headers = [
-            'Transaction ID', 'Item', 'Category', 'User', 'Type', 
-            'Quantity', 'Date/Time'
-        ]
+        ).order_by('created_at', 'id').values_list(
+            'id', 'inventory__item_name', 'inventory__category', 'user__user__username',
+            'transaction_type', 'quantity_used', 'created_at'
+        )
         
-        data = []
-        for transaction in transactions:
-            row = [
-                transaction.id,
-                transaction.inventory.item_name,
-                transaction.inventory.category or 'N/A',
-                transaction.user.user.username,
-                transaction.transaction_type,
-                transaction.quantity_used,
-                transaction.created_at.strftime('%Y-%m-%d %H:%M')
+        for row in transactions.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            transaction_id, item_name, category, username, transaction_type, quantity, created_at = row
+            yield [
+                transaction_id,
+                item_name,
+                category or 'N/A',
+                username,
+                transaction_type,
+                quantity,
+                created_at.strftime('%Y-%m-%d %H:%M')
             ]
-            data.append(row)
-        
-        if self.format_type == CSV_EXPORT:
-            return self._generate_csv(f'transaction_report_{self.start_date}_to_{self.end_date}', headers, data)
-        elif self.format_type == EXCEL_EXPORT:
-            return self._generate_excel(f'transaction_report_{self.start_date}_to_{self.end_date}', headers, data)
-        else:
-            # Default to CSV if format not supported
-            return self._generate_csv(f'transaction_report_{self.start_date}_to_{self.end_date}', headers, data)
+
+
+def supplier_delivery_stats(start_date, end_date, by_month=False):
+    """
+    Get delivery statistics per supplier in one grouped query.
+    
+    Orders in the period are LEFT JOINed to their delivery notification and
+    grouped by supplier (and month, if requested). A delivered order is late
+    when it has an expected delivery date and a notification dated after it;
+    every other delivered order counts as on time.
+    
+    Args:
+        start_date (date): First day of the period.
+        end_date (date): Last day of the period.
+        by_month (bool, optional): Group by calendar month of the order date
+            as well. Defaults to False.
+    
+    Returns:
+        QuerySet: Dicts with supplier_id, supplier__name, [month,]
+        total_orders, delivered_orders, late_deliveries, on_time_deliveries,
+        avg_delivery_time and avg_lateness (timedeltas, None when there is
+        nothing to average), ordered by supplier [and month].
+    """
+    delivered = Q(status='delivered')
+    timed = delivered & Q(
+        expected_delivery__isnull=False,
+        delivery_notification__delivery_date__isnull=False
+    )
+    late = timed & Q(delivery_notification__delivery_date__gt=F('expected_delivery'))
+    
+    orders = Order.objects.filter(
+        order_date__date__gte=start_date,
+        order_date__date__lte=end_date
+    ).annotate(
+        delivery_time=ExpressionWrapper(
+            F('delivery_notification__delivery_date') - TruncDate('order_date'),
+            output_field=DurationField()
+        ),
+        lateness=ExpressionWrapper(
+            F('delivery_notification__delivery_date') - F('expected_delivery'),
+            output_field=DurationField()
+        ),
+    )
+    
+    group_by = ['supplier_id', 'supplier__name']
+    ordering = ['supplier_id']
+    if by_month:
+        orders = orders.annotate(month=TruncMonth('order_date', output_field=DateField()))
+        group_by.append('month')
+        ordering.append('month')
+    
+    return orders.values(*group_by).annotate(
+        total_orders=Count('id'),
+        delivered_orders=Count('id', filter=delivered),
+        late_deliveries=Count('id', filter=late),
+        on_time_deliveries=F('delivered_orders') - F('late_deliveries'),
+        avg_delivery_time=Avg('delivery_time', filter=timed),
+        avg_lateness=Avg('lateness', filter=late),
+    ).order_by(*ordering)
+
+
+def _days(duration):
+    """Format a timedelta as days with one decimal, or 'N/A' if missing."""
+    if duration is None:
+        return 'N/A'
+    return f"{duration.total_seconds() / 86400:.1f}"
 
 
 class SupplierReportGenerator(ReportGenerator):
-    """Generator for supplier performance reports."""
+    """
+    Generator for supplier performance reports.
     
-    def generate(self):
-        """
-        Generate a supplier performance report.
-        
-        Returns:
-            HttpResponse: The supplier report as an HTTP response.
-        """
-        suppliers = Supplier.objects.all()
-        
+    Args:
+        by_month (bool, optional): One row per supplier and month instead of
+            one per supplier. Defaults to False.
+    """
+    
+    models = [Order, Supplier, DeliveryNotification]
+    
+    def __init__(self, start_date=None, end_date=None, format_type=CSV_EXPORT, by_month=False):
+        super().__init__(start_date, end_date, format_type)
+        self.by_month = by_month
+    
+    @property
+    def parameters(self):
+        return {**super().parameters, 'by_month': self.by_month}
+    
+    @property
+    def headers(self):
         headers = [
             'Supplier ID', 'Supplier Name', 'Total Orders', 'Delivered Orders',
-            'On-Time Deliveries', 'Late Deliveries', 'On-Time %', 'Average Delivery Time (days)'
+            'On-Time Deliveries', 'Late Deliveries', 'On-Time %',
+            'Average Delivery Time (days)', 'Average Days Late'
         ]
+        if self.by_month:
+            headers.insert(2, 'Month')
+        return headers
+    
+    def get_filename(self):
+        suffix = '_by_month' if self.by_month else ''
+        return f'supplier_report_{self.start_date}_to_{self.end_date}{suffix}'
+    
+    def rows(self):
+        """
+        Produce the supplier report rows from one grouped query.
         
-        data = []
-        for supplier in suppliers:
-            # Get orders for this supplier in the date range
-            orders = Order.objects.filter(
-                supplier=supplier,
-                order_date__date__gte=self.start_date,
-                order_date__date__lte=self.end_date
-            )
-            
-            total_orders = orders.count()
-            
-            # Skip if no orders in this period
-            if total_orders == 0:
-                continue
-            
-            delivered_orders = orders.filter(status='delivered').count()
-            
-            # Calculate on-time deliveries
-            on_time_deliveries = 0
-            late_deliveries = 0
-            total_delivery_days = 0
-            
-            for order in orders.filter(status='delivered'):
-                # Check if expected_delivery is set
-                if order.expected_delivery:
-                    # Check if there's a delivery notification
-                    try:
-                        from supplier.models import DeliveryNotification
-                        notification = DeliveryNotification.objects.get(order=order)
-                        delivery_date = notification.delivery_date
-                        
-                        # Calculate delivery time
-                        delivery_time = (delivery_date - order.order_date.date()).days
-                        total_delivery_days += delivery_time
-                        
-                        if delivery_date <= order.expected_delivery:
-                            on_time_deliveries += 1
-                        else:
-                            late_deliveries += 1
-                            
-                    except Exception:
-                        # If no delivery notification, use order status update time
-                        on_time_deliveries += 1  # Assume on time if we can't tell
-                else:
-                    on_time_deliveries += 1  # Assume on time if no expected delivery date
-            
-            # Calculate on-time percentage
-            if delivered_orders > 0:
-                on_time_percentage = (on_time_deliveries / delivered_orders) * 100
-                avg_delivery_time = total_delivery_days / delivered_orders if total_delivery_days > 0 else 'N/A'
+        Yields:
+            list: One row per supplier (and month) with orders in the report
+            period.
+        """
+        stats = supplier_delivery_stats(self.start_date, self.end_date, self.by_month)
+        
+        for row in stats:
+            delivered_orders = row['delivered_orders']
+            if delivered_orders:
+                on_time_percentage = f"{row['on_time_deliveries'] / delivered_orders * 100:.1f}%"
             else:
                 on_time_percentage = 'N/A'
-                avg_delivery_time = 'N/A'
             
-            row = [
-                supplier.id,
-                supplier.name,
-                total_orders,
+            values = [
+                row['supplier_id'],
+                row['supplier__name'],
+                row['total_orders'],
                 delivered_orders,
-                on_time_deliveries,
-                late_deliveries,
-                f"{on_time_percentage:.1f}%" if isinstance(on_time_percentage, float) else on_time_percentage,
-                f"{avg_delivery_time:.1f}" if isinstance(avg_delivery_time, float) else avg_delivery_time
+                row['on_time_deliveries'],
+                row['late_deliveries'],
+                on_time_percentage,
+                _days(row['avg_delivery_time']),
+                _days(row['avg_lateness'])
             ]
-            data.append(row)
-        
-        if self.format_type == CSV_EXPORT:
-            return self._generate_csv(f'supplier_report_{self.start_date}_to_{self.end_date}', headers, data)
-        elif self.format_type == EXCEL_EXPORT:
-            return self._generate_excel(f'supplier_report_{self.start_date}_to_{self.end_date}', headers, data)
-        else:
-            # Default to CSV if format not supported
-            return self._generate_csv(f'supplier_report_{self.start_date}_to_{self.end_date}', headers, data)
+            if self.by_month:
+                values.insert(2, row['month'].strftime('%Y-%m'))
+            yield values
 
 
-def get_report_generator(report_type, start_date=None, end_date=None, format_type=CSV_EXPORT):
+def get_report_generator(report_type, start_date=None, end_date=None, format_type=CSV_EXPORT,
+                         **options):
     """
     Factory function to get the appropriate report generator.
     
@@ -361,6 +437,8 @@ def get_report_generator(report_type, start_date=None, end_date=None, format_typ
         start_date (date, optional): Start date for report period. Defaults to None.
         end_date (date, optional): End date for report period. Defaults to None.
         format_type (str, optional): Export format. Defaults to CSV_EXPORT.
+        **options: Report-specific options, such as by_month for the
+            supplier report.
     
     Returns:
         ReportGenerator: The appropriate report generator instance.
@@ -375,6 +453,6 @@ def get_report_generator(report_type, start_date=None, end_date=None, format_typ
     elif report_type == TRANSACTION_REPORT:
         return TransactionReportGenerator(start_date, end_date, format_type)
     elif report_type == SUPPLIER_REPORT:
-        return SupplierReportGenerator(start_date, end_date, format_type)
+        return SupplierReportGenerator(start_date, end_date, format_type, **options)
     else:
         raise ValueError(f"Unrecognized report type: {report_type}")
\ No newline at end of file
@@ -0,0 +1,275 @@
+"""
+Inventory search backends for the store application.
+
+Searching item names and SKUs with icontains is a leading-wildcard LIKE on
+both columns, which scans the whole inventory table on every keystroke. The
+backends here answer the same searches from a full-text index instead:
+
+- MySQL: a FULLTEXT index on (item_name, sku) using the ngram parser, queried
+  in boolean mode so every term must match and terms match as prefixes.
+- SQLite: an FTS5 table kept in sync with the inventory table by triggers.
+- Fallback: the original icontains filter, used when no index is available
+  or the search terms are too short for the index to answer.
+
+Every backend annotates the results with `search_rank` (higher is better) so
+callers can order by relevance.
+"""
+
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.db.models import Case, When, Value, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+INVENTORY_TABLE = 'inventory'
+MYSQL_INDEX_NAME = 'ft_inventory_search'
+SQLITE_FTS_TABLE = 'inventory_fts'
+
+# Ordering for ranked search results; ends in 'id' so it can be keyset paginated
+SEARCH_ORDERING = ('-search_rank', 'item_name', 'id')
+
+# Letters and digits only; everything else separates terms
+TERM_PATTERN = re.compile(r'[^\W_]+')
+
+
+def search_terms(query):
+    """
+    Split a search box query into index terms.
+    
+    Args:
+        query (str): Text typed by the user.
+    
+    Returns:
+        list: Lowercase terms with any full-text operators removed.
+    """
+    return TERM_PATTERN.findall((query or '').lower())
+
+
+class FallbackSearchBackend:
+    """
+    Substring search with icontains, matching the original behavior.
+    
+    Results are ranked exact SKU first, then item names starting with the
+    query, then everything else.
+    """
+    
+    name = 'fallback'
+    
+    def search(self, queryset, query):
+        query = query.strip()
+        return queryset.filter(
+            Q(item_name__icontains=query) | Q(sku__icontains=query)
+        ).annotate(
+            search_rank=Case(
+                When(sku__iexact=query, then=Value(3.0)),
+                When(item_name__istartswith=query, then=Value(2.0)),
+                default=Value(1.0),
+                output_field=FloatField(),
+            )
+        )
+
+
+class MySQLFullTextSearchBackend:
+    """
+    Search using a MySQL FULLTEXT index built with the ngram parser.
+    
+    The ngram parser indexes every run of ngram_token_size characters, so
+    fragments of item names and SKUs match as they did with icontains.
+    """
+    
+    name = 'mysql'
+    
+    # Must match the server's ngram_token_size (MySQL default: 2)
+    min_term_length = 2
+    
+    def __init__(self, fallback):
+        self.fallback = fallback
+    
+    def search(self, queryset, query):
+        terms = search_terms(query)
+        if not terms or any(len(term) < self.min_term_length for term in terms):
+            return self.fallback.search(queryset, query)
+        
+        against = ' '.join(f'+{term}*' for term in terms)
+        table = queryset.model._meta.db_table
+        rank = RawSQL(
+            f'MATCH (`{table}`.`item_name`, `{table}`.`sku`) AGAINST (%s IN BOOLEAN MODE)',
+            (against,),
+            output_field=FloatField()
+        )
+        return queryset.annotate(search_rank=rank).filter(search_rank__gt=0)
+    
+    @staticmethod
+    def is_available(connection):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, INVENTORY_TABLE)
+        return MYSQL_INDEX_NAME in constraints
+    
+    @staticmethod
+    def create_index(connection):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'ALTER TABLE `{INVENTORY_TABLE}` ADD FULLTEXT KEY `{MYSQL_INDEX_NAME}` '
+                f'(`item_name`, `sku`) WITH PARSER ngram'
+            )
+    
+    @staticmethod
+    def drop_index(connection):
+        with connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE `{INVENTORY_TABLE}` DROP KEY `{MYSQL_INDEX_NAME}`')
+
+
+class SQLiteFTS5SearchBackend:
+    """
+    Search using an SQLite FTS5 table with prefix indexes.
+    
+    The FTS5 table uses the inventory table as external content, so it only
+    stores the index; triggers keep it in step with inserts, updates and
+    deletes.
+    """
+    
+    name = 'sqlite'
+    
+    def __init__(self, fallback):
+        self.fallback = fallback
+    
+    def search(self, queryset, query):
+        terms = search_terms(query)
+        if not terms:
+            return self.fallback.search(queryset, query)
+        
+        match = ' AND '.join(f'"{term}"*' for term in terms)
+        table = queryset.model._meta.db_table
+        matches = RawSQL(
+            f'SELECT rowid FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH %s',
+            (match,)
+        )
+        # bm25() is lower for better matches, so negate it
+        rank = RawSQL(
+            f'SELECT -bm25({SQLITE_FTS_TABLE}) FROM {SQLITE_FTS_TABLE} '
+            f'WHERE {SQLITE_FTS_TABLE} MATCH %s AND rowid = "{table}"."id"',
+            (match,),
+            output_field=FloatField()
+        )
+        return queryset.filter(id__in=matches).annotate(search_rank=rank)
+    
+    @staticmethod
+    def is_available(connection):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                [SQLITE_FTS_TABLE]
+            )
+            return cursor.fetchone() is not None
+    
+    @staticmethod
+    def create_index(connection):
+        columns = 'new.id, new.item_name, new.sku'
+        delete = (
+            f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, item_name, sku) "
+            f"VALUES ('delete', old.id, old.item_name, old.sku);"
+        )
+        insert = f'INSERT INTO {SQLITE_FTS_TABLE}(rowid, item_name, sku) VALUES ({columns});'
+        
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE {SQLITE_FTS_TABLE} USING fts5("
+                f"item_name, sku, content='{INVENTORY_TABLE}', content_rowid='id', prefix='2 3')"
+            )
+            cursor.execute(
+                f'CREATE TRIGGER {SQLITE_FTS_TABLE}_ai AFTER INSERT ON {INVENTORY_TABLE} '
+                f'BEGIN {insert} END'
+            )
+            cursor.execute(
+                f'CREATE TRIGGER {SQLITE_FTS_TABLE}_ad AFTER DELETE ON {INVENTORY_TABLE} '
+                f'BEGIN {delete} END'
+            )
+            cursor.execute(
+                f'CREATE TRIGGER {SQLITE_FTS_TABLE}_au AFTER UPDATE OF item_name, sku '
+                f'ON {INVENTORY_TABLE} BEGIN {delete} {insert} END'
+            )
+            cursor.execute(
+                f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES ('rebuild')"
+            )
+    
+    @staticmethod
+    def drop_index(connection):
+        with connection.cursor() as cursor:
+            for suffix in ('ai', 'ad', 'au'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS {SQLITE_FTS_TABLE}_{suffix}')
+            cursor.execute(f'DROP TABLE IF EXISTS {SQLITE_FTS_TABLE}')
+
+
+INDEXED_BACKENDS = {
+    'mysql': MySQLFullTextSearchBackend,
+    'sqlite': SQLiteFTS5SearchBackend,
+}
+
+
+@lru_cache(maxsize=None)
+def get_search_backend(using=DEFAULT_DB_ALIAS):
+    """
+    Get the inventory search backend for a database.
+    
+    The INVENTORY_SEARCH_BACKEND setting selects 'auto' (the default: use the
+    database's full-text index if it exists) or 'fallback'. The choice is
+    made once per process; call get_search_backend.cache_clear() after
+    creating or dropping the index.
+    
+    Args:
+        using (str, optional): Database alias. Defaults to 'default'.
+    
+    Returns:
+        object: A backend with a search(queryset, query) method.
+    """
+    fallback = FallbackSearchBackend()
+    if getattr(settings, 'INVENTORY_SEARCH_BACKEND', 'auto') == 'fallback':
+        return fallback
+    
+    connection = connections[using]
+    backend_class = INDEXED_BACKENDS.get(connection.vendor)
+    if backend_class is None or not backend_class.is_available(connection):
+        return fallback
+    return backend_class(fallback)
+
+
+def create_search_index(connection):
+    """
+    Create the full-text index for the connection's database, if supported.
+    
+    Args:
+        connection: A database connection.
+    """
+    backend_class = INDEXED_BACKENDS.get(connection.vendor)
+    if backend_class is not None and not backend_class.is_available(connection):
+        backend_class.create_index(connection)
+    get_search_backend.cache_clear()
+
+
+def drop_search_index(connection):
+    """
+    Drop the full-text index for the connection's database, if present.
+    
+    Args:
+        connection: A database connection.
+    """
+    backend_class = INDEXED_BACKENDS.get(connection.vendor)
+    if backend_class is not None and backend_class.is_available(connection):
+        backend_class.drop_index(connection)
+    get_search_backend.cache_clear()
+
+
+def search_inventory(queryset, query):
+    """
+    Filter an inventory queryset by a search box query.
+    
+    Args:
+        queryset (QuerySet): Inventory rows to search.
+        query (str): Text typed by the user.
+    
+    Returns:
+        QuerySet: Matching rows annotated with `search_rank`.
+    """
+    return get_search_backend(queryset.db).search(queryset, query)
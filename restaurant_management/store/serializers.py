@@ -7,7 +7,12 @@ Python data types that can be rendered into JSON or other formats.
 
 from rest_framework import serializers
 
-from .models import Inventory, Order, OrderItem, Transaction, Supplier, UserProfile
+from django.urls import reverse
+
+from restaurant_management.utils.constants import (
+    CSV_EXPORT, EXCEL_EXPORT, JSONL_EXPORT, REPORT_TYPE_CHOICES, SUPPLIER_REPORT
+)
+from .models import Inventory, Order, OrderItem, Transaction, Supplier, UserProfile, ReportJob
 
 
 class SupplierSerializer(serializers.ModelSerializer):
@@ -65,22 +70,25 @@ class OrderSerializer(serializers.ModelSerializer):
     
     supplier_name = serializers.SerializerMethodField()
     items = OrderItemSerializer(many=True, read_only=True)
-    total_items = serializers.SerializerMethodField()
+    total_items = serializers.IntegerField(source='total_quantity', read_only=True)
     
     class Meta:
         model = Order
         fields = [
             'id', 'supplier', 'supplier_name', 'status', 'order_date',
-            'expected_delivery', 'items', 'total_items'
+            'expected_delivery', 'items', 'items_count', 'total_items'
         ]
     
     def get_supplier_name(self, obj):
         """Get the name of the supplier."""
         return obj.supplier.name
+
+
+class OrderSummarySerializer(OrderSerializer):
+    """Serializer for Order model without its items, for order lists."""
     
-    def get_total_items(self, obj):
-        """Get the total number of items in the order."""
-        return sum(item.quantity_ordered for item in obj.items.all())
+    class Meta(OrderSerializer.Meta):
+        fields = [field for field in OrderSerializer.Meta.fields if field != 'items']
 
 
 class TransactionSerializer(serializers.ModelSerializer):
@@ -105,6 +113,46 @@ class TransactionSerializer(serializers.ModelSerializer):
         return obj.user.user.username
 
 
+class StockMovementSerializer(serializers.Serializer):
+    """Serializer for a stock movement applied through the stock service."""
+    
+    transaction_type = serializers.ChoiceField(choices=Transaction.TRANSACTION_TYPES)
+    quantity = serializers.IntegerField(min_value=0)
+    
+    def validate(self, data):
+        """Only adjustments may use a quantity of zero."""
+        if data['quantity'] == 0 and data['transaction_type'] != 'adjusted':
+            raise serializers.ValidationError({'quantity': 'Quantity must be greater than zero.'})
+        return data
+
+
+class StockMovementLineSerializer(StockMovementSerializer):
+    """Serializer for one line of a batch of stock movements."""
+    
+    inventory = serializers.IntegerField()
+
+
+class StockMovementBatchSerializer(serializers.Serializer):
+    """Serializer for a batch of stock movements."""
+    
+    lines = StockMovementLineSerializer(many=True, allow_empty=False, max_length=1000)
+    all_or_nothing = serializers.BooleanField(default=False)
+
+
+class OrderStatusUpdateSerializer(serializers.Serializer):
+    """Serializer for a status change of one order."""
+    
+    status = serializers.ChoiceField(choices=Order.ORDER_STATUS)
+
+
+class OrderStatusBatchSerializer(OrderStatusUpdateSerializer):
+    """Serializer for a status change of many orders."""
+    
+    order_ids = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False, max_length=1000
+    )
+
+
 class UserProfileSerializer(serializers.ModelSerializer):
     """Serializer for UserProfile model."""
     
@@ -144,4 +192,53 @@ class InventoryCategorySerializer(serializers.Serializer):
     
     category = serializers.CharField(allow_null=True)
     total = serializers.IntegerField()
-    total_quantity = serializers.IntegerField()
\ No newline at end of file
+    total_quantity = serializers.IntegerField()
+
+
+class ReportJobRequestSerializer(serializers.Serializer):
+    """Serializer for a request to generate a report in the background."""
+    
+    report_type = serializers.ChoiceField(choices=REPORT_TYPE_CHOICES)
+    format = serializers.ChoiceField(
+        choices=[CSV_EXPORT, EXCEL_EXPORT, JSONL_EXPORT], default=CSV_EXPORT
+    )
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+    by_month = serializers.BooleanField(default=False)
+    
+    def validate(self, data):
+        """Check the date range and drop options the report does not take."""
+        start_date = data.get('start_date')
+        end_date = data.get('end_date')
+        if start_date and end_date and start_date > end_date:
+            raise serializers.ValidationError("End date must be after start date.")
+        
+        if data['report_type'] != SUPPLIER_REPORT:
+            data.pop('by_month')
+        return data
+
+
+class ReportJobSerializer(serializers.ModelSerializer):
+    """Serializer for ReportJob model."""
+    
+    status_url = serializers.SerializerMethodField()
+    download_url = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ReportJob
+        fields = [
+            'id', 'report_type', 'format_type', 'parameters', 'status',
+            'created_at', 'started_at', 'finished_at', 'file_name',
+            'status_url', 'download_url'
+        ]
+    
+    def get_status_url(self, obj):
+        """Get the URL to poll for the job's status."""
+        return reverse('store:report_job_api', args=[obj.id])
+    
+    def get_download_url(self, obj):
+        """Get the URL of the report file, once it is ready."""
+        if obj.status != ReportJob.DONE:
+            return None
+        return reverse('store:report_job_download', args=[obj.id])
+
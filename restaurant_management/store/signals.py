@@ -5,12 +5,18 @@ These signals help maintain data integrity and automate certain processes
 when database operations occur.
 """
 
+from django.db.models import QuerySet
 from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
 from django.utils import timezone
 
-from .models import UserProfile, Inventory, Order, OrderItem, Transaction
+from restaurant_management.utils.cache import bump_model_version
+from .models import UserProfile, Inventory, Order, OrderItem, Transaction, Supplier
+from .counters import record_inventory_change, invalidate_inventory_counters
+from .order_status import DELIVERED, OrderTransition, order_status_changed, send_transitions
+from .order_totals import record_item_changes
+from .tokens import revoke_user_tokens
 
 
 @receiver(post_save, sender=User)
@@ -28,6 +34,41 @@ def create_user_profile(sender, instance, created, **kwargs):
         UserProfile.objects.get_or_create(user=instance, defaults={'role': 'staff'})
 
 
+@receiver(post_save, sender=User)
+def revoke_tokens_on_deactivation(sender, instance, created, **kwargs):
+    """
+    Revoke an inactive user's API tokens, which are checked without the user.
+    
+    Args:
+        sender: The model class (User).
+        instance: The User instance that was saved.
+        created: Boolean flag indicating if the instance was created.
+    """
+    if not created and not instance.is_active:
+        revoke_user_tokens(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def revoke_tokens_on_user_delete(sender, instance, **kwargs):
+    """Revoke a deleted user's API tokens."""
+    revoke_user_tokens(instance.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+def revoke_tokens_on_role_change(sender, instance, created, **kwargs):
+    """
+    Revoke a user's API tokens when their role changes, as they carry the old role.
+    
+    Args:
+        sender: The model class (UserProfile).
+        instance: The UserProfile instance that was saved.
+        created: Boolean flag indicating if the instance was created.
+    """
+    if not created and instance.role != getattr(instance, '_loaded_role', None):
+        revoke_user_tokens(instance.user_id)
+    instance._loaded_role = instance.role
+
+
 @receiver(post_save, sender=OrderItem)
 def update_inventory_on_order(sender, instance, created, **kwargs):
     """
@@ -40,10 +81,117 @@ def update_inventory_on_order(sender, instance, created, **kwargs):
         created: Boolean flag indicating if the instance was created.
     """
     if created:
+        # Only a cached inventory still holds its pre-trigger state
+        if OrderItem.inventory.is_cached(instance):
+            before = getattr(instance.inventory, '_loaded_counter_state', None)
+        else:
+            before = None
+        
         # The database trigger will handle the actual quantity reduction
         # But we need to make sure Django's ORM is aware of the change
         inventory = instance.inventory
         inventory.refresh_from_db()  # Refresh to get the updated quantity after trigger
+        
+        if before is None:
+            invalidate_inventory_counters()
+        else:
+            record_inventory_change(before, inventory.counter_state)
+        inventory._loaded_counter_state = inventory.counter_state
+
+
+@receiver(pre_save, sender=OrderItem)
+def load_unknown_order_item_state(sender, instance, **kwargs):
+    """
+    Read the stored order and quantity of an existing item that was not loaded from the database.
+    
+    Args:
+        sender: The model class (OrderItem).
+        instance: The OrderItem instance being saved.
+    """
+    if instance._state.adding or hasattr(instance, '_loaded_totals_state'):
+        return
+    
+    stored = OrderItem.objects.filter(pk=instance.pk).values_list('order_id', 'quantity_ordered').first()
+    if stored is not None:
+        instance._loaded_totals_state = stored
+
+
+@receiver(post_save, sender=OrderItem)
+def update_order_totals_on_save(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Apply an order item write to the totals of its order.
+    
+    Args:
+        sender: The model class (OrderItem).
+        instance: The OrderItem instance that was saved.
+        created: Boolean flag indicating if the instance was created.
+        update_fields: The fields that were saved, or None for all fields.
+    """
+    if update_fields is not None and not set(update_fields) & {'order', 'order_id', 'quantity_ordered'}:
+        return
+    
+    before = None if created else getattr(instance, '_loaded_totals_state', None)
+    record_item_changes([(before, instance.totals_state)])
+    instance._loaded_totals_state = instance.totals_state
+
+
+@receiver(post_delete, sender=OrderItem)
+def update_order_totals_on_delete(sender, instance, origin=None, **kwargs):
+    """
+    Remove a deleted order item from the totals of its order.
+    
+    Items deleted along with their order need no update, and
+    OrderItem.objects.filter(...).delete() recounts its orders in one query.
+    
+    Args:
+        sender: The model class (OrderItem).
+        instance: The OrderItem instance that was deleted.
+        origin: The model instance or queryset the deletion started from.
+    """
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin_model is Order or (origin_model is OrderItem and origin is not instance):
+        return
+    
+    before = getattr(instance, '_loaded_totals_state', instance.totals_state)
+    record_item_changes([(before, None)])
+
+
+@receiver(post_save, sender=Inventory)
+def update_inventory_counters_on_save(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Apply an inventory write to the inventory counters.
+    
+    Args:
+        sender: The model class (Inventory).
+        instance: The Inventory instance that was saved.
+        created: Boolean flag indicating if the instance was created.
+        update_fields: The fields that were saved, or None for all fields.
+    """
+    if update_fields is not None and not set(update_fields) & set(Inventory.COUNTER_FIELDS):
+        return
+    
+    if created:
+        record_inventory_change(None, instance.counter_state)
+    elif hasattr(instance, '_loaded_counter_state'):
+        record_inventory_change(instance._loaded_counter_state, instance.counter_state)
+    else:
+        # The previous state is unknown, so let the next read rebuild the counters
+        invalidate_inventory_counters()
+    
+    instance._loaded_counter_state = instance.counter_state
+
+
+@receiver(post_delete, sender=Inventory)
+def update_inventory_counters_on_delete(sender, instance, **kwargs):
+    """
+    Remove a deleted inventory item from the inventory counters.
+    
+    Args:
+        sender: The model class (Inventory).
+        instance: The Inventory instance that was deleted.
+    """
+    before = getattr(instance, '_loaded_counter_state', instance.counter_state)
+    record_inventory_change(before, None)
 
 
 @receiver(post_save, sender=Transaction)
@@ -56,34 +204,114 @@ def update_inventory_on_transaction(sender, instance, created, **kwargs):
         instance: The Transaction instance that was saved.
         created: Boolean flag indicating if the instance was created.
     """
-    if created:
+    # The stock service sets last_updated in the same UPDATE as the quantity
+    if created and not getattr(instance, '_inventory_synced', False):
         inventory = instance.inventory
         inventory.last_updated = timezone.now()
         inventory.save(update_fields=['last_updated'])
 
 
 @receiver(pre_save, sender=Order)
-def check_order_status_change(sender, instance, **kwargs):
+def load_unknown_order_state(sender, instance, update_fields=None, **kwargs):
     """
-    Perform actions when an order's status changes.
+    Read the stored state of an existing order that was not loaded from the database.
+    
+    Orders loaded normally remember their state (see Order.from_db), so this
+    only reads the row for orders built by hand with an existing primary key.
     
     Args:
         sender: The model class (Order).
         instance: The Order instance being saved.
+        update_fields: The fields being saved, or None for all fields.
     """
-    try:
-        old_instance = Order.objects.get(pk=instance.pk)
-        
-        # If status changed from something else to 'delivered'
-        if old_instance.status != 'delivered' and instance.status == 'delivered':
-            # Record the delivery date if not already set
-            if not hasattr(instance, 'delivery_notification'):
-                from supplier.models import DeliveryNotification
-                DeliveryNotification.objects.create(
-                    order=instance,
-                    delivery_date=timezone.now().date(),
-                    message="Order automatically marked as delivered."
-                )
-    except Order.DoesNotExist:
-        # This is a new order, no previous status to compare
-        pass
\ No newline at end of file
+    if instance._state.adding or hasattr(instance, '_loaded_counter_state'):
+        return
+    
+    stored = Order.objects.filter(pk=instance.pk).values_list(*Order.COUNTER_FIELDS).first()
+    if stored is not None:
+        instance._loaded_counter_state = stored
+
+
+@receiver(post_save, sender=Order)
+def send_order_status_transition(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Announce a saved status change through order_status_changed.
+    
+    Args:
+        sender: The model class (Order).
+        instance: The Order instance that was saved.
+        created: Boolean flag indicating if the instance was created.
+        update_fields: The fields that were saved, or None for all fields.
+    """
+    if created or (update_fields is not None and 'status' not in update_fields):
+        return
+    
+    old_status = instance.loaded_status
+    if old_status is not None and old_status != instance.status:
+        send_transitions([OrderTransition(instance, old_status, instance.status)])
+
+
+@receiver(order_status_changed)
+def record_delivery_on_transition(sender, transitions, **kwargs):
+    """
+    Record a delivery notification, dated today, for orders marked delivered without one.
+    
+    Runs before the supplier app's receivers, so the performance counters
+    see the new notification.
+    
+    Args:
+        sender: The model class (Order).
+        transitions (list): The OrderTransition tuples.
+    """
+    from supplier.models import DeliveryNotification
+    
+    delivered = [t.order for t in transitions if t.new_status == DELIVERED]
+    if not delivered:
+        return
+    
+    related = Order.delivery_notification.related
+    unknown = [order.pk for order in delivered if not related.is_cached(order)]
+    notified = set(
+        DeliveryNotification.objects.filter(order_id__in=unknown).values_list('order_id', flat=True)
+    ) if unknown else set()
+    
+    def has_notification(order):
+        if related.is_cached(order):
+            return related.get_cached_value(order) is not None
+        return order.pk in notified
+    
+    today = timezone.now().date()
+    notifications = [
+        DeliveryNotification(
+            order=order,
+            delivery_date=today,
+            message="Order automatically marked as delivered."
+        )
+        for order in delivered if not has_notification(order)
+    ]
+    if not notifications:
+        return
+    
+    DeliveryNotification.objects.bulk_create(notifications)
+    for notification in notifications:
+        related.set_cached_value(notification.order, notification)
+    
+    # Bulk operations send no signals
+    bump_model_version(DeliveryNotification)
+
+
+def bump_cache_version(sender, **kwargs):
+    """
+    Invalidate cached payloads that depend on the saved or deleted model.
+    
+    Args:
+        sender: The model class that was saved or deleted.
+    """
+    bump_model_version(sender)
+
+
+for cached_model in (User, UserProfile, Supplier, Inventory, Order, OrderItem, Transaction):
+    post_save.connect(bump_cache_version, sender=cached_model,
+                      dispatch_uid=f'bump_cache_version_save_{cached_model.__name__}')
+    post_delete.connect(bump_cache_version, sender=cached_model,
+                        dispatch_uid=f'bump_cache_version_delete_{cached_model.__name__}')
@@ -0,0 +1,343 @@
+"""
+Stock mutation service for the store application.
+
+Changing a quantity by reading it into Python, modifying it and saving it
+loses updates when two requests touch the same item at once, and makes the
+insufficient-stock check racy. The functions here apply every change in the
+database instead:
+
+- add and remove are a single conditional UPDATE using F() expressions
+  (remove only matches rows with enough stock), so concurrent movements
+  serialize on the row lock and none are lost;
+- adjust locks the row with SELECT ... FOR UPDATE because the ledger records
+  the difference from the previous quantity.
+
+The Transaction ledger row, the inventory counters and the cache versions are
+written in the same database transaction as the quantity change.
+"""
+
+from collections import namedtuple
+
+from django.db import transaction as db_transaction
+from django.db.models import F
+from django.utils import timezone
+
+from restaurant_management.utils.cache import bump_model_version
+from .counters import record_inventory_change, record_inventory_changes
+from .models import Inventory, Transaction
+
+ADDED = 'added'
+REMOVED = 'removed'
+ADJUSTED = 'adjusted'
+
+# Outcome of each line of a batch
+APPLIED = 'applied'
+INSUFFICIENT_STOCK = 'insufficient_stock'
+NOT_FOUND = 'not_found'
+NOT_APPLIED = 'not_applied'
+
+# Rows per statement for batch updates and ledger inserts
+BATCH_SIZE = 500
+
+# The ledger row written for a movement and the item's resulting quantity
+StockChange = namedtuple('StockChange', ['transaction', 'quantity'])
+
+
+class InsufficientStock(Exception):
+    """Raised when a removal asks for more than the item has in stock."""
+    
+    def __init__(self, inventory_id, requested):
+        self.inventory_id = inventory_id
+        self.requested = requested
+        super().__init__(
+            f"Insufficient stock for inventory item {inventory_id}: {requested} requested"
+        )
+
+
+def _inventory_id(inventory):
+    """Accept either an Inventory instance or its primary key."""
+    return getattr(inventory, 'pk', inventory)
+
+
+def _check_quantity(quantity, allow_zero=False):
+    if quantity is None or quantity < 0 or (quantity == 0 and not allow_zero):
+        raise ValueError(f"Invalid stock quantity: {quantity!r}")
+
+
+def _record(inventory_id, delta, transaction_type, quantity_used, user):
+    """
+    Write the ledger row and counter changes for an applied quantity change.
+    
+    Must run in the same database transaction as the UPDATE, which still
+    holds the row lock, so the row read here is the state that UPDATE made.
+    """
+    quantity, reorder_level, expiry_date = (
+        Inventory.objects.filter(pk=inventory_id)
+        .values_list(*Inventory.COUNTER_FIELDS)
+        .get()
+    )
+    record_inventory_change(
+        (quantity - delta, reorder_level, expiry_date),
+        (quantity, reorder_level, expiry_date)
+    )
+    
+    ledger_row = Transaction(
+        inventory_id=inventory_id,
+        user=user,
+        quantity_used=quantity_used,
+        transaction_type=transaction_type
+    )
+    # The UPDATE already set last_updated; see update_inventory_on_transaction
+    ledger_row._inventory_synced = True
+    ledger_row.save()
+    
+    # Queryset updates send no signals
+    bump_model_version(Inventory)
+    
+    return StockChange(ledger_row, quantity)
+
+
+def _apply_delta(inventory_id, delta, transaction_type, user):
+    """Add a signed delta to an item's quantity, refusing to go below zero."""
+    rows = Inventory.objects.filter(pk=inventory_id)
+    if delta < 0:
+        rows = rows.filter(quantity__gte=-delta)
+    
+    with db_transaction.atomic():
+        updated = rows.update(
+            quantity=F('quantity') + delta,
+            stock_gap=F('stock_gap') + delta,
+            last_updated=timezone.now()
+        )
+        if not updated:
+            if not Inventory.objects.filter(pk=inventory_id).exists():
+                raise Inventory.DoesNotExist(f"Inventory item {inventory_id} does not exist")
+            raise InsufficientStock(inventory_id, -delta)
+        
+        return _record(inventory_id, delta, transaction_type, abs(delta), user)
+
+
+def add_stock(inventory, quantity, user):
+    """
+    Add stock to an inventory item.
+    
+    Args:
+        inventory: An Inventory instance or primary key.
+        quantity (int): Units to add; must be positive.
+        user (UserProfile): The user recording the movement.
+    
+    Returns:
+        StockChange: The ledger row and the new quantity.
+    """
+    _check_quantity(quantity)
+    return _apply_delta(_inventory_id(inventory), quantity, ADDED, user)
+
+
+def remove_stock(inventory, quantity, user):
+    """
+    Remove stock from an inventory item if enough is available.
+    
+    Args:
+        inventory: An Inventory instance or primary key.
+        quantity (int): Units to remove; must be positive.
+        user (UserProfile): The user recording the movement.
+    
+    Returns:
+        StockChange: The ledger row and the new quantity.
+    
+    Raises:
+        InsufficientStock: If the item has fewer than `quantity` units.
+    """
+    _check_quantity(quantity)
+    return _apply_delta(_inventory_id(inventory), -quantity, REMOVED, user)
+
+
+def adjust_stock(inventory, quantity, user):
+    """
+    Set an inventory item's quantity after a stock count.
+    
+    Args:
+        inventory: An Inventory instance or primary key.
+        quantity (int): The counted quantity.
+        user (UserProfile): The user recording the movement.
+    
+    Returns:
+        StockChange: The ledger row and the new quantity.
+    """
+    _check_quantity(quantity, allow_zero=True)
+    inventory_id = _inventory_id(inventory)
+    
+    with db_transaction.atomic():
+        old_quantity = (
+            Inventory.objects.select_for_update()
+            .values_list('quantity', flat=True)
+            .get(pk=inventory_id)
+        )
+        Inventory.objects.filter(pk=inventory_id).update(
+            quantity=quantity,
+            stock_gap=quantity - F('reorder_level'),
+            last_updated=timezone.now()
+        )
+        delta = quantity - old_quantity
+        return _record(inventory_id, delta, ADJUSTED, abs(delta), user)
+
+
+def clear_stock(inventory, user):
+    """
+    Remove whatever stock an inventory item has left.
+    
+    Args:
+        inventory: An Inventory instance or primary key.
+        user (UserProfile): The user recording the movement.
+    
+    Returns:
+        StockChange: The ledger row (None if the item was already empty)
+        and the new quantity.
+    """
+    inventory_id = _inventory_id(inventory)
+    
+    with db_transaction.atomic():
+        quantity = (
+            Inventory.objects.select_for_update()
+            .values_list('quantity', flat=True)
+            .get(pk=inventory_id)
+        )
+        if quantity <= 0:
+            return StockChange(None, quantity)
+        return remove_stock(inventory_id, quantity, user)
+
+
+MOVEMENTS = {
+    ADDED: add_stock,
+    REMOVED: remove_stock,
+    ADJUSTED: adjust_stock,
+}
+
+
+def apply_stock_movement(inventory, transaction_type, quantity, user):
+    """
+    Apply a movement of one of the Transaction.TRANSACTION_TYPES.
+    
+    Args:
+        inventory: An Inventory instance or primary key.
+        transaction_type (str): 'added', 'removed' or 'adjusted'.
+        quantity (int): Units moved, or the new quantity for 'adjusted'.
+        user (UserProfile): The user recording the movement.
+    
+    Returns:
+        StockChange: The ledger row and the new quantity.
+    
+    Raises:
+        InsufficientStock: If a removal asks for more than is in stock.
+    """
+    try:
+        movement = MOVEMENTS[transaction_type]
+    except KeyError:
+        raise ValueError(f"Unknown transaction type: {transaction_type!r}")
+    return movement(inventory, quantity, user)
+
+
+def apply_stock_movements(lines, user, all_or_nothing=False):
+    """
+    Apply many stock movements in one database transaction.
+    
+    Every referenced item is locked once, in primary key order, and the lines
+    are applied in the order given, so a line sees the quantities left by the
+    lines before it. The new quantities are written with bulk_update and the
+    ledger rows with bulk_create: a fixed handful of statements regardless of
+    the number of lines.
+    
+    Args:
+        lines (list): Dicts with 'inventory' (primary key), 'transaction_type'
+            and 'quantity', as for apply_stock_movement.
+        user (UserProfile): The user recording the movements.
+        all_or_nothing (bool, optional): If any line fails, apply none of them.
+            Defaults to False, which applies every line that can be applied.
+    
+    Returns:
+        list: One dict per line with 'line', 'inventory', 'status' (APPLIED,
+        INSUFFICIENT_STOCK, NOT_FOUND or NOT_APPLIED) and, for applied lines,
+        'quantity_used' and the resulting 'quantity'.
+    """
+    for line in lines:
+        if line['transaction_type'] not in MOVEMENTS:
+            raise ValueError(f"Unknown transaction type: {line['transaction_type']!r}")
+        _check_quantity(line['quantity'], allow_zero=line['transaction_type'] == ADJUSTED)
+    
+    inventory_ids = sorted({line['inventory'] for line in lines})
+    
+    with db_transaction.atomic():
+        locked = Inventory.objects.select_for_update().filter(
+            pk__in=inventory_ids
+        ).order_by('pk').values_list('pk', *Inventory.COUNTER_FIELDS)
+        before = {row[0]: row[1:] for row in locked}
+        quantities = {pk: state[0] for pk, state in before.items()}
+        
+        results = []
+        ledger_rows = []
+        for number, line in enumerate(lines):
+            inventory_id = line['inventory']
+            transaction_type = line['transaction_type']
+            result = {'line': number, 'inventory': inventory_id}
+            results.append(result)
+            
+            if inventory_id not in quantities:
+                result['status'] = NOT_FOUND
+                continue
+            
+            current = quantities[inventory_id]
+            if transaction_type == ADDED:
+                new = current + line['quantity']
+            elif transaction_type == REMOVED:
+                if current < line['quantity']:
+                    result['status'] = INSUFFICIENT_STOCK
+                    continue
+                new = current - line['quantity']
+            else:
+                new = line['quantity']
+            
+            quantities[inventory_id] = new
+            ledger_rows.append(Transaction(
+                inventory_id=inventory_id,
+                user=user,
+                quantity_used=abs(new - current),
+                transaction_type=transaction_type
+            ))
+            result.update(status=APPLIED, quantity_used=abs(new - current), quantity=new)
+        
+        if all_or_nothing and len(ledger_rows) != len(lines):
+            for result in results:
+                if result['status'] == APPLIED:
+                    result['status'] = NOT_APPLIED
+                    del result['quantity_used'], result['quantity']
+            return results
+        
+        if not ledger_rows:
+            return results
+        
+        touched = {row.inventory_id for row in ledger_rows}
+        now = timezone.now()
+        Inventory.objects.bulk_update(
+            [
+                Inventory(
+                    pk=pk,
+                    quantity=quantities[pk],
+                    stock_gap=quantities[pk] - before[pk][1],
+                    last_updated=now
+                )
+                for pk in sorted(touched)
+            ],
+            ['quantity', 'stock_gap', 'last_updated'],
+            batch_size=BATCH_SIZE
+        )
+        Transaction.objects.bulk_create(ledger_rows, batch_size=BATCH_SIZE)
+        
+        record_inventory_changes(
+            (before[pk], (quantities[pk],) + tuple(before[pk][1:])) for pk in touched
+        )
+        
+        # Bulk operations send no signals
+        bump_model_version(Inventory)
+        bump_model_version(Transaction)
+    
+    return results
@@ -5,7 +5,7 @@ This module contains test cases for models, views, forms, and other components
 of the store application.
 """
 
-from django.test import TestCase, Client
+from django.test import TestCase, TransactionTestCase, Client, override_settings
 from django.contrib.auth.models import User
 from django.urls import reverse
 from django.utils import timezone
@@ -99,6 +99,21 @@ class InventoryModelTests(TestCase):
         self.inventory.expiry_date = timezone.now().date() - timezone.timedelta(days=1)
         self.inventory.save()
         self.assertTrue(self.inventory.is_expired)
+    
+    def test_low_stock_uses_stock_gap(self):
+        """Test that stock_gap follows saves and drives low_stock()."""
+        self.assertEqual(self.inventory.stock_gap, 40)
+        self.assertFalse(Inventory.objects.low_stock().exists())
+        
+        self.inventory.quantity = 10
+        self.inventory.save(update_fields=['quantity'])
+        self.inventory.refresh_from_db()
+        self.assertEqual(self.inventory.stock_gap, 0)
+        self.assertEqual(list(Inventory.objects.low_stock()), [self.inventory])
+        
+        self.inventory.reorder_level = 5
+        self.inventory.save()
+        self.assertFalse(Inventory.objects.low_stock().exists())
 
 
 class AuthenticationTests(TestCase):
@@ -185,4 +200,1508 @@ class AuthenticationTests(TestCase):
         # Test supplier access restriction
         self.client.login(username='supplier', password='supplierpassword')
         response = self.client.get(reverse('store:staff_dashboard'))
-        self.assertNotEqual(response.status_code, 200)  # Should not be accessible
\ No newline at end of file
+        self.assertNotEqual(response.status_code, 200)  # Should not be accessible
+
+class DashboardStatsTests(TestCase):
+    """Test cases for the dashboard aggregation helpers."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='dashuser',
+            email='dash@example.com',
+            password='dashpassword'
+        )
+        self.supplier = Supplier.objects.create(
+            name='Dashboard Supplier',
+            email='dash-supplier@example.com'
+        )
+        today = timezone.now().date()
+        
+        Inventory.objects.create(
+            item_name='Flour', category='Dry', quantity=5, reorder_level=10,
+            expiry_date=today + timezone.timedelta(days=5), supplier=self.supplier
+        )
+        Inventory.objects.create(
+            item_name='Milk', category='Dairy', quantity=20, reorder_level=10,
+            expiry_date=today - timezone.timedelta(days=1), supplier=self.supplier
+        )
+        item = Inventory.objects.create(
+            item_name='Rice', category='Dry', quantity=30, reorder_level=10,
+            supplier=self.supplier
+        )
+        
+        Order.objects.create(supplier=self.supplier, status='pending')
+        Order.objects.create(supplier=self.supplier, status='pending')
+        Order.objects.create(supplier=self.supplier, status='shipped')
+        
+        Transaction.objects.create(
+            inventory=item, user=self.user.profile,
+            quantity_used=7, transaction_type='added'
+        )
+        Transaction.objects.create(
+            inventory=item, user=self.user.profile,
+            quantity_used=3, transaction_type='removed'
+        )
+    
+    def test_dashboard_stats_values(self):
+        """Test that the aggregated statistics are correct."""
+        from .utils import get_dashboard_stats
+        
+        stats = get_dashboard_stats()
+        
+        self.assertEqual(stats['total_inventory_items'], 3)
+        self.assertEqual(stats['total_inventory_value'], 55)
+        self.assertEqual(stats['low_stock_count'], 1)
+        self.assertEqual(stats['expiring_count'], 1)
+        self.assertEqual(stats['expired_count'], 1)
+        self.assertEqual(stats['pending_orders'], 2)
+        self.assertEqual(stats['shipped_orders'], 1)
+        self.assertEqual(stats['delivered_orders'], 0)
+        self.assertEqual(stats['added_today'], 7)
+        self.assertEqual(stats['removed_today'], 3)
+        
+        categories = {row['category']: row['total'] for row in stats['inventory_by_category']}
+        self.assertEqual(categories, {'Dairy': 1, 'Dry': 2})
+    
+    def test_dashboard_stats_query_budget(self):
+        """Test that the statistics are computed with a fixed number of queries."""
+        from .utils import get_dashboard_stats
+        
+        # One query each for inventory, orders and transactions
+        with self.assertNumQueries(3):
+            stats = get_dashboard_stats(user=self.user)
+        
+        # The category breakdown is a single grouped query when rendered
+        with self.assertNumQueries(1):
+            list(stats['inventory_by_category'])
+
+
+class InventoryCountersTests(TestCase):
+    """Test cases for the incrementally maintained inventory counters."""
+    
+    def setUp(self):
+        """Set up test data."""
+        from .counters import rebuild_inventory_counters
+        
+        self.supplier = Supplier.objects.create(
+            name='Counter Supplier',
+            email='counter-supplier@example.com'
+        )
+        self.item = Inventory.objects.create(
+            item_name='Butter', quantity=50, reorder_level=10, supplier=self.supplier
+        )
+        rebuild_inventory_counters()
+    
+    def assertCounters(self, total, low_stock, expired, expiring):
+        """Assert the stored counters match the given values."""
+        from .models import InventoryCounters
+        
+        counters = InventoryCounters.objects.get()
+        self.assertEqual(
+            (counters.total_items, counters.low_stock_count,
+             counters.expired_count, counters.expiring_count),
+            (total, low_stock, expired, expiring)
+        )
+    
+    def test_counters_follow_inventory_writes(self):
+        """Test that creates, edits and deletes update the counters."""
+        today = timezone.now().date()
+        
+        expired = Inventory.objects.create(
+            item_name='Cream', quantity=1, reorder_level=5,
+            expiry_date=today - timezone.timedelta(days=2)
+        )
+        self.assertCounters(2, 1, 1, 0)
+        
+        item = Inventory.objects.get(pk=self.item.pk)
+        item.quantity = 5
+        item.expiry_date = today + timezone.timedelta(days=3)
+        item.save()
+        self.assertCounters(2, 2, 1, 1)
+        
+        expired.delete()
+        self.assertCounters(1, 1, 0, 1)
+    
+    def test_reconcile_command_rebuilds_drift(self):
+        """Test that the reconciliation command repairs drifted counters."""
+        from django.core.management import call_command
+        from io import StringIO
+        from .models import InventoryCounters
+        
+        InventoryCounters.objects.update(total_items=99, low_stock_count=7)
+        
+        out = StringIO()
+        call_command('reconcile_inventory_counters', stdout=out)
+        
+        self.assertIn('total_items: stored 99, actual 1', out.getvalue())
+        self.assertCounters(1, 0, 0, 0)
+    
+    def test_global_stats_reads_one_row(self):
+        """Test that the context processor costs a single query."""
+        from django.test import RequestFactory
+        from restaurant_management.context_processors import global_stats
+        
+        request = RequestFactory().get('/')
+        request.user = User.objects.create_user(username='counter', password='counterpassword')
+        
+        with self.assertNumQueries(1):
+            context = global_stats(request)
+        
+        self.assertEqual(context['total_inventory'], 1)
+        self.assertEqual(context['low_stock_count'], 0)
+
+
+class VersionedCacheTests(TestCase):
+    """Test cases for the versioned dashboard cache."""
+    
+    def setUp(self):
+        """Set up test data."""
+        from django.core.cache import cache
+        cache.clear()
+        
+        self.supplier = Supplier.objects.create(
+            name='Cache Supplier',
+            email='cache-supplier@example.com'
+        )
+        Inventory.objects.create(
+            item_name='Salt', quantity=3, reorder_level=5, supplier=self.supplier
+        )
+    
+    def test_payload_is_served_from_cache(self):
+        """Test that a repeated read does not touch the database."""
+        from .utils import get_manager_dashboard_payload
+        
+        first = get_manager_dashboard_payload()
+        
+        with self.assertNumQueries(0):
+            second = get_manager_dashboard_payload()
+        
+        self.assertEqual(first, second)
+        self.assertEqual(second['low_stock_count'], 1)
+    
+    def test_write_invalidates_payload(self):
+        """Test that saving a dependent model produces fresh figures once committed."""
+        from restaurant_management.utils.cache import get_model_versions
+        from .utils import get_manager_dashboard_payload
+        
+        self.assertEqual(get_manager_dashboard_payload()['total_inventory_items'], 1)
+        versions = get_model_versions([Inventory, Order])
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            Inventory.objects.create(item_name='Pepper', quantity=30, reorder_level=5)
+            Order.objects.create(supplier=self.supplier, status='pending')
+            # Nothing is invalidated before the writes commit
+            self.assertEqual(get_model_versions([Inventory, Order]), versions)
+        
+        payload = get_manager_dashboard_payload()
+        self.assertEqual(payload['total_inventory_items'], 2)
+        self.assertEqual(payload['pending_orders'], 1)
+    
+    def test_hit_and_miss_counts(self):
+        """Test that cache hits and misses are reported."""
+        from restaurant_management.utils.cache import get_cache_stats
+        from .utils import get_supplier_dashboard_payload
+        
+        get_supplier_dashboard_payload(self.supplier.id)
+        get_supplier_dashboard_payload(self.supplier.id)
+        get_supplier_dashboard_payload(self.supplier.id)
+        
+        stats = get_cache_stats()['supplier_dashboard']
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hits'], 2)
+
+
+class KeysetPaginationTests(TestCase):
+    """Test cases for keyset (cursor) pagination."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.supplier = Supplier.objects.create(
+            name='Page Supplier',
+            email='page-supplier@example.com'
+        )
+        # Duplicate names exercise the id tie-breaker
+        for i in range(7):
+            Inventory.objects.create(
+                item_name=f'Item {i // 2}', quantity=10, reorder_level=1,
+                supplier=self.supplier
+            )
+    
+    def test_forward_and_backward_traversal(self):
+        """Test that walking the cursors visits every row exactly once."""
+        from restaurant_management.utils.pagination import KeysetPaginator
+        
+        paginator = KeysetPaginator(Inventory.objects.all(), ('item_name', 'id'), per_page=3)
+        expected = list(Inventory.objects.order_by('item_name', 'id'))
+        
+        pages = [paginator.get_page()]
+        while pages[-1].has_next():
+            pages.append(paginator.get_page(pages[-1].next_cursor))
+        
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual([item for page in pages for item in page], expected)
+        self.assertFalse(pages[0].has_previous())
+        
+        previous = paginator.get_page(pages[2].previous_cursor)
+        self.assertEqual(list(previous), list(pages[1]))
+        self.assertTrue(previous.has_previous())
+    
+    def test_descending_order(self):
+        """Test pagination over a descending (order_date, id) ordering."""
+        from restaurant_management.utils.pagination import KeysetPaginator
+        
+        now = timezone.now()
+        for days in (1, 1, 2, 3):
+            Order.objects.create(
+                supplier=self.supplier, order_date=now - timezone.timedelta(days=days)
+            )
+        
+        paginator = KeysetPaginator(Order.objects.all(), ('-order_date', '-id'), per_page=2)
+        first = paginator.get_page()
+        second = paginator.get_page(first.next_cursor)
+        
+        self.assertEqual(
+            list(first) + list(second),
+            list(Order.objects.order_by('-order_date', '-id'))
+        )
+        self.assertFalse(second.has_next())
+    
+    def test_tampered_cursor_is_rejected(self):
+        """Test that a modified cursor raises InvalidCursor."""
+        from restaurant_management.utils.pagination import KeysetPaginator, InvalidCursor
+        
+        paginator = KeysetPaginator(Inventory.objects.all(), ('item_name', 'id'), per_page=3)
+        cursor = paginator.get_page().next_cursor
+        
+        with self.assertRaises(InvalidCursor):
+            paginator.get_page(cursor[:-2] + 'xx')
+    
+    def test_api_keyset_is_opt_in(self):
+        """Test that the inventory API only paginates when asked to."""
+        user = User.objects.create_user(username='pager', password='pagerpass123')
+        self.client.force_login(user)
+        url = reverse('store:inventory_api_list_create')
+        
+        response = self.client.get(url)
+        self.assertEqual(len(response.json()), 7)
+        
+        response = self.client.get(url, {'pagination': 'keyset'})
+        data = response.json()
+        self.assertEqual(len(data['results']), 7)
+        self.assertIsNone(data['next'])
+        
+        response = self.client.get(url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+
+class InventorySearchTests(TestCase):
+    """Test cases for the inventory search backends."""
+    
+    def setUp(self):
+        """Set up test data and the SQLite full-text index."""
+        from django.db import connection
+        from .search import create_search_index
+        
+        create_search_index(connection)
+        self.addCleanup(self.drop_index)
+        
+        Inventory.objects.create(item_name='Tomato Paste', sku='TOM-001', quantity=5, reorder_level=1)
+        Inventory.objects.create(item_name='Cherry Tomatoes', sku='TOM-002', quantity=5, reorder_level=1)
+        Inventory.objects.create(item_name='Olive Oil', sku='OIL-001', quantity=5, reorder_level=1)
+    
+    def drop_index(self):
+        """Drop the index so other tests use the fallback backend."""
+        from django.db import connection
+        from .search import drop_search_index
+        
+        drop_search_index(connection)
+    
+    def names(self, queryset):
+        return [item.item_name for item in queryset]
+    
+    def test_prefix_search(self):
+        """Test that partial words match as prefixes."""
+        from .search import search_inventory, get_search_backend
+        
+        self.assertEqual(get_search_backend().name, 'sqlite')
+        results = search_inventory(Inventory.objects.all(), 'tomat').order_by('item_name')
+        self.assertEqual(self.names(results), ['Cherry Tomatoes', 'Tomato Paste'])
+        
+        results = search_inventory(Inventory.objects.all(), 'oil 001')
+        self.assertEqual(self.names(results), ['Olive Oil'])
+    
+    def test_index_follows_writes(self):
+        """Test that inserts, updates and deletes reach the index."""
+        from .search import search_inventory
+        
+        item = Inventory.objects.get(sku='OIL-001')
+        item.item_name = 'Sunflower Oil'
+        item.save()
+        
+        self.assertEqual(self.names(search_inventory(Inventory.objects.all(), 'sunflower')), ['Sunflower Oil'])
+        self.assertFalse(search_inventory(Inventory.objects.all(), 'olive').exists())
+        
+        item.delete()
+        self.assertFalse(search_inventory(Inventory.objects.all(), 'sunflower').exists())
+    
+    def test_fallback_matches_substrings(self):
+        """Test that the fallback backend keeps the icontains behavior."""
+        from .search import FallbackSearchBackend
+        
+        results = FallbackSearchBackend().search(Inventory.objects.all(), 'tom-00')
+        self.assertEqual(results.count(), 2)
+        
+        results = FallbackSearchBackend().search(Inventory.objects.all(), 'TOM-002')
+        self.assertEqual(results.order_by('-search_rank').first().item_name, 'Cherry Tomatoes')
+    
+    def test_ranked_results_paginate(self):
+        """Test that ranked search results can be keyset paginated."""
+        from restaurant_management.utils.pagination import KeysetPaginator
+        from .search import search_inventory, SEARCH_ORDERING
+        
+        results = search_inventory(Inventory.objects.all(), 'tom')
+        paginator = KeysetPaginator(results, SEARCH_ORDERING, per_page=1)
+        first = paginator.get_page()
+        second = paginator.get_page(first.next_cursor)
+        
+        self.assertEqual(len(first) + len(second), 2)
+        self.assertNotEqual(first.object_list[0], second.object_list[0])
+        self.assertFalse(second.has_next())
+
+
+class StockServiceTests(TestCase):
+    """Test cases for the stock mutation service."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(username='stocker', password='stockerpass123')
+        self.user.profile.role = 'staff'
+        self.user.profile.save()
+        self.item = Inventory.objects.create(item_name='Rice', quantity=20, reorder_level=5)
+    
+    def test_movements_update_quantity_and_ledger(self):
+        """Test that add, remove and adjust write the quantity and a ledger row."""
+        from .stock import add_stock, remove_stock, adjust_stock
+        
+        self.assertEqual(add_stock(self.item, 5, self.user.profile).quantity, 25)
+        self.assertEqual(remove_stock(self.item.pk, 22, self.user.profile).quantity, 3)
+        change = adjust_stock(self.item, 10, self.user.profile)
+        
+        self.assertEqual(change.quantity, 10)
+        self.assertEqual(change.transaction.quantity_used, 7)
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.quantity, self.item.stock_gap), (10, 5))
+        self.assertEqual(
+            list(Transaction.objects.order_by('id').values_list('transaction_type', 'quantity_used')),
+            [('added', 5), ('removed', 22), ('adjusted', 7)]
+        )
+    
+    def test_insufficient_stock_changes_nothing(self):
+        """Test that an oversized removal is refused without side effects."""
+        from .stock import remove_stock, InsufficientStock
+        
+        with self.assertRaises(InsufficientStock):
+            remove_stock(self.item, 21, self.user.profile)
+        
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 20)
+        self.assertFalse(Transaction.objects.exists())
+    
+    def test_stock_api(self):
+        """Test the stock movement API endpoint."""
+        self.client.force_login(self.user)
+        url = reverse('store:inventory_stock_api', args=[self.item.pk])
+        
+        response = self.client.post(url, {'transaction_type': 'removed', 'quantity': 4})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['quantity'], 16)
+        
+        response = self.client.post(url, {'transaction_type': 'removed', 'quantity': 50})
+        self.assertEqual(response.status_code, 409)
+        
+        response = self.client.post(url, {'transaction_type': 'added', 'quantity': 0})
+        self.assertEqual(response.status_code, 400)
+
+
+class StockContentionTests(TransactionTestCase):
+    """Test that concurrent removals never lose an update."""
+    
+    def test_concurrent_removals(self):
+        """Run the contention benchmark with more removals than stock."""
+        from io import StringIO
+        from django.core.management import call_command
+        
+        out = StringIO()
+        call_command(
+            'benchmark_stock_contention',
+            threads=4, removals=40, stock=30, stdout=out
+        )
+        self.assertIn('No lost updates.', out.getvalue())
+
+
+class StockBatchTests(TestCase):
+    """Test cases for batches of stock movements."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(username='counter', password='counterpass123')
+        self.user.profile.role = 'staff'
+        self.user.profile.save()
+        self.flour = Inventory.objects.create(item_name='Flour', quantity=10, reorder_level=2)
+        self.sugar = Inventory.objects.create(item_name='Sugar', quantity=3, reorder_level=5)
+        self.url = reverse('store:inventory_stock_batch_api')
+        self.client.force_login(self.user)
+    
+    def post(self, lines, **extra):
+        return self.client.post(
+            self.url, {'lines': lines, **extra}, content_type='application/json'
+        )
+    
+    def test_batch_applies_lines_in_order(self):
+        """Test per-line results and that later lines see earlier ones."""
+        response = self.post([
+            {'inventory': self.flour.pk, 'transaction_type': 'removed', 'quantity': 6},
+            {'inventory': self.flour.pk, 'transaction_type': 'removed', 'quantity': 6},
+            {'inventory': self.sugar.pk, 'transaction_type': 'added', 'quantity': 7},
+            {'inventory': 999999, 'transaction_type': 'added', 'quantity': 1},
+            {'inventory': self.flour.pk, 'transaction_type': 'adjusted', 'quantity': 0},
+        ])
+        
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(
+            [result['status'] for result in data['results']],
+            ['applied', 'insufficient_stock', 'applied', 'not_found', 'applied']
+        )
+        self.assertEqual((data['applied'], data['failed']), (3, 2))
+        
+        self.flour.refresh_from_db()
+        self.sugar.refresh_from_db()
+        self.assertEqual((self.flour.quantity, self.flour.stock_gap), (0, -2))
+        self.assertEqual((self.sugar.quantity, self.sugar.stock_gap), (10, 5))
+        self.assertEqual(
+            list(Transaction.objects.order_by('id').values_list('transaction_type', 'quantity_used')),
+            [('removed', 6), ('added', 7), ('adjusted', 4)]
+        )
+    
+    def test_batch_query_count_is_constant(self):
+        """Test that the batch does not issue statements per line."""
+        from .stock import apply_stock_movements
+        
+        lines = [
+            {'inventory': self.flour.pk, 'transaction_type': 'added', 'quantity': 1},
+            {'inventory': self.sugar.pk, 'transaction_type': 'added', 'quantity': 1},
+        ] * 50
+        
+        # savepoint, lock, bulk update, bulk insert, counters, release
+        with self.assertNumQueries(6):
+            apply_stock_movements(lines, self.user.profile)
+        
+        self.flour.refresh_from_db()
+        self.assertEqual(self.flour.quantity, 60)
+    
+    def test_all_or_nothing(self):
+        """Test that a failing line stops the whole batch when requested."""
+        response = self.post([
+            {'inventory': self.flour.pk, 'transaction_type': 'removed', 'quantity': 1},
+            {'inventory': self.sugar.pk, 'transaction_type': 'removed', 'quantity': 4},
+        ], all_or_nothing=True)
+        
+        self.assertEqual(
+            [result['status'] for result in response.json()['results']],
+            ['not_applied', 'insufficient_stock']
+        )
+        self.flour.refresh_from_db()
+        self.assertEqual(self.flour.quantity, 10)
+        self.assertFalse(Transaction.objects.exists())
+
+
+class InventoryImportTests(TestCase):
+    """Test cases for the bulk inventory import."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(username='importer', password='importerpass123')
+        self.user.profile.role = 'manager'
+        self.user.profile.save()
+        Inventory.objects.create(sku='EGG-12', item_name='Eggs', quantity=10, reorder_level=4)
+    
+    def test_csv_import_upserts_on_sku(self):
+        """Test that new SKUs are created, known SKUs updated and bad rows reported."""
+        from io import StringIO
+        from .importer import import_inventory
+        
+        data = StringIO(
+            'sku,item_name,category,quantity,reorder_level,expiry_date\n'
+            'EGG-12,Eggs (dozen),Dairy,4,4,\n'
+            'MLK-1,Milk,Dairy,8,2,2030-01-31\n'
+            ',No SKU,Dairy,1,1,\n'
+            'BTR-1,Butter,Dairy,lots,1,\n'
+            'CHS-1,Cheese,Dairy,3,1,\n'
+        )
+        report = import_inventory(data, 'csv', self.user.profile, chunk_size=2)
+        
+        self.assertEqual((report['rows'], report['created'], report['updated']), (5, 2, 1))
+        self.assertEqual([error['line'] for error in report['errors']], [4, 5])
+        
+        eggs = Inventory.objects.get(sku='EGG-12')
+        self.assertEqual((eggs.item_name, eggs.quantity, eggs.stock_gap), ('Eggs (dozen)', 4, 0))
+        self.assertEqual(Inventory.objects.get(sku='MLK-1').expiry_date.isoformat(), '2030-01-31')
+        self.assertEqual(
+            sorted(Transaction.objects.values_list('inventory__sku', 'transaction_type', 'quantity_used')),
+            [('CHS-1', 'added', 3), ('EGG-12', 'removed', 6), ('MLK-1', 'added', 8)]
+        )
+    
+    def test_unknown_supplier_rejects_only_its_row(self):
+        """Test that a row naming an unknown supplier is reported without failing its chunk."""
+        from io import StringIO
+        from .importer import import_inventory
+        
+        supplier = Supplier.objects.create(name='Fresh Farms', email='farm@example.com', phone='1')
+        data = StringIO(
+            'sku,item_name,quantity,reorder_level,supplier_id\n'
+            f'MLK-1,Milk,8,2,{supplier.pk}\n'
+            'BTR-1,Butter,3,1,999999\n'
+            'CHS-1,Cheese,3,1,999999\n'
+            'RCE-5,Rice,50,10,\n'
+        )
+        report = import_inventory(data, 'csv', self.user.profile)
+        
+        self.assertEqual((report['created'], report['error_count']), (2, 2))
+        self.assertEqual(
+            report['errors'],
+            [{'line': 3, 'error': 'supplier 999999 does not exist'},
+             {'line': 4, 'error': 'supplier 999999 does not exist'}]
+        )
+        self.assertEqual(Inventory.objects.get(sku='MLK-1').supplier, supplier)
+        self.assertFalse(Inventory.objects.filter(sku__in=['BTR-1', 'CHS-1']).exists())
+    
+    def test_upload_endpoint_jsonl(self):
+        """Test importing an uploaded JSON Lines file."""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        
+        upload = SimpleUploadedFile(
+            'items.jsonl',
+            b'{"sku": "RCE-5", "item_name": "Rice", "quantity": 50, "reorder_level": 10}\n'
+            b'not json\n'
+        )
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('store:inventory_import_api'), {'file': upload})
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 1)
+        self.assertEqual(response.json()['error_count'], 1)
+        self.assertTrue(Inventory.objects.filter(sku='RCE-5', quantity=50).exists())
+
+
+class StreamingExportTests(TestCase):
+    """Test cases for the streaming CSV and JSON Lines exports."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(username='exporter', password='exporterpass123')
+        self.supplier = Supplier.objects.create(name='Fresh Farms', email='farm@example.com', phone='1')
+        self.eggs = Inventory.objects.create(
+            sku='EGG-12', item_name='Eggs', quantity=10, reorder_level=4, supplier=self.supplier
+        )
+        Inventory.objects.create(sku='MLK-1', item_name='Milk', quantity=1, reorder_level=2)
+        self.order = Order.objects.create(supplier=self.supplier, status='pending')
+        OrderItem.objects.create(order=self.order, inventory=self.eggs, quantity_ordered=6)
+        OrderItem.objects.create(order=self.order, inventory=self.eggs, quantity_ordered=4)
+    
+    def test_csv_report_is_streamed(self):
+        """Test that report generators stream CSV rows."""
+        from restaurant_management.utils.constants import STOCK_REPORT
+        from .reports import get_report_generator
+        
+        response = get_report_generator(STOCK_REPORT).generate()
+        
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].startswith('ID,SKU,Item Name'))
+        self.assertIn('MLK-1,Milk,,1,2,,,Yes', lines[2])
+    
+    def test_jsonl_reports(self):
+        """Test that every report type can be exported as JSON Lines."""
+        import json
+        from restaurant_management.utils.constants import (
+            JSONL_EXPORT, ORDER_REPORT, STOCK_REPORT, SUPPLIER_REPORT, TRANSACTION_REPORT
+        )
+        from .reports import get_report_generator
+        
+        Transaction.objects.create(
+            inventory=self.eggs, user=self.user.profile, quantity_used=2, transaction_type='removed'
+        )
+        expected_rows = {STOCK_REPORT: 2, ORDER_REPORT: 1, SUPPLIER_REPORT: 1, TRANSACTION_REPORT: 1}
+        
+        for report_type, count in expected_rows.items():
+            response = get_report_generator(report_type, format_type=JSONL_EXPORT).generate()
+            self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+            self.assertIn('.jsonl"', response['Content-Disposition'])
+            rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+            self.assertEqual(len(rows), count, report_type)
+        
+        response = get_report_generator(ORDER_REPORT, format_type=JSONL_EXPORT).generate()
+        row = json.loads(b''.join(response.streaming_content))
+        self.assertEqual((row['Order ID'], row['Items Count'], row['Total Quantity']), (self.order.id, 2, 10))
+    
+    def test_export_functions_stream(self):
+        """Test the inventory, order and supplier order export functions."""
+        import datetime
+        from supplier.utils import export_supplier_orders
+        from .utils import export_inventory_report, export_order_report
+        
+        today = timezone.now().date()
+        responses = [
+            export_inventory_report('jsonl'),
+            export_order_report(today - datetime.timedelta(days=1), today),
+            export_supplier_orders(self.supplier, 'jsonl'),
+        ]
+        
+        for response in responses:
+            self.assertTrue(response.streaming)
+            self.assertTrue(b''.join(response.streaming_content))
+    
+    def test_excel_report_served_from_file(self):
+        """Test that Excel reports are written to a temporary file and served whole."""
+        import zipfile
+        from io import BytesIO
+        from restaurant_management.utils.constants import EXCEL_EXPORT, STOCK_REPORT
+        from .reports import get_report_generator
+        
+        response = get_report_generator(STOCK_REPORT, format_type=EXCEL_EXPORT).generate()
+        
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="inventory_report.xlsx"')
+        workbook = zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+        sheet = workbook.read('xl/worksheets/sheet1.xml').decode()
+        self.assertIn('EGG-12', sheet)
+        self.assertIn('<row r="3"', sheet)
+        response.close()
+    
+    def test_order_exports_use_one_query(self):
+        """Test that order exports compute item totals in the order query."""
+        import datetime
+        from restaurant_management.utils.constants import EXCEL_EXPORT, JSONL_EXPORT, ORDER_REPORT
+        from supplier.utils import export_supplier_orders
+        from .reports import get_report_generator
+        from .utils import export_order_report
+        
+        for _ in range(5):
+            order = Order.objects.create(supplier=self.supplier, status='pending')
+            OrderItem.objects.create(order=order, inventory=self.eggs, quantity_ordered=3)
+        Order.objects.create(supplier=self.supplier, status='pending')
+        
+        today = timezone.now().date()
+        exports = [
+            lambda: get_report_generator(ORDER_REPORT, format_type=JSONL_EXPORT).generate(),
+            lambda: export_order_report(today - datetime.timedelta(days=1), today),
+            lambda: export_order_report(today - datetime.timedelta(days=1), today, EXCEL_EXPORT),
+            lambda: export_supplier_orders(self.supplier, 'csv'),
+        ]
+        for export in exports:
+            with self.assertNumQueries(1):
+                response = export()
+                content = b''.join(response.streaming_content)
+            response.close()
+            self.assertTrue(content)
+        
+        response = export_supplier_orders(self.supplier, 'csv')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        # Newest first: the order without items, then the one from setUp last
+        self.assertTrue(lines[1].endswith(',Not specified,0,0'))
+        self.assertTrue(lines[-1].startswith(f'{self.order.id},pending,'))
+        self.assertTrue(lines[-1].endswith(',Not specified,2,10'))
+
+
+
+class SupplierReportTests(TestCase):
+    """Test cases for the grouped supplier performance report."""
+    
+    def setUp(self):
+        """Set up test data."""
+        import datetime
+        from supplier.models import DeliveryNotification
+        
+        self.supplier = Supplier.objects.create(name='Fresh Farms', email='farm@example.com', phone='1')
+        other = Supplier.objects.create(name='Idle Supplier', email='idle@example.com', phone='2')
+        
+        def order(month, day, status, expected, delivered=None):
+            order = Order.objects.create(
+                supplier=self.supplier,
+                status=status,
+                order_date=timezone.make_aware(datetime.datetime(2025, month, day, 9)),
+                expected_delivery=expected
+            )
+            if delivered:
+                DeliveryNotification.objects.create(order=order, message='Delivered', delivery_date=delivered)
+        
+        # March: on time after 2 days, 3 days late after 6 days, no notification, pending
+        order(3, 1, 'delivered', datetime.date(2025, 3, 5), datetime.date(2025, 3, 3))
+        order(3, 2, 'delivered', datetime.date(2025, 3, 5), datetime.date(2025, 3, 8))
+        order(3, 3, 'delivered', datetime.date(2025, 3, 5))
+        order(3, 4, 'pending', datetime.date(2025, 3, 9))
+        # April: 1 day late after 4 days
+        order(4, 1, 'delivered', datetime.date(2025, 4, 4), datetime.date(2025, 4, 5))
+        # Outside the period
+        Order.objects.create(
+            supplier=other, status='pending',
+            order_date=timezone.make_aware(datetime.datetime(2025, 6, 1, 9))
+        )
+        
+        self.start_date = datetime.date(2025, 3, 1)
+        self.end_date = datetime.date(2025, 4, 30)
+    
+    def report_rows(self, **options):
+        import csv
+        from restaurant_management.utils.constants import SUPPLIER_REPORT
+        from .reports import get_report_generator
+        
+        response = get_report_generator(
+            SUPPLIER_REPORT, self.start_date, self.end_date, **options
+        ).generate()
+        return list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+    
+    def test_report_is_one_grouped_query(self):
+        """Test per-supplier counts, averages and lateness from one query."""
+        with self.assertNumQueries(1):
+            rows = self.report_rows()
+        
+        self.assertEqual(rows[0][-1], 'Average Days Late')
+        self.assertEqual(rows[1:], [[
+            str(self.supplier.id), 'Fresh Farms', '5', '4', '2', '2', '50.0%', '4.0', '2.0'
+        ]])
+    
+    def test_report_by_month(self):
+        """Test the per-month breakdown."""
+        rows = self.report_rows(by_month=True)
+        
+        self.assertEqual(rows[0][2], 'Month')
+        self.assertEqual([row[2:] for row in rows[1:]], [
+            ['2025-03', '4', '3', '2', '1', '66.7%', '4.0', '3.0'],
+            ['2025-04', '1', '1', '0', '1', '0.0%', '4.0', '1.0'],
+        ])
+    
+    def test_performance_stats_are_one_query(self):
+        """Test per-supplier on-time percentages computed and sorted in SQL."""
+        from .utils import get_supplier_performance_stats
+        
+        with self.assertNumQueries(1):
+            stats = [
+                (supplier.name, supplier.total_orders, supplier.delivered_orders,
+                 supplier.on_time_deliveries, round(supplier.on_time_percentage, 1))
+                for supplier in get_supplier_performance_stats(
+                    period_start=self.start_date, period_end=self.end_date
+                )
+            ]
+        
+        self.assertEqual(stats, [('Fresh Farms', 5, 4, 2, 50.0), ('Idle Supplier', 0, 0, 0, 0.0)])
+    
+    def test_performance_view_filters_and_sorts(self):
+        """Test the supplier performance view's date range and sorting."""
+        user = User.objects.create_user(username='perfmanager', password='perfpass123')
+        user.profile.role = 'manager'
+        user.profile.save()
+        client = Client()
+        client.login(username='perfmanager', password='perfpass123')
+        
+        response = client.get(reverse('store:supplier_performance'), {
+            'start_date': '2025-04-01', 'end_date': '2025-04-30', 'sort': 'on_time_asc'
+        })
+        stats = list(response.context['supplier_stats'])
+        self.assertEqual([supplier.name for supplier in stats], ['Fresh Farms', 'Idle Supplier'])
+        self.assertEqual((stats[0].total_orders, stats[0].late_deliveries), (1, 1))
+        
+        response = client.get(reverse('store:supplier_performance'), {
+            'start_date': '2025-03-01', 'end_date': '2025-03-31'
+        })
+        stats = list(response.context['supplier_stats'])
+        self.assertEqual(stats[0].name, 'Fresh Farms')
+        self.assertAlmostEqual(stats[0].on_time_percentage, 200 / 3)
+        
+        # Without a date range every order is counted
+        response = client.get(reverse('store:supplier_performance'))
+        stats = {
+            supplier.name: supplier.total_orders for supplier in response.context['supplier_stats']
+        }
+        self.assertEqual(stats, {'Fresh Farms': 5, 'Idle Supplier': 1})
+
+
+class ReportJobTests(TestCase):
+    """Test cases for background report jobs."""
+    
+    def setUp(self):
+        """Set up test data."""
+        import shutil
+        import tempfile
+        from django.test import override_settings
+        
+        self.artifact_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.artifact_dir, True)
+        settings_override = override_settings(REPORT_ARTIFACT_DIR=self.artifact_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        
+        self.user = User.objects.create_user(username='reporter', password='reporterpass123')
+        self.profile = self.user.profile
+        self.profile.role = 'manager'
+        self.profile.save()
+        Inventory.objects.create(sku='EGG-12', item_name='Eggs', quantity=10, reorder_level=4)
+        
+        self.client = Client()
+        self.client.login(username='reporter', password='reporterpass123')
+    
+    def run_worker(self):
+        from io import StringIO
+        from django.core.management import call_command
+        
+        call_command('run_report_worker', '--once', stdout=StringIO(), stderr=StringIO())
+    
+    def test_worker_writes_report_and_reuses_it(self):
+        """Test that a finished report is reused until its data changes."""
+        import os
+        from restaurant_management.utils.constants import STOCK_REPORT
+        from .models import ReportJob
+        from .report_jobs import submit_report
+        
+        job = submit_report(STOCK_REPORT, 'csv', self.profile)
+        self.assertEqual(job.status, ReportJob.QUEUED)
+        self.assertEqual(submit_report(STOCK_REPORT, 'csv'), job)
+        
+        self.run_worker()
+        job.refresh_from_db()
+        self.assertEqual(job.status, ReportJob.DONE)
+        self.assertTrue(job.file_name.endswith('.csv'))
+        with open(job.file_path) as report_file:
+            self.assertIn('EGG-12,Eggs', report_file.read())
+        self.assertEqual(os.path.dirname(job.file_path), self.artifact_dir)
+        
+        self.assertEqual(submit_report(STOCK_REPORT, 'csv'), job)
+        self.assertNotEqual(submit_report(STOCK_REPORT, 'jsonl'), job)
+        
+        Inventory.objects.create(sku='MLK-1', item_name='Milk', quantity=1, reorder_level=2)
+        changed = submit_report(STOCK_REPORT, 'csv')
+        self.assertNotEqual(changed, job)
+        self.assertNotEqual(changed.cache_key, job.cache_key)
+        
+        # Writes that send no signals, as from another worker or MySQL, count too
+        Inventory.objects.filter(sku='EGG-12').update(quantity=11)
+        self.assertNotEqual(submit_report(STOCK_REPORT, 'csv').cache_key, changed.cache_key)
+    
+    def test_failed_job_records_error(self):
+        """Test that a report that raises marks its job failed."""
+        import os
+        from unittest import mock
+        from restaurant_management.utils.constants import STOCK_REPORT
+        from .models import ReportJob
+        from .report_jobs import submit_report
+        
+        job = submit_report(STOCK_REPORT, 'csv')
+        with mock.patch('store.reports.ReportGenerator.write', side_effect=RuntimeError('disk full')):
+            self.run_worker()
+        
+        job.refresh_from_db()
+        self.assertEqual(job.status, ReportJob.FAILED)
+        self.assertIn('disk full', job.error)
+        self.assertEqual(os.listdir(self.artifact_dir), [])
+    
+    def test_api_submit_poll_and_download(self):
+        """Test the report job API from request to download."""
+        from restaurant_management.utils.constants import ORDER_REPORT
+        
+        response = self.client.post(reverse('store:report_jobs_api'), {
+            'report_type': ORDER_REPORT,
+            'format': 'jsonl',
+            'start_date': '2025-03-01',
+            'end_date': '2025-03-31',
+        })
+        self.assertEqual(response.status_code, 202)
+        job_id = response.data['id']
+        self.assertEqual(response.data['parameters'], {'start_date': '2025-03-01', 'end_date': '2025-03-31'})
+        self.assertIsNone(response.data['download_url'])
+        
+        download_url = reverse('store:report_job_download', args=[job_id])
+        self.assertEqual(self.client.get(download_url).status_code, 404)
+        
+        self.run_worker()
+        response = self.client.get(reverse('store:report_job_api', args=[job_id]))
+        self.assertEqual(response.data['status'], 'done')
+        self.assertEqual(response.data['download_url'], download_url)
+        
+        response = self.client.get(download_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertIn('attachment', response['Content-Disposition'])
+    
+    def test_api_rejects_staff_and_bad_dates(self):
+        """Test the report job API permissions and validation."""
+        from restaurant_management.utils.constants import ORDER_REPORT
+        
+        response = self.client.post(reverse('store:report_jobs_api'), {
+            'report_type': ORDER_REPORT, 'start_date': '2025-03-31', 'end_date': '2025-03-01',
+        })
+        self.assertEqual(response.status_code, 400)
+        
+        self.profile.role = 'staff'
+        self.profile.save()
+        response = self.client.post(reverse('store:report_jobs_api'), {'report_type': ORDER_REPORT})
+        self.assertEqual(response.status_code, 403)
+
+
+class StockReportTests(TestCase):
+    """Test cases for the grouped stock report."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(username='stockmanager', password='stockpass123')
+        self.user.profile.role = 'manager'
+        self.user.profile.save()
+        
+        self.supplier = Supplier.objects.create(name='Fresh Farms', email='farm@example.com', phone='1')
+        for number in range(3):
+            Inventory.objects.create(
+                sku=f'DRY-{number}', item_name=f'Flour {number}', category='Dry Goods',
+                quantity=10 * number, reorder_level=5, supplier=self.supplier
+            )
+        Inventory.objects.create(sku='MLK-1', item_name='Milk', category='Dairy', quantity=8, reorder_level=2)
+        Inventory.objects.create(sku='MISC-1', item_name='Twine', category=None, quantity=1, reorder_level=0)
+        Inventory.objects.create(sku='MISC-2', item_name='Foil', category='', quantity=2, reorder_level=0)
+        
+        self.client = Client()
+        self.client.login(username='stockmanager', password='stockpass123')
+    
+    def test_category_totals_are_one_query(self):
+        """Test that per-category totals are grouped in the database."""
+        from .utils import get_stock_report_categories
+        
+        with self.assertNumQueries(1):
+            categories = list(get_stock_report_categories())
+        
+        self.assertEqual(
+            [(row['category_name'], row['item_count'], row['total_quantity'], row['low_stock_count'])
+             for row in categories],
+            [('', 2, 3, 0), ('Dairy', 1, 8, 0), ('Dry Goods', 3, 30, 1)]
+        )
+        self.assertEqual(categories[2]['supplier_count'], 1)
+    
+    def test_category_items_are_loaded_lazily(self):
+        """Test that only the expanded category's items are fetched, as rows."""
+        response = self.client.get(reverse('store:stock_report'))
+        self.assertIsNone(response.context['page_obj'])
+        self.assertEqual(response.context['totals']['item_count'], 6)
+        
+        response = self.client.get(reverse('store:stock_report'), {'category': 'Dry Goods'})
+        items = list(response.context['page_obj'])
+        self.assertEqual([item['item_name'] for item in items], ['Flour 0', 'Flour 1', 'Flour 2'])
+        self.assertEqual(items[0]['supplier__name'], 'Fresh Farms')
+        
+        response = self.client.get(reverse('store:stock_report'), {'category': ''})
+        self.assertEqual([item['sku'] for item in response.context['page_obj']], ['MISC-2', 'MISC-1'])
+    
+    def test_category_keyset_pages(self):
+        """Test keyset pagination over values() rows."""
+        from restaurant_management.utils.pagination import KeysetPaginator
+        from .utils import get_category_stock
+        
+        paginator = KeysetPaginator(get_category_stock('Dry Goods'), ('item_name', 'id'), 2)
+        first = paginator.get_page()
+        second = paginator.get_page(first.next_cursor)
+        
+        self.assertEqual([item['item_name'] for item in second], ['Flour 2'])
+        self.assertFalse(second.has_next())
+
+
+class OrderStatusTests(TestCase):
+    """Test cases for the order status state machine."""
+    
+    def setUp(self):
+        """Set up test data."""
+        from supplier.models import SupplierPerformance
+        
+        self.user = User.objects.create_user(username='manager', password='managerpass123')
+        self.user.profile.role = 'manager'
+        self.user.profile.save()
+        self.supplier = Supplier.objects.create(name='Fresh Farms', email='f@example.com', phone='1')
+        self.orders = [
+            Order.objects.create(supplier=self.supplier, status=status,
+                                 expected_delivery=timezone.now().date())
+            for status in ('pending', 'shipped', 'shipped', 'delivered')
+        ]
+        self.performance = SupplierPerformance.objects.get(supplier=self.supplier)
+        self.client.force_login(self.user)
+    
+    def test_allowed_transitions(self):
+        """Test the allowed status changes."""
+        from .order_status import can_transition
+        
+        self.assertTrue(can_transition('pending', 'shipped'))
+        self.assertTrue(can_transition('shipped', 'shipped'))
+        self.assertTrue(can_transition('shipped', 'cancelled'))
+        self.assertFalse(can_transition('shipped', 'pending'))
+        self.assertFalse(can_transition('delivered', 'cancelled'))
+        self.assertFalse(can_transition('cancelled', 'pending'))
+    
+    def test_save_sends_one_transition_without_reading_the_row(self):
+        """Test that a status change needs no extra SELECT and is announced once."""
+        from .order_status import order_status_changed
+        
+        received = []
+        
+        def receiver(sender, transitions, **kwargs):
+            received.append([(t.order.pk, t.old_status, t.new_status) for t in transitions])
+        
+        order_status_changed.connect(receiver)
+        self.addCleanup(order_status_changed.disconnect, receiver)
+        
+        order = Order.objects.get(pk=self.orders[0].pk)
+        order.status = 'shipped'
+        # The UPDATE only; pending to shipped moves no counter
+        with self.assertNumQueries(1):
+            order.save(update_fields=['status'])
+        order.save()
+        
+        self.assertEqual(received, [[(order.pk, 'pending', 'shipped')]])
+    
+    def test_invalid_transition_is_rejected(self):
+        """Test that the API and the form refuse a status change the state machine forbids."""
+        from .forms import OrderUpdateForm
+        
+        delivered = self.orders[3]
+        response = self.client.patch(
+            reverse('store:order_status_api', args=[delivered.pk]),
+            {'status': 'pending'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        
+        form = OrderUpdateForm({'status': 'pending'}, instance=Order.objects.get(pk=delivered.pk))
+        self.assertFalse(form.is_valid())
+        self.assertEqual(Order.objects.get(pk=delivered.pk).status, 'delivered')
+        
+        response = self.client.patch(
+            reverse('store:order_status_api', args=[self.orders[0].pk]),
+            {'status': 'shipped'}, content_type='application/json'
+        )
+        self.assertEqual(response.json()['status'], 'shipped')
+    
+    def test_concurrent_transition_is_applied_once(self):
+        """Test that a transition from a stale copy of the order is rejected."""
+        from supplier.models import DeliveryNotification
+        from .order_status import transition_order, InvalidTransition
+        
+        first = Order.objects.get(pk=self.orders[1].pk)
+        second = Order.objects.get(pk=self.orders[1].pk)
+        transition_order(first, 'delivered')
+        
+        with self.assertRaises(InvalidTransition):
+            transition_order(second, 'cancelled')
+        
+        self.assertEqual(Order.objects.get(pk=first.pk).status, 'delivered')
+        self.assertEqual(DeliveryNotification.objects.filter(order=first).count(), 1)
+    
+    def test_bulk_transition(self):
+        """Test per-order results, notifications and counters of a bulk transition."""
+        from supplier.models import DeliveryNotification
+        from .order_status import bulk_transition_orders
+        
+        ids = [order.pk for order in self.orders] + [999999]
+        # savepoint, lock, update, notification lookup, notification insert,
+        # performance update, release
+        with self.assertNumQueries(7):
+            results = bulk_transition_orders(ids, 'delivered')
+        
+        self.assertEqual(
+            [result['status'] for result in results],
+            ['invalid_transition', 'transitioned', 'transitioned', 'unchanged', 'not_found']
+        )
+        self.assertEqual(
+            DeliveryNotification.objects.filter(order__in=self.orders[1:3]).count(), 2
+        )
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.total_orders, 4)
+        self.assertEqual(self.performance.on_time_deliveries, 3)
+        
+        response = self.client.post(
+            reverse('store:order_status_batch_api'),
+            {'order_ids': ids, 'status': 'cancelled'}, content_type='application/json'
+        )
+        self.assertEqual(response.json()['transitioned'], 1)
+        self.assertEqual(Order.objects.get(pk=self.orders[0].pk).status, 'cancelled')
+
+
+class OrderTotalsTests(TestCase):
+    """Test cases for the denormalized order totals."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(username='manager', password='managerpass123')
+        self.supplier = Supplier.objects.create(name='Fresh Farms', email='f@example.com', phone='1')
+        self.flour = Inventory.objects.create(item_name='Flour', quantity=100, reorder_level=5)
+        self.order = Order.objects.create(supplier=self.supplier)
+        self.other = Order.objects.create(supplier=self.supplier)
+    
+    def totals(self, order=None):
+        order = Order.objects.get(pk=(order or self.order).pk)
+        return order.items_count, order.total_quantity
+    
+    def test_single_item_writes(self):
+        """Test that creating, changing, moving and deleting an item updates the totals."""
+        stale = Order.objects.get(pk=self.order.pk)
+        item = OrderItem.objects.create(order=self.order, inventory=self.flour, quantity_ordered=4)
+        OrderItem.objects.create(order=self.order, inventory=self.flour, quantity_ordered=6)
+        self.assertEqual(self.totals(), (2, 10))
+        
+        # Saving an order loaded before the items were added keeps the totals
+        stale.status = 'shipped'
+        stale.save()
+        self.assertEqual(self.totals(), (2, 10))
+        
+        item = OrderItem.objects.get(pk=item.pk)
+        item.quantity_ordered = 7
+        item.save()
+        self.assertEqual(self.totals(), (2, 13))
+        
+        item.order = self.other
+        item.save()
+        self.assertEqual((self.totals(), self.totals(self.other)), ((1, 6), (1, 7)))
+        
+        item.delete()
+        self.assertEqual(self.totals(self.other), (0, 0))
+    
+    def test_bulk_item_writes(self):
+        """Test that the bulk paths recount the orders they touch."""
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, inventory=self.flour, quantity_ordered=quantity)
+            for order in (self.order, self.other) for quantity in (1, 2, 3)
+        ])
+        self.assertEqual((self.totals(), self.totals(self.other)), ((3, 6), (3, 6)))
+        
+        OrderItem.objects.filter(order=self.order, quantity_ordered=3).update(quantity_ordered=10)
+        self.assertEqual(self.totals(), (3, 13))
+        
+        items = list(OrderItem.objects.filter(order=self.other, quantity_ordered__lte=2))
+        for item in items:
+            item.order = self.order
+        OrderItem.objects.bulk_update(items, ['order'])
+        self.assertEqual((self.totals(), self.totals(self.other)), ((5, 16), (1, 3)))
+        
+        OrderItem.objects.filter(quantity_ordered__lte=2).delete()
+        self.assertEqual((self.totals(), self.totals(self.other)), ((1, 10), (1, 3)))
+    
+    def test_order_list_reads_no_items(self):
+        """Test that the summary order list API does not query order_items."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        OrderItem.objects.create(order=self.order, inventory=self.flour, quantity_ordered=4)
+        self.client.force_login(self.user)
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('store:order_api_list'), {'summary': '1'})
+        
+        rows = {row['id']: row for row in response.json()}
+        self.assertEqual((rows[self.order.pk]['items_count'], rows[self.order.pk]['total_items']), (1, 4))
+        self.assertNotIn('items', rows[self.order.pk])
+        self.assertFalse(any('order_items' in query['sql'] for query in queries.captured_queries))
+    
+    def test_repair_command(self):
+        """Test that the repair command finds and fixes drifted totals."""
+        from io import StringIO
+        from django.core.management import call_command
+        
+        OrderItem.objects.create(order=self.order, inventory=self.flour, quantity_ordered=4)
+        Order.objects.filter(pk=self.order.pk).update(items_count=0, total_quantity=9)
+        
+        call_command('repair_order_totals', '--dry-run', stdout=StringIO())
+        self.assertEqual(self.totals(), (0, 9))
+        
+        out = StringIO()
+        call_command('repair_order_totals', stdout=out)
+        self.assertIn('Recounted totals for 1 orders', out.getvalue())
+        self.assertEqual(self.totals(), (1, 4))
+
+
+class AlertDigestTests(TestCase):
+    """Test cases for the shared inventory alert digest."""
+    
+    def setUp(self):
+        """Set up test data."""
+        today = timezone.now().date()
+        self.user = User.objects.create_user(username='staff', password='staffpass123')
+        Inventory.objects.create(item_name='Milk', quantity=1, reorder_level=5,
+                                 expiry_date=today + timezone.timedelta(days=3))
+        Inventory.objects.create(item_name='Cream', quantity=10, reorder_level=5,
+                                 expiry_date=today - timezone.timedelta(days=1))
+    
+    def make_request(self, session=None):
+        from django.contrib.messages.storage.fallback import FallbackStorage
+        from django.contrib.sessions.backends.db import SessionStore
+        from django.test import RequestFactory
+        
+        request = RequestFactory().get('/store/')
+        request.user = User.objects.select_related('profile').get(pk=self.user.pk)
+        request.session = session if session is not None else SessionStore()
+        request._messages = FallbackStorage(request)
+        return request
+    
+    def test_digest_is_shown_once_per_user_across_workers(self):
+        """Test that two middleware instances show the digest to a user only once."""
+        from django.http import HttpResponse
+        from .middleware import AlertDigestMiddleware
+        
+        workers = [AlertDigestMiddleware(lambda request: HttpResponse()) for _ in range(2)]
+        
+        first = self.make_request()
+        workers[0](first)
+        alerts = [str(message) for message in first._messages]
+        self.assertEqual(len(alerts), 3)
+        self.assertTrue(alerts[1].startswith("1 inventory items have expired."))
+        self.assertIn(reverse('store:low_stock_alerts'), alerts[2])
+        
+        # A fresh session on another worker: the receipt row says seen
+        second = self.make_request()
+        workers[1](second)
+        self.assertEqual(len(second._messages), 0)
+        
+        # Later requests in the same session make no query
+        third = self.make_request(first.session)
+        with self.assertNumQueries(0):
+            workers[1](third)
+        self.assertEqual(len(third._messages), 0)
+    
+    def test_digest_counts_come_from_counters(self):
+        """Test that the digest reads the shared counters row."""
+        from .alerts import get_alert_digest
+        from .counters import get_inventory_counters
+        
+        get_inventory_counters()
+        with self.assertNumQueries(1):
+            digest = get_alert_digest()
+        self.assertEqual((digest['expiring'], digest['expired'], digest['low_stock']), (1, 1, 1))
+
+
+class UserContextTests(TestCase):
+    """Test cases for loading the request user with its profiles."""
+    
+    USER_TABLES = ('"auth_user"', '"store_userprofile"', '"supplier_supplierprofile"')
+    
+    def setUp(self):
+        """Set up test data."""
+        from supplier.models import SupplierProfile
+        
+        self.manager = User.objects.create_user(username='manager', password='managerpass123')
+        self.manager.profile.role = 'manager'
+        self.manager.profile.save()
+        
+        self.supplier_user = User.objects.create_user(username='supplier', password='supplierpass123')
+        self.supplier_user.profile.role = 'supplier'
+        self.supplier_user.profile.save()
+        self.supplier = Supplier.objects.create(name='Fresh Farms', email='f@example.com', phone='1')
+        SupplierProfile.objects.create(user=self.supplier_user, supplier=self.supplier)
+    
+    def get_user_queries(self, url):
+        """Request a page and return the response and its queries on user tables."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        
+        user_queries = [
+            query['sql'] for query in queries.captured_queries
+            if any(f'FROM {table}' in query['sql'] for table in self.USER_TABLES)
+        ]
+        return response, user_queries
+    
+    def test_store_pages_load_the_user_once(self):
+        """Test that store pages pay one query for the user, profile and role."""
+        self.client.force_login(self.manager)
+        
+        for name in ('store:manager_dashboard', 'store:low_stock_alerts', 'store:stock_report'):
+            response, user_queries = self.get_user_queries(reverse(name))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(user_queries), 1, name)
+            self.assertEqual(response.wsgi_request.user_role, 'manager')
+            self.assertTrue(response.context['is_manager'])
+    
+    def test_supplier_pages_load_the_supplier_with_the_user(self):
+        """Test that supplier pages get the supplier from the same query as the user."""
+        self.client.force_login(self.supplier_user)
+        
+        for name in ('supplier:dashboard', 'supplier:view_orders'):
+            response, user_queries = self.get_user_queries(reverse(name))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(user_queries), 1, name)
+            self.assertIn('"suppliers"', user_queries[0])
+            self.assertEqual(response.wsgi_request.supplier, self.supplier)
+
+
+class TokenClaimsTests(TestCase):
+    """Test cases for authorizing API requests from token claims."""
+    
+    def setUp(self):
+        """Set up test data."""
+        import shutil
+        import tempfile
+        from django.conf import settings
+        from django.core.cache import cache
+        from supplier.models import SupplierProfile
+        
+        cache.clear()
+        # Revocations go to a scratch directory, not the shared one
+        token_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, token_dir, True)
+        caches_setting = dict(settings.CACHES)
+        caches_setting['tokens'] = dict(caches_setting['tokens'], LOCATION=token_dir)
+        settings_override = override_settings(CACHES=caches_setting)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        
+        self.manager = User.objects.create_user(username='manager', password='managerpass123')
+        self.manager.profile.role = 'manager'
+        self.manager.profile.save()
+        
+        self.supplier_user = User.objects.create_user(username='supplier', password='supplierpass123')
+        self.supplier_user.profile.role = 'supplier'
+        self.supplier_user.profile.save()
+        self.supplier = Supplier.objects.create(name='Fresh Farms', email='f@example.com', phone='1')
+        SupplierProfile.objects.create(user=self.supplier_user, supplier=self.supplier)
+    
+    def login(self, username, password):
+        """Log in through the API and return the token response."""
+        response = self.client.post(
+            reverse('api_login'), {'username': username, 'password': password},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+    
+    def get(self, url, access):
+        return self.client.get(url, HTTP_AUTHORIZATION=f'Bearer {access}')
+    
+    def test_dashboards_are_authorized_without_queries(self):
+        """Test that polled dashboards authorize from the token's claims alone."""
+        manager_tokens = self.login('manager', 'managerpass123')
+        supplier_tokens = self.login('supplier', 'supplierpass123')
+        self.client.logout()
+        
+        for url, tokens in (('/api/dashboard/manager/', manager_tokens),
+                            ('/api/dashboard/supplier/', supplier_tokens)):
+            # The first poll fills the dashboard cache
+            self.assertEqual(self.get(url, tokens['access']).status_code, 200)
+            with self.assertNumQueries(0):
+                response = self.get(url, tokens['access'])
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('error', response.json())
+        
+        with self.assertNumQueries(0):
+            response = self.get('/api/dashboard/manager/', supplier_tokens['access'])
+        self.assertEqual(response.status_code, 403)
+    
+    def test_revoked_tokens_are_rejected(self):
+        """Test that logged out tokens and tokens of changed users stop working."""
+        tokens = self.login('manager', 'managerpass123')
+        self.client.logout()
+        self.assertEqual(self.get('/api/dashboard/manager/', tokens['access']).status_code, 200)
+        
+        response = self.client.post(
+            reverse('api_token_revoke'), {'refresh': tokens['refresh']},
+            content_type='application/json', HTTP_AUTHORIZATION=f"Bearer {tokens['access']}"
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.get('/api/dashboard/manager/', tokens['access']).status_code, 401)
+        response = self.client.post(
+            reverse('api_token_refresh'), {'refresh': tokens['refresh']},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 401)
+        
+        # A role change revokes the user's tokens issued before it
+        from store.tokens import issue_tokens
+        refresh = issue_tokens(self.manager)
+        refresh['iat'] -= 1
+        access = refresh.access_token
+        access['iat'] -= 1
+        profile = UserProfile.objects.get(user=self.manager)
+        profile.role = 'staff'
+        profile.save()
+        self.assertEqual(self.get('/api/dashboard/manager/', str(access)).status_code, 401)
+        response = self.client.post(
+            reverse('api_token_refresh'), {'refresh': str(refresh)},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 401)
+
+
+# Hashes are counted on the MD5 hasher, whatever the settings hash with
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class LoginBackendTests(TestCase):
+    """Test cases for the consolidated login backend."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='cook', email='cook@example.com', password='cookpass123'
+        )
+    
+    def login(self, username, password):
+        """Authenticate and return the user, the queries made and the hashes computed."""
+        from unittest import mock
+        from django.contrib.auth import authenticate
+        from django.contrib.auth.hashers import MD5PasswordHasher
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        encode = MD5PasswordHasher.encode
+        with mock.patch.object(MD5PasswordHasher, 'encode', autospec=True, side_effect=encode) as hashes:
+            with CaptureQueriesContext(connection) as queries:
+                user = authenticate(None, username=username, password=password)
+        return user, len(queries.captured_queries), hashes.call_count
+    
+    def test_each_login_costs_one_query_and_one_hash(self):
+        """Test that every kind of login makes one lookup and one hash."""
+        User.objects.create_user(username='twin1', email='shared@example.com', password='x')
+        User.objects.create_user(username='twin2', email='shared@example.com', password='x')
+        
+        for username, password, succeeds in (
+            ('cook', 'cookpass123', True),
+            ('cook@example.com', 'cookpass123', True),
+            ('cook', 'wrongpass', False),
+            ('nobody', 'cookpass123', False),
+            ('shared@example.com', 'x', False),
+        ):
+            user, query_count, hash_count = self.login(username, password)
+            self.assertEqual(user is not None, succeeds, username)
+            self.assertEqual((query_count, hash_count), (1, 1), username)
+        
+        user, _, _ = self.login('cook', 'cookpass123')
+        with self.assertNumQueries(0):
+            self.assertEqual(user.profile.role, 'staff')
+    
+    def test_outdated_hashes_are_upgraded(self):
+        """Test that a login rehashes with the configured hasher and work factor."""
+        hashers = [
+            'store.hashers.ConfiguredPBKDF2PasswordHasher',
+            'django.contrib.auth.hashers.MD5PasswordHasher',
+        ]
+        for iterations in (1000, 2000):
+            with override_settings(PASSWORD_HASHERS=hashers, PASSWORD_HASH_ITERATIONS=iterations):
+                self.assertIsNotNone(self.login('cook', 'cookpass123')[0])
+                self.user.refresh_from_db()
+                self.assertTrue(self.user.password.startswith(f'pbkdf2_sha256${iterations}$'))
+                self.assertIsNotNone(self.login('cook@example.com', 'cookpass123')[0])
+
+
+class LoginBenchmarkTests(TransactionTestCase):
+    """Test the login throughput benchmark."""
+    
+    def test_benchmark_login(self):
+        """Run the login benchmark on a few threads."""
+        from io import StringIO
+        from django.core.management import call_command
+        
+        out = StringIO()
+        call_command('benchmark_login', threads=2, logins=16, users=3, stdout=out)
+        self.assertIn('All login attempts had the expected outcome.', out.getvalue())
+        self.assertFalse(User.objects.filter(username__startswith='bench-login-').exists())
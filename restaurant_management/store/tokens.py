@@ -0,0 +1,166 @@
+"""
+Claims-carrying JSON web tokens for the API.
+
+Tokens issued here carry the user's role and supplier id as signed claims
+next to the user id, so ClaimsJWTAuthentication (see store.authentication)
+and the permission classes in store.permissions authorize a request from
+the token alone, without reading the user or its profiles.
+
+Claims go stale when a user's role changes, so access tokens are short
+lived (SIMPLE_JWT's ACCESS_TOKEN_LIFETIME) and the refresh endpoint reads
+the claims afresh. Tokens that must stop working before they expire are
+put on a revocation list in TOKEN_REVOCATION_CACHE: single tokens by their
+jti until their expiry, and every token of a user issued before a
+revocation time, e.g. after the user's role was changed.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ObjectDoesNotExist
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from .user_context import load_user_context
+
+ROLE_CLAIM = 'role'
+SUPPLIER_CLAIM = 'supplier_id'
+
+REVOKED_TOKEN_KEY_PREFIX = 'revoked-token'
+REVOKED_USER_KEY_PREFIX = 'revoked-user-tokens'
+
+
+class ClaimsTokenUser(TokenUser):
+    """A stateless user backed by a token's role and supplier claims."""
+    
+    @property
+    def role(self):
+        return self.token.get(ROLE_CLAIM)
+    
+    @property
+    def supplier_id(self):
+        return self.token.get(SUPPLIER_CLAIM)
+
+
+def get_revocation_cache():
+    """Get the cache that the token revocation list is stored in."""
+    return caches[getattr(settings, 'TOKEN_REVOCATION_CACHE', 'default')]
+
+
+def get_user_claims(user):
+    """
+    Get the role and supplier claims of a user.
+    
+    Args:
+        user (User): The user, ideally loaded with load_user_context.
+    
+    Returns:
+        dict: The role (None without a profile) and supplier id (None for
+        users who do not work for a supplier).
+    """
+    try:
+        role = user.profile.role
+    except ObjectDoesNotExist:
+        role = None
+    
+    try:
+        supplier_id = user.supplier_profile.supplier_id
+    except ObjectDoesNotExist:
+        supplier_id = None
+    
+    return {ROLE_CLAIM: role, SUPPLIER_CLAIM: supplier_id}
+
+
+def issue_tokens(user):
+    """
+    Issue a refresh token and its access token for a user.
+    
+    Args:
+        user (User): The user who logged in.
+    
+    Returns:
+        RefreshToken: The refresh token; its access_token carries the same claims.
+    """
+    refresh = RefreshToken.for_user(user)
+    for claim, value in get_user_claims(user).items():
+        refresh[claim] = value
+    return refresh
+
+
+def refresh_access_token(refresh):
+    """
+    Issue a new access token with the claims the user has now.
+    
+    Args:
+        refresh (RefreshToken): A validated refresh token.
+    
+    Returns:
+        AccessToken: The new access token, or None if the refresh token was
+        revoked or its user is gone or inactive.
+    """
+    if is_token_revoked(refresh):
+        return None
+    
+    user = load_user_context(refresh[api_settings.USER_ID_CLAIM])
+    if user is None or not user.is_active:
+        return None
+    
+    access = AccessToken.for_user(user)
+    for claim, value in get_user_claims(user).items():
+        access[claim] = value
+    return access
+
+
+def _seconds_left(token):
+    return max(int(token['exp'] - time.time()), 1)
+
+
+def revoke_token(token):
+    """
+    Revoke one token until it expires.
+    
+    Args:
+        token (Token): A validated access or refresh token.
+    """
+    get_revocation_cache().set(
+        f'{REVOKED_TOKEN_KEY_PREFIX}:{token[api_settings.JTI_CLAIM]}', 1,
+        timeout=_seconds_left(token)
+    )
+
+
+def revoke_user_tokens(user_id):
+    """
+    Revoke every token issued to a user until now.
+    
+    Args:
+        user_id: The user's primary key.
+    """
+    lifetime = max(api_settings.ACCESS_TOKEN_LIFETIME, api_settings.REFRESH_TOKEN_LIFETIME)
+    get_revocation_cache().set(
+        f'{REVOKED_USER_KEY_PREFIX}:{user_id}', int(time.time()),
+        timeout=int(lifetime.total_seconds())
+    )
+
+
+def is_token_revoked(token):
+    """
+    Check a token against the revocation list, with one cache read.
+    
+    Args:
+        token (Token): A validated access or refresh token.
+    
+    Returns:
+        bool: True if the token or every token of its user was revoked.
+    """
+    token_key = f'{REVOKED_TOKEN_KEY_PREFIX}:{token.get(api_settings.JTI_CLAIM)}'
+    user_key = f'{REVOKED_USER_KEY_PREFIX}:{token.get(api_settings.USER_ID_CLAIM)}'
+    revoked = get_revocation_cache().get_many([token_key, user_key])
+    
+    if token_key in revoked:
+        return True
+    revoked_at = revoked.get(user_key)
+    # Tokens issued in the second of the revocation are kept, so a login
+    # right after a role change is not rejected
+    return revoked_at is not None and token.get('iat', 0) < revoked_at
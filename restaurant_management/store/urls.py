@@ -40,6 +40,7 @@ urlpatterns = [
     path('reports/stock/', views.stock_report, name='stock_report'),
     path('reports/orders/', views.order_summary, name='order_summary'),
     path('reports/suppliers/', views.supplier_performance, name='supplier_performance'),
+    path('reports/jobs/<int:job_id>/', views.report_job, name='report_job'),
     
     # Settings
     path('settings/', views.configure_settings, name='configure_settings'),
@@ -50,6 +51,15 @@ urlpatterns = [
     # API Endpoints
     path('api/inventory/', views.InventoryListCreateAPIView.as_view(), name='inventory_api_list_create'),
     path('api/inventory/<int:pk>/', views.InventoryRetrieveUpdateDestroyAPIView.as_view(), name='inventory_api_detail'),
+    path('api/inventory/import/', views.inventory_import_api_view, name='inventory_import_api'),
+    path('api/inventory/stock/batch/', views.inventory_stock_batch_api_view, name='inventory_stock_batch_api'),
+    path('api/inventory/<int:pk>/stock/', views.inventory_stock_api_view, name='inventory_stock_api'),
+    path('api/orders/', views.OrderListAPIView.as_view(), name='order_api_list'),
+    path('api/orders/status/', views.order_status_batch_api_view, name='order_status_batch_api'),
+    path('api/orders/<int:order_id>/status/', views.update_order_status_api_view, name='order_status_api'),
+    path('api/reports/', views.report_jobs_api_view, name='report_jobs_api'),
+    path('api/reports/<int:job_id>/', views.report_job_api_view, name='report_job_api'),
+    path('api/reports/<int:job_id>/download/', views.report_job_download_api_view, name='report_job_download'),
     path('api/dashboard/', views.dashboard_api_view, name='dashboard_api'),
     
     # Add these new dashboard API endpoints
@@ -0,0 +1,143 @@
+"""
+Request user context for the store and supplier applications.
+
+Nearly every page needs the user's role, and supplier pages their supplier.
+Loaded lazily, the user, its UserProfile, its SupplierProfile and the
+supplier each cost a query. UserContextBackend loads all four in the single
+query that authenticates the session, CustomUserBackend in the single query
+that finds a user logging in, and UserContextMiddleware caches the role and
+supplier on the request, where middleware, decorators, views and templates
+read them without touching the database.
+
+API requests authenticated by ClaimsJWTAuthentication have a ClaimsTokenUser
+instead (see store.tokens), whose role and supplier id are token claims, so
+get_user_role and get_user_supplier_id read those without a query either.
+"""
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Value
+from rest_framework_simplejwt.models import TokenUser
+
+from .models import Supplier
+
+# Relations loaded together with the user
+USER_CONTEXT_RELATED = ('profile', 'supplier_profile__supplier')
+
+# Which half of the login lookup found a user
+USERNAME_MATCH = 0
+EMAIL_MATCH = 1
+
+
+def load_user_context(user_id):
+    """
+    Load a user with its profile, supplier profile and supplier.
+    
+    Args:
+        user_id: The user's primary key.
+    
+    Returns:
+        User: The user, or None if there is none. Missing profiles are
+        cached as missing, so accessing them raises without a query.
+    """
+    return User.objects.select_related(*USER_CONTEXT_RELATED).filter(pk=user_id).first()
+
+
+def load_login_user(identifier):
+    """
+    Load the user logging in with a username or an email, with its profiles.
+    
+    Both lookups run in one UNION query, each half on its own index, where
+    `username = %s OR email = %s` would have to scan auth_user.
+    
+    Args:
+        identifier (str): The username or email the user typed.
+    
+    Returns:
+        User: The user whose username matches, otherwise the only user whose
+        email matches, or None if there is no match or the email is shared.
+    """
+    related = User.objects.select_related(*USER_CONTEXT_RELATED)
+    users = list(
+        related.filter(username=identifier).annotate(matched_by=Value(USERNAME_MATCH))
+        .union(
+            related.filter(email=identifier).annotate(matched_by=Value(EMAIL_MATCH)),
+            all=True
+        )
+        .order_by('matched_by')[:3]
+    )
+    
+    if users and users[0].matched_by == USERNAME_MATCH:
+        return users[0]
+    return users[0] if len(users) == 1 else None
+
+
+def get_user_role(request):
+    """
+    Get the role of the request's user, cached on the request.
+    
+    Args:
+        request: The current HTTP request.
+    
+    Returns:
+        str: The user's role, or None if the user is anonymous or has no profile.
+    """
+    if not hasattr(request, 'user_role'):
+        role = None
+        if isinstance(request.user, TokenUser):
+            role = getattr(request.user, 'role', None)
+        elif request.user.is_authenticated:
+            try:
+                role = request.user.profile.role
+            except ObjectDoesNotExist:
+                pass
+        request.user_role = role
+    return request.user_role
+
+
+def get_user_supplier(request):
+    """
+    Get the supplier of the request's user, cached on the request.
+    
+    Args:
+        request: The current HTTP request.
+    
+    Returns:
+        Supplier: The supplier the user works for, or None. For a token
+        user the supplier is read by its id claim.
+    """
+    if not hasattr(request, 'supplier'):
+        supplier = None
+        if isinstance(request.user, TokenUser):
+            supplier_id = get_user_supplier_id(request)
+            if supplier_id is not None:
+                supplier = Supplier.objects.filter(pk=supplier_id).first()
+        elif request.user.is_authenticated:
+            try:
+                supplier = request.user.supplier_profile.supplier
+            except ObjectDoesNotExist:
+                pass
+        request.supplier = supplier
+    return request.supplier
+
+
+def get_user_supplier_id(request):
+    """
+    Get the id of the request's user's supplier, without loading the supplier.
+    
+    Args:
+        request: The current HTTP request.
+    
+    Returns:
+        int: The id of the supplier the user works for, or None.
+    """
+    if isinstance(request.user, TokenUser):
+        return getattr(request.user, 'supplier_id', None)
+    if hasattr(request, 'supplier'):
+        return request.supplier.pk if request.supplier is not None else None
+    if request.user.is_authenticated:
+        try:
+            return request.user.supplier_profile.supplier_id
+        except ObjectDoesNotExist:
+            pass
+    return None
@@ -5,20 +5,23 @@ This module contains helper functions and utilities for inventory management,
 order processing, and reporting functionality.
 """
 
-import csv
 import datetime
-from io import StringIO, BytesIO
-from django.db.models import Sum, Count, Q, F
+from django.db.models import Sum, Count, Q, F, Value, ExpressionWrapper, FloatField
+from django.db.models.functions import Coalesce, NullIf
 from django.utils import timezone
-from django.http import HttpResponse
 from django.template.loader import render_to_string
-import xlsxwriter
+from django.contrib.auth.models import User
+
+from restaurant_management.utils.cache import versioned_cache
+from restaurant_management.utils.export import (
+    EXPORT_CHUNK_SIZE, STREAMING_FORMATS, excel_export, streaming_export
+)
 
 from restaurant_management.utils.constants import (
     LOW_STOCK_WARNING_DAYS, EXPIRY_WARNING_DAYS,
     PDF_EXPORT, CSV_EXPORT, EXCEL_EXPORT
 )
-from .models import Inventory, Order, OrderItem, Transaction, Supplier
+from .models import Inventory, InventoryQuerySet, Order, Transaction, Supplier, UserProfile
 
 
 def get_low_stock_items():
@@ -28,7 +31,7 @@ def get_low_stock_items():
     Returns:
         QuerySet: All inventory items that need to be reordered.
     """
-    return Inventory.objects.filter(quantity__lte=F('reorder_level'))
+    return Inventory.objects.low_stock()
 
 
 def get_expiring_items(days=EXPIRY_WARNING_DAYS):
@@ -66,157 +69,289 @@ def get_expired_items():
     )
 
 
-def get_dashboard_stats(user=None):
+def get_inventory_summary(days=EXPIRY_WARNING_DAYS):
     """
-    Get statistics for dashboard display.
+    Get inventory totals and alert counts in a single aggregate query.
     
     Args:
-        user (User, optional): User to filter transactions by. Defaults to None.
+        days (int): Number of days threshold for expiry warning.
     
     Returns:
-        dict: Dictionary containing dashboard statistics.
+        dict: Item count, total quantity, and low-stock/expiring/expired counts.
     """
-    # Count inventory stats
-    total_inventory_items = Inventory.objects.count()
-    total_inventory_value = Inventory.objects.aggregate(
-        total_quantity=Sum('quantity')
-    )['total_quantity'] or 0
+    today = timezone.now().date()
+    expiry_threshold = today + datetime.timedelta(days=days)
     
-    low_stock_count = get_low_stock_items().count()
-    expiring_count = get_expiring_items().count()
-    expired_count = get_expired_items().count()
+    summary = Inventory.objects.aggregate(
+        total_inventory_items=Count('id'),
+        total_inventory_value=Sum('quantity'),
+        low_stock_count=Count('id', filter=InventoryQuerySet.LOW_STOCK),
+        expiring_count=Count('id', filter=Q(
+            expiry_date__isnull=False,
+            expiry_date__lte=expiry_threshold,
+            expiry_date__gte=today
+        )),
+        expired_count=Count('id', filter=Q(
+            expiry_date__isnull=False,
+            expiry_date__lt=today
+        )),
+    )
+    summary['total_inventory_value'] = summary['total_inventory_value'] or 0
     
-    # Count order stats
-    pending_orders = Order.objects.filter(status='pending').count()
-    shipped_orders = Order.objects.filter(status='shipped').count()
-    delivered_orders = Order.objects.filter(status='delivered').count()
+    return summary
+
+
+def get_order_status_counts(**filters):
+    """
+    Get order counts per status in a single aggregate query.
     
-    # Get transaction stats
-    transactions_today = Transaction.objects.filter(
-        created_at__date=timezone.now().date()
+    Args:
+        **filters: Optional lookups to narrow the orders (e.g. supplier=supplier).
+    
+    Returns:
+        dict: Total order count and one count per order status.
+    """
+    return Order.objects.filter(**filters).aggregate(
+        total_orders=Count('id'),
+        pending_orders=Count('id', filter=Q(status='pending')),
+        shipped_orders=Count('id', filter=Q(status='shipped')),
+        delivered_orders=Count('id', filter=Q(status='delivered')),
+        cancelled_orders=Count('id', filter=Q(status='cancelled')),
+    )
+
+
+def get_transaction_totals(user=None, date=None):
+    """
+    Get added and removed quantities for a day in a single aggregate query.
+    
+    Args:
+        user (User, optional): User to filter transactions by. Defaults to None.
+        date (date, optional): Day to total. Defaults to today.
+    
+    Returns:
+        dict: Quantities added and removed on the given day.
+    """
+    transactions = Transaction.objects.filter(
+        created_at__date=date or timezone.now().date()
     )
     
     if user:
-        transactions_today = transactions_today.filter(user__user=user)
+        transactions = transactions.filter(user__user=user)
     
-    added_today = transactions_today.filter(
-        transaction_type='added'
-    ).aggregate(total=Sum('quantity_used'))['total'] or 0
+    totals = transactions.aggregate(
+        added_today=Sum('quantity_used', filter=Q(transaction_type='added')),
+        removed_today=Sum('quantity_used', filter=Q(transaction_type='removed')),
+    )
     
-    removed_today = transactions_today.filter(
-        transaction_type='removed'
-    ).aggregate(total=Sum('quantity_used'))['total'] or 0
+    return {key: value or 0 for key, value in totals.items()}
+
+
+def get_inventory_by_category():
+    """
+    Get item counts and quantities grouped by category.
     
-    # Inventory by category
-    inventory_by_category = Inventory.objects.values('category').annotate(
+    Returns:
+        QuerySet: Lazy grouped queryset, evaluated only when rendered.
+    """
+    return Inventory.objects.values('category').annotate(
         total=Count('id'),
         total_quantity=Sum('quantity')
-    )
+    ).order_by('category')
+
+
+# Columns shown for each item on the stock report
+STOCK_REPORT_FIELDS = (
+    'id', 'sku', 'item_name', 'quantity', 'reorder_level', 'stock_gap',
+    'expiry_date', 'supplier__name'
+)
+
+
+def get_stock_report_categories():
+    """
+    Get the per-category totals of the stock report in one grouped query.
     
-    stats = {
-        'total_inventory_items': total_inventory_items,
-        'total_inventory_value': total_inventory_value,
-        'low_stock_count': low_stock_count,
-        'expiring_count': expiring_count,
-        'expired_count': expired_count,
-        'pending_orders': pending_orders,
-        'shipped_orders': shipped_orders,
-        'delivered_orders': delivered_orders,
-        'added_today': added_today,
-        'removed_today': removed_today,
-        'inventory_by_category': inventory_by_category,
-    }
+    Items with no category, NULL or blank, are grouped together under ''.
+    
+    Returns:
+        QuerySet: Lazy values() rows with category_name, item_count,
+        total_quantity, low_stock_count, expired_count and supplier_count,
+        ordered by category.
+    """
+    today = timezone.now().date()
+    
+    return Inventory.objects.values(
+        category_name=Coalesce('category', Value(''))
+    ).annotate(
+        item_count=Count('id'),
+        total_quantity=Sum('quantity'),
+        low_stock_count=Count('id', filter=InventoryQuerySet.LOW_STOCK),
+        expired_count=Count('id', filter=Q(expiry_date__lt=today)),
+        supplier_count=Count('supplier', distinct=True),
+    ).order_by('category_name')
+
+
+def get_category_stock(category):
+    """
+    Get the stock report rows of one category.
+    
+    The supplier name is joined in the same query, so no model instances
+    are built and no query is made per item.
+    
+    Args:
+        category (str): The category, or '' for uncategorized items.
+    
+    Returns:
+        QuerySet: Lazy values() rows with the STOCK_REPORT_FIELDS columns.
+    """
+    if category:
+        items = Inventory.objects.filter(category=category)
+    else:
+        items = Inventory.objects.filter(Q(category__isnull=True) | Q(category=''))
+    
+    return items.values(*STOCK_REPORT_FIELDS)
+
+
+def get_dashboard_stats(user=None):
+    """
+    Get statistics for dashboard display.
+    
+    The inventory, order and transaction figures are each computed with one
+    conditional-aggregation query, so the whole dict costs three queries
+    (plus one for the category breakdown if it is rendered).
+    
+    Args:
+        user (User, optional): User to filter transactions by. Defaults to None.
+    
+    Returns:
+        dict: Dictionary containing dashboard statistics.
+    """
+    stats = {}
+    stats.update(get_inventory_summary())
+    stats.update(get_order_status_counts())
+    stats.update(get_transaction_totals(user=user))
+    stats['inventory_by_category'] = get_inventory_by_category()
     
     return stats
 
 
+@versioned_cache('admin_dashboard', models=(Inventory, Order, Supplier, User))
+def get_admin_dashboard_payload():
+    """
+    Get the cached figures shown on the admin dashboard.
+    
+    Returns:
+        dict: Inventory summary, user count, recent orders and category breakdown.
+    """
+    payload = get_inventory_summary()
+    payload.update({
+        'total_users': User.objects.count(),
+        'recent_orders': list(
+            Order.objects.select_related('supplier').order_by('-order_date')[:5]
+        ),
+        'inventory_by_category': list(get_inventory_by_category()),
+    })
+    
+    return payload
+
+
+@versioned_cache('manager_dashboard', models=(Inventory, Order))
+def get_manager_dashboard_payload():
+    """
+    Get the cached figures shown on the manager dashboard and its API.
+    
+    Returns:
+        dict: Inventory summary and order status counts.
+    """
+    payload = get_inventory_summary()
+    payload.update(get_order_status_counts())
+    
+    return payload
+
+
+@versioned_cache('supplier_dashboard', models=(Order,))
+def get_supplier_dashboard_payload(supplier_id):
+    """
+    Get the cached order status counts for one supplier.
+    
+    Args:
+        supplier_id (int): The supplier to count orders for.
+    
+    Returns:
+        dict: Total order count and one count per order status.
+    """
+    return get_order_status_counts(supplier_id=supplier_id)
+
+
+@versioned_cache('system_dashboard', models=(User, Supplier, UserProfile))
+def get_system_dashboard_payload():
+    """
+    Get the cached user and supplier totals shown on the admin API dashboard.
+    
+    Returns:
+        dict: User, supplier and distinct role counts.
+    """
+    return {
+        'total_users': User.objects.count(),
+        'suppliers_count': Supplier.objects.count(),
+        'roles_count': UserProfile.objects.values('role').distinct().count(),
+    }
+
+
+INVENTORY_EXPORT_HEADERS = [
+    'ID', 'SKU', 'Item Name', 'Category', 'Quantity',
+    'Reorder Level', 'Expiry Date', 'Supplier', 'Last Updated'
+]
+
+
+def inventory_export_rows(inventory_items):
+    """
+    Map inventory items to export rows, fetching them in chunks.
+    
+    Args:
+        inventory_items (QuerySet): Inventory items with their supplier selected.
+    
+    Yields:
+        list: One row per item, in INVENTORY_EXPORT_HEADERS order.
+    """
+    for item in inventory_items.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [
+            item.id,
+            item.sku or '',
+            item.item_name,
+            item.category or '',
+            item.quantity,
+            item.reorder_level,
+            item.expiry_date.strftime('%Y-%m-%d') if item.expiry_date else '',
+            item.supplier.name if item.supplier else '',
+            item.last_updated.strftime('%Y-%m-%d %H:%M:%S')
+        ]
+
+
 def export_inventory_report(format_type=CSV_EXPORT):
     """
     Export inventory data in the specified format.
     
+    CSV and JSON Lines exports are streamed.
+    
     Args:
-        format_type (str): The format to export to (pdf, csv, excel).
+        format_type (str): The format to export to (pdf, csv, excel, jsonl).
     
     Returns:
         HttpResponse: Response containing the exported data.
     """
-    inventory_items = Inventory.objects.select_related('supplier').all()
-    
-    if format_type == CSV_EXPORT:
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="inventory_report.csv"'
-        
-        writer = csv.writer(response)
-        writer.writerow(['ID', 'SKU', 'Item Name', 'Category', 'Quantity', 
-                        'Reorder Level', 'Expiry Date', 'Supplier', 'Last Updated'])
-        
-        for item in inventory_items:
-            writer.writerow([
-                item.id,
-                item.sku or '',
-                item.item_name,
-                item.category or '',
-                item.quantity,
-                item.reorder_level,
-                item.expiry_date.strftime('%Y-%m-%d') if item.expiry_date else '',
-                item.supplier.name if item.supplier else '',
-                item.last_updated.strftime('%Y-%m-%d %H:%M:%S')
-            ])
-        
-        return response
+    inventory_items = Inventory.objects.select_related('supplier').order_by('id')
+    
+    if format_type in STREAMING_FORMATS:
+        return streaming_export(
+            'inventory_report', INVENTORY_EXPORT_HEADERS,
+            inventory_export_rows(inventory_items), format_type
+        )
     
     elif format_type == EXCEL_EXPORT:
-        output = BytesIO()
-        workbook = xlsxwriter.Workbook(output)
-        worksheet = workbook.add_worksheet()
-        
-        # Add header row
-        headers = ['ID', 'SKU', 'Item Name', 'Category', 'Quantity', 
-                  'Reorder Level', 'Expiry Date', 'Supplier', 'Last Updated']
-        
-        header_format = workbook.add_format({
-            'bold': True,
-            'bg_color': '#f0f0f0',
-            'border': 1
-        })
-        
-        for col_num, header in enumerate(headers):
-            worksheet.write(0, col_num, header, header_format)
-        
-        # Add data rows
-        row_num = 1
-        for item in inventory_items:
-            worksheet.write(row_num, 0, item.id)
-            worksheet.write(row_num, 1, item.sku or '')
-            worksheet.write(row_num, 2, item.item_name)
-            worksheet.write(row_num, 3, item.category or '')
-            worksheet.write(row_num, 4, item.quantity)
-            worksheet.write(row_num, 5, item.reorder_level)
-            
-            if item.expiry_date:
-                worksheet.write(row_num, 6, item.expiry_date.strftime('%Y-%m-%d'))
-            else:
-                worksheet.write(row_num, 6, '')
-            
-            worksheet.write(row_num, 7, item.supplier.name if item.supplier else '')
-            worksheet.write(row_num, 8, item.last_updated.strftime('%Y-%m-%d %H:%M:%S'))
-            
-            row_num += 1
-        
-        # Adjust column widths
-        for col_num, header in enumerate(headers):
-            worksheet.set_column(col_num, col_num, len(header) + 5)
-        
-        workbook.close()
-        output.seek(0)
-        
-        response = HttpResponse(
-            output.read(),
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        return excel_export(
+            'inventory_report', INVENTORY_EXPORT_HEADERS,
+            inventory_export_rows(inventory_items)
         )
-        response['Content-Disposition'] = 'attachment; filename="inventory_report.xlsx"'
-        
-        return response
     
     # PDF export implementation using WeasyPrint or another PDF generation library
     # would go here if implemented
@@ -225,14 +360,70 @@ def export_inventory_report(format_type=CSV_EXPORT):
     return export_inventory_report(CSV_EXPORT)
 
 
+ORDER_EXPORT_HEADERS = [
+    'Order ID', 'Supplier', 'Status', 'Order Date',
+    'Expected Delivery', 'Items Count', 'Total Items'
+]
+
+
+def order_export_row(order, include_supplier=True, datetime_format='%Y-%m-%d %H:%M:%S',
+                     no_expected_delivery=''):
+    """
+    Build the export row for an order.
+    
+    Args:
+        order (Order): The order.
+        include_supplier (bool, optional): Include the supplier name column.
+            Defaults to True.
+        datetime_format (str, optional): strftime format for the order date.
+        no_expected_delivery (str, optional): Cell value when the order has no
+            expected delivery date. Defaults to ''.
+    
+    Returns:
+        list: Order ID, [supplier,] status, order date, expected delivery,
+        items count and total quantity.
+    """
+    row = [order.id]
+    if include_supplier:
+        row.append(order.supplier.name)
+    row += [
+        order.status,
+        order.order_date.strftime(datetime_format),
+        order.expected_delivery.strftime('%Y-%m-%d') if order.expected_delivery else no_expected_delivery,
+        order.items_count,
+        order.total_quantity
+    ]
+    return row
+
+
+def order_export_rows(orders, **row_options):
+    """
+    Map orders to export rows, fetching them in chunks.
+    
+    Item counts and quantities are stored on the orders, so the export runs
+    one query per chunk however many orders and items there are.
+    
+    Args:
+        orders (QuerySet): The orders to export.
+        **row_options: Column options passed to order_export_row.
+    
+    Yields:
+        list: One row per order; see order_export_row.
+    """
+    for order in orders.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield order_export_row(order, **row_options)
+
+
 def export_order_report(start_date, end_date, format_type=CSV_EXPORT):
     """
     Export order data for a date range in the specified format.
     
+    CSV and JSON Lines exports are streamed.
+    
     Args:
         start_date (date): Start date for report period.
         end_date (date): End date for report period.
-        format_type (str): The format to export to (pdf, csv, excel).
+        format_type (str): The format to export to (pdf, csv, excel, jsonl).
     
     Returns:
         HttpResponse: Response containing the exported data.
@@ -240,107 +431,57 @@ def export_order_report(start_date, end_date, format_type=CSV_EXPORT):
     orders = Order.objects.filter(
         order_date__date__gte=start_date,
         order_date__date__lte=end_date
-    ).select_related('supplier')
-    
-    if format_type == CSV_EXPORT:
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="order_report_{start_date}_{end_date}.csv"'
-        
-        writer = csv.writer(response)
-        writer.writerow(['Order ID', 'Supplier', 'Status', 'Order Date', 
-                        'Expected Delivery', 'Items Count', 'Total Items'])
-        
-        for order in orders:
-            # Get order items info
-            items_count = OrderItem.objects.filter(order=order).count()
-            total_items = OrderItem.objects.filter(order=order).aggregate(
-                total=Sum('quantity_ordered')
-            )['total'] or 0
-            
-            writer.writerow([
-                order.id,
-                order.supplier.name,
-                order.status,
-                order.order_date.strftime('%Y-%m-%d %H:%M:%S'),
-                order.expected_delivery.strftime('%Y-%m-%d') if order.expected_delivery else '',
-                items_count,
-                total_items
-            ])
-        
-        return response
+    ).select_related('supplier').order_by('order_date', 'id')
+    
+    if format_type in STREAMING_FORMATS:
+        return streaming_export(
+            f'order_report_{start_date}_{end_date}', ORDER_EXPORT_HEADERS,
+            order_export_rows(orders), format_type
+        )
     
     elif format_type == EXCEL_EXPORT:
-        output = BytesIO()
-        workbook = xlsxwriter.Workbook(output)
-        worksheet = workbook.add_worksheet()
-        
-        # Add header row
-        headers = ['Order ID', 'Supplier', 'Status', 'Order Date', 
-                  'Expected Delivery', 'Items Count', 'Total Items']
-        
-        header_format = workbook.add_format({
-            'bold': True,
-            'bg_color': '#f0f0f0',
-            'border': 1
-        })
-        
-        for col_num, header in enumerate(headers):
-            worksheet.write(0, col_num, header, header_format)
-        
-        # Add data rows
-        row_num = 1
-        for order in orders:
-            # Get order items info
-            items_count = OrderItem.objects.filter(order=order).count()
-            total_items = OrderItem.objects.filter(order=order).aggregate(
-                total=Sum('quantity_ordered')
-            )['total'] or 0
-            
-            worksheet.write(row_num, 0, order.id)
-            worksheet.write(row_num, 1, order.supplier.name)
-            worksheet.write(row_num, 2, order.status)
-            worksheet.write(row_num, 3, order.order_date.strftime('%Y-%m-%d %H:%M:%S'))
-            
-            if order.expected_delivery:
-                worksheet.write(row_num, 4, order.expected_delivery.strftime('%Y-%m-%d'))
-            else:
-                worksheet.write(row_num, 4, '')
-            
-            worksheet.write(row_num, 5, items_count)
-            worksheet.write(row_num, 6, total_items)
-            
-            row_num += 1
-        
-        # Adjust column widths
-        for col_num, header in enumerate(headers):
-            worksheet.set_column(col_num, col_num, len(header) + 5)
-        
-        workbook.close()
-        output.seek(0)
-        
-        response = HttpResponse(
-            output.read(),
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        return excel_export(
+            f'order_report_{start_date}_{end_date}', ORDER_EXPORT_HEADERS,
+            order_export_rows(orders)
         )
-        response['Content-Disposition'] = f'attachment; filename="order_report_{start_date}_{end_date}.xlsx"'
-        
-        return response
     
     # Default to CSV if format not recognized
     return export_order_report(start_date, end_date, CSV_EXPORT)
 
 
-def get_supplier_performance_stats(supplier_id=None, period_start=None, period_end=None):
+# Orderings offered by the supplier performance report
+SUPPLIER_PERFORMANCE_ORDERING = {
+    'on_time': ('-on_time_percentage', '-delivered_orders', 'name', 'id'),
+    'on_time_asc': ('on_time_percentage', '-delivered_orders', 'name', 'id'),
+    'orders': ('-total_orders', 'name', 'id'),
+    'name': ('name', 'id'),
+}
+
+
+def get_supplier_performance_stats(supplier_id=None, period_start=None, period_end=None,
+                                   ordering='on_time', all_time=False):
     """
-    Calculate performance statistics for suppliers.
+    Calculate performance statistics for every supplier in one query.
+    
+    Orders placed in the period are counted per supplier with conditional
+    aggregates over a LEFT JOIN, so suppliers without orders are included
+    with zero counts. A delivered order is late when it has an expected
+    delivery date and a delivery notification dated after it; every other
+    delivered order counts as on time, as in the supplier report.
     
     Args:
         supplier_id (int, optional): Filter by specific supplier ID. Defaults to None.
-        period_start (date, optional): Start date for period. Defaults to None.
-        period_end (date, optional): End date for period. Defaults to None.
+        period_start (date, optional): Start date for period. Defaults to 90 days ago.
+        period_end (date, optional): End date for period. Defaults to today.
+        ordering (str, optional): A key of SUPPLIER_PERFORMANCE_ORDERING.
+            Defaults to 'on_time', the best on-time percentage first.
+        all_time (bool, optional): Count every order, ignoring the period.
+            Defaults to False.
     
     Returns:
-        list: List of dictionaries containing supplier performance data.
+        QuerySet: Suppliers annotated with total_orders, delivered_orders,
+        late_deliveries, on_time_deliveries and on_time_percentage (of
+        delivered orders, 0 when there are none).
     """
     # Set default period if not specified
     if not period_start:
@@ -353,48 +494,29 @@ def get_supplier_performance_stats(supplier_id=None, period_start=None, period_e
     if supplier_id:
         suppliers_query = suppliers_query.filter(id=supplier_id)
     
-    suppliers = suppliers_query.annotate(
-        total_orders=Count(
-            'order',
-            filter=Q(
-                order__order_date__date__gte=period_start,
-                order__order_date__date__lte=period_end
-            )
-        ),
-        delivered_orders=Count(
-            'order',
-            filter=Q(
-                order__status='delivered',
-                order__order_date__date__gte=period_start,
-                order__order_date__date__lte=period_end
-            )
-        ),
-        on_time_deliveries=Count(
-            'order',
-            filter=Q(
-                order__status='delivered',
-                order__order_date__date__gte=period_start,
-                order__order_date__date__lte=period_end,
-                order__expected_delivery__gte=F('order__order_date__date')
-            )
+    if all_time:
+        in_period = Q(order__isnull=False)
+    else:
+        in_period = Q(
+            order__order_date__date__gte=period_start,
+            order__order_date__date__lte=period_end
         )
+    delivered = in_period & Q(order__status='delivered')
+    late = delivered & Q(
+        order__expected_delivery__isnull=False,
+        order__delivery_notification__delivery_date__gt=F('order__expected_delivery')
     )
     
-    performance_stats = []
-    
-    for supplier in suppliers:
-        on_time_percentage = 0
-        if supplier.delivered_orders > 0:
-            on_time_percentage = (supplier.on_time_deliveries / supplier.delivered_orders) * 100
-        
-        performance_stats.append({
-            'supplier': supplier,
-            'total_orders': supplier.total_orders,
-            'delivered_orders': supplier.delivered_orders,
-            'on_time_deliveries': supplier.on_time_deliveries,
-            'on_time_percentage': on_time_percentage,
-            'period_start': period_start,
-            'period_end': period_end,
-        })
-    
-    return performance_stats
\ No newline at end of file
+    return suppliers_query.annotate(
+        total_orders=Count('order', filter=in_period),
+        delivered_orders=Count('order', filter=delivered),
+        late_deliveries=Count('order', filter=late),
+        on_time_deliveries=F('delivered_orders') - F('late_deliveries'),
+        on_time_percentage=Coalesce(
+            ExpressionWrapper(
+                Value(100.0) * F('on_time_deliveries') / NullIf('delivered_orders', 0),
+                output_field=FloatField()
+            ),
+            Value(0.0)
+        ),
+    ).order_by(*SUPPLIER_PERFORMANCE_ORDERING[ordering])
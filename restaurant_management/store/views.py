@@ -1,9 +1,10 @@
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.permissions import IsAuthenticated
-from datetime import datetime, timedelta
-import uuid
-from django.conf import settings
-import jwt
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.permissions import AllowAny
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
 
 from rest_framework import permissions
 from rest_framework.views import APIView
@@ -24,25 +25,47 @@ from django.contrib.auth import login, authenticate
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.db.models import Sum, Count, F, Q
-from django.http import HttpResponseRedirect, JsonResponse
+from django.db.models import Q
+from django.http import FileResponse, Http404, HttpResponseRedirect, JsonResponse
 from django.urls import reverse
 from django.utils import timezone
 from django.views.decorators.http import require_POST
-from django.core.paginator import Paginator
 from django.db import transaction as db_transaction
 
-from .models import UserProfile, Inventory, Order, OrderItem, Transaction, Supplier
+from .models import UserProfile, Inventory, Order, OrderItem, Transaction, Supplier, ReportJob
 from .forms import (
     UserRegistrationForm, CustomAuthenticationForm, InventoryForm,
     TransactionForm, OrderForm, OrderItemForm, OrderUpdateForm,
     DateRangeForm, UserProfileForm
 )
 from .decorators import role_required
+from .search import search_inventory, SEARCH_ORDERING
+from .stock import apply_stock_movement, apply_stock_movements, InsufficientStock
+from .importer import import_inventory, guess_format, IMPORT_FORMATS
+from .report_jobs import submit_report
+from .order_status import transition_order, bulk_transition_orders, InvalidTransition, TRANSITIONED
+from .authentication import ClaimsJWTAuthentication
+from .permissions import IsAdmin, IsAdminOrManager, IsStoreUser, IsSupplier
+from .tokens import ROLE_CLAIM, issue_tokens, refresh_access_token, revoke_token
+from .user_context import get_user_supplier_id
+from restaurant_management.utils.constants import ORDER_REPORT, STOCK_REPORT, STOCK_REPORT_PAGE_SIZE
+from restaurant_management.utils.export import EXPORT_FILE_TYPES
+from restaurant_management.utils.pagination import paginate_queryset, keyset_links
+from .utils import (
+    get_low_stock_items, get_admin_dashboard_payload, get_manager_dashboard_payload,
+    get_supplier_dashboard_payload, get_system_dashboard_payload,
+    get_stock_report_categories, get_category_stock,
+    get_supplier_performance_stats, SUPPLIER_PERFORMANCE_ORDERING
+)
 
 # Django REST Framework imports for API views
 from rest_framework import generics, permissions
-from .serializers import InventorySerializer
+from .serializers import (
+    InventorySerializer, OrderSerializer, OrderSummarySerializer, StockMovementSerializer,
+    StockMovementBatchSerializer, ReportJobRequestSerializer, ReportJobSerializer,
+    OrderStatusUpdateSerializer, OrderStatusBatchSerializer
+)
+from restaurant_management.utils.pagination import KeysetPagination
 
 
 def landing_page(request):
@@ -106,28 +129,16 @@ def admin_dashboard(request):
     """
     Dashboard view for admin users.
     """
-    # Get summary statistics
-    total_inventory_items = Inventory.objects.count()
-    low_stock_items = Inventory.objects.filter(quantity__lte=F('reorder_level')).count()
-    expired_items = Inventory.objects.filter(expiry_date__lt=timezone.now().date()).count()
-    total_users = User.objects.count()
-    
-    # Get recent orders
-    recent_orders = Order.objects.select_related('supplier').order_by('-order_date')[:5]
-    
-    # Get inventory by category
-    inventory_by_category = Inventory.objects.values('category').annotate(
-        total=Count('id'),
-        total_quantity=Sum('quantity')
-    )
+    # Get summary statistics, recent orders and inventory by category
+    payload = get_admin_dashboard_payload()
     
     context = {
-        'total_inventory_items': total_inventory_items,
-        'low_stock_items': low_stock_items,
-        'expired_items': expired_items,
-        'total_users': total_users,
-        'recent_orders': recent_orders,
-        'inventory_by_category': inventory_by_category,
+        'total_inventory_items': payload['total_inventory_items'],
+        'low_stock_items': payload['low_stock_count'],
+        'expired_items': payload['expired_count'],
+        'total_users': payload['total_users'],
+        'recent_orders': payload['recent_orders'],
+        'inventory_by_category': payload['inventory_by_category'],
     }
     
     return render(request, 'store/admin_dashboard.html', context)
@@ -140,9 +151,7 @@ def manager_dashboard(request):
     Dashboard view for manager users.
     """
     # Get summary statistics
-    total_inventory_items = Inventory.objects.count()
-    low_stock_items = Inventory.objects.filter(quantity__lte=F('reorder_level'))
-    pending_orders = Order.objects.filter(status='pending').count()
+    payload = get_manager_dashboard_payload()
     
     # Get recent transactions
     recent_transactions = Transaction.objects.select_related(
@@ -150,9 +159,10 @@ def manager_dashboard(request):
     ).order_by('-created_at')[:10]
     
     context = {
-        'total_inventory_items': total_inventory_items,
-        'low_stock_items': low_stock_items,
-        'pending_orders': pending_orders,
+        'total_inventory_items': payload['total_inventory_items'],
+        'low_stock_count': payload['low_stock_count'],
+        'low_stock_items': get_low_stock_items(),
+        'pending_orders': payload['pending_orders'],
         'recent_transactions': recent_transactions,
     }
     
@@ -166,7 +176,7 @@ def staff_dashboard(request):
     Dashboard view for staff users.
     """
     # Get summary statistics
-    low_stock_items = Inventory.objects.filter(quantity__lte=F('reorder_level'))
+    low_stock_items = get_low_stock_items()
     
     # Get recent transactions by this user
     recent_transactions = Transaction.objects.filter(
@@ -197,21 +207,20 @@ def inventory_list(request):
     if category:
         inventory_items = inventory_items.filter(category=category)
     
-    if search:
-        inventory_items = inventory_items.filter(
-            Q(item_name__icontains=search) | Q(sku__icontains=search)
-        )
-    
     if low_stock:
-        inventory_items = inventory_items.filter(quantity__lte=F('reorder_level'))
+        inventory_items = inventory_items.low_stock()
+    
+    # Search last so the index lookup is combined with the other filters
+    ordering = ('item_name', 'id')
+    if search:
+        inventory_items = search_inventory(inventory_items, search)
+        ordering = SEARCH_ORDERING
     
     # Get unique categories for filter dropdown
     categories = Inventory.objects.values_list('category', flat=True).distinct()
     
-    # Pagination
-    paginator = Paginator(inventory_items, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Pagination (?pagination=keyset switches to cursor pages)
+    page_obj = paginate_queryset(request, inventory_items, ordering, 10)
     
     context = {
         'page_obj': page_obj,
@@ -219,6 +228,7 @@ def inventory_list(request):
         'category': category,
         'search': search,
         'low_stock': low_stock,
+        **keyset_links(request, page_obj),
     }
     
     return render(request, 'store/inventory/view_stock.html', context)
@@ -233,15 +243,16 @@ def add_inventory(request):
     if request.method == 'POST':
         form = InventoryForm(request.POST)
         if form.is_valid():
-            inventory_item = form.save()
-            
-            # Record transaction
-            Transaction.objects.create(
-                inventory=inventory_item,
-                user=request.user.profile,
-                quantity_used=inventory_item.quantity,
-                transaction_type='added'
-            )
+            with db_transaction.atomic():
+                inventory_item = form.save()
+                
+                # Record transaction
+                Transaction.objects.create(
+                    inventory=inventory_item,
+                    user=request.user.profile,
+                    quantity_used=inventory_item.quantity,
+                    transaction_type='added'
+                )
             
             messages.success(request, 'Inventory item added successfully!')
             return redirect('store:inventory_list')
@@ -263,20 +274,21 @@ def edit_inventory(request, pk):
     if request.method == 'POST':
         form = InventoryForm(request.POST, instance=inventory_item)
         if form.is_valid():
-            inventory_item = form.save()
-            new_quantity = inventory_item.quantity
-            
-            # Record transaction if quantity changed
-            if new_quantity != old_quantity:
-                transaction_type = 'added' if new_quantity > old_quantity else 'removed'
-                quantity_diff = abs(new_quantity - old_quantity)
+            with db_transaction.atomic():
+                inventory_item = form.save()
+                new_quantity = inventory_item.quantity
                 
-                Transaction.objects.create(
-                    inventory=inventory_item,
-                    user=request.user.profile,
-                    quantity_used=quantity_diff,
-                    transaction_type=transaction_type
-                )
+                # Record transaction if quantity changed
+                if new_quantity != old_quantity:
+                    transaction_type = 'added' if new_quantity > old_quantity else 'removed'
+                    quantity_diff = abs(new_quantity - old_quantity)
+                    
+                    Transaction.objects.create(
+                        inventory=inventory_item,
+                        user=request.user.profile,
+                        quantity_used=quantity_diff,
+                        transaction_type=transaction_type
+                    )
             
             messages.success(request, 'Inventory item updated successfully!')
             return redirect('store:inventory_list')
@@ -298,28 +310,17 @@ def inventory_transaction(request):
     if request.method == 'POST':
         form = TransactionForm(request.POST)
         if form.is_valid():
-            transaction = form.save(commit=False)
-            transaction.user = request.user.profile
-            
-            inventory_item = transaction.inventory
-            old_quantity = inventory_item.quantity
-            
-            # Update inventory quantity based on transaction type
-            if transaction.transaction_type == 'added':
-                inventory_item.quantity += transaction.quantity_used
-            elif transaction.transaction_type == 'removed':
-                if inventory_item.quantity < transaction.quantity_used:
-                    messages.error(request, 'Insufficient inventory!')
-                    return render(request, 'store/inventory/transaction.html', {'form': form})
-                inventory_item.quantity -= transaction.quantity_used
-            elif transaction.transaction_type == 'adjusted':
-                inventory_item.quantity = transaction.quantity_used
-                transaction.quantity_used = abs(old_quantity - transaction.quantity_used)
-            
-            # Save inventory and transaction
-            with db_transaction.atomic():
-                inventory_item.save()
-                transaction.save()
+            # Applied in the database so concurrent movements cannot be lost
+            try:
+                apply_stock_movement(
+                    form.cleaned_data['inventory'],
+                    form.cleaned_data['transaction_type'],
+                    form.cleaned_data['quantity_used'],
+                    request.user.profile
+                )
+            except InsufficientStock:
+                messages.error(request, 'Insufficient inventory!')
+                return render(request, 'store/inventory/transaction.html', {'form': form})
             
             messages.success(request, 'Transaction recorded successfully!')
             return redirect('store:inventory_list')
@@ -335,9 +336,7 @@ def low_stock_alerts(request):
     """
     View to display items that are below their reorder level.
     """
-    low_stock_items = Inventory.objects.filter(
-        quantity__lte=F('reorder_level')
-    ).select_related('supplier')
+    low_stock_items = Inventory.objects.low_stock().select_related('supplier')
     
     return render(request, 'store/inventory/low_stock_alerts.html', {
         'low_stock_items': low_stock_items
@@ -391,16 +390,15 @@ def order_list(request):
     # Get suppliers for filter dropdown
     suppliers = Supplier.objects.all()
     
-    # Pagination
-    paginator = Paginator(orders.order_by('-order_date'), 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Pagination (?pagination=keyset switches to cursor pages)
+    page_obj = paginate_queryset(request, orders, ('-order_date', '-id'), 10)
     
     context = {
         'page_obj': page_obj,
         'suppliers': suppliers,
         'status': status,
         'supplier_id': supplier_id,
+        **keyset_links(request, page_obj),
     }
     
     return render(request, 'store/orders/order_list.html', context)
@@ -437,7 +435,8 @@ def add_order_items(request, order_id):
         if form.is_valid():
             order_item = form.save(commit=False)
             order_item.order = order
-            order_item.save()
+            with db_transaction.atomic():
+                order_item.save()
             
             messages.success(request, 'Item added to order successfully!')
             return redirect('store:add_order_items', order_id=order.id)
@@ -538,18 +537,36 @@ def edit_user(request, user_id):
 def stock_report(request):
     """
     View to generate a stock report.
+    
+    With ?export=<format>, the report file is generated in the background
+    and the user is sent to the job's status page.
     """
-    # Get all inventory items grouped by category
-    inventory_by_category = {}
+    export_format = request.GET.get('export')
+    if export_format in EXPORT_FILE_TYPES:
+        job = submit_report(STOCK_REPORT, export_format, request.user.profile)
+        return redirect('store:report_job', job_id=job.id)
     
-    for item in Inventory.objects.all():
-        category = item.category or 'Uncategorized'
-        if category not in inventory_by_category:
-            inventory_by_category[category] = []
-        inventory_by_category[category].append(item)
+    # Per-category totals come from one grouped query; only the category
+    # being viewed (?category=, '' for uncategorized) has its items loaded
+    categories = list(get_stock_report_categories())
+    totals = {
+        field: sum(row[field] for row in categories)
+        for field in ('item_count', 'total_quantity', 'low_stock_count', 'expired_count')
+    }
+    
+    category = request.GET.get('category')
+    page_obj = None
+    if category is not None:
+        page_obj = paginate_queryset(
+            request, get_category_stock(category), ('item_name', 'id'), STOCK_REPORT_PAGE_SIZE
+        )
     
     return render(request, 'store/reports/stock_report.html', {
-        'inventory_by_category': inventory_by_category
+        'categories': categories,
+        'totals': totals,
+        'category': category,
+        'page_obj': page_obj,
+        **(keyset_links(request, page_obj) if page_obj is not None else {}),
     })
 
 
@@ -558,6 +575,9 @@ def stock_report(request):
 def order_summary(request):
     """
     View to generate an order summary report.
+    
+    Posting an export_format generates the report file for the date range
+    in the background and sends the user to the job's status page.
     """
     if request.method == 'POST':
         form = DateRangeForm(request.POST)
@@ -565,6 +585,13 @@ def order_summary(request):
             start_date = form.cleaned_data['start_date']
             end_date = form.cleaned_data['end_date']
             
+            export_format = request.POST.get('export_format')
+            if export_format in EXPORT_FILE_TYPES:
+                job = submit_report(
+                    ORDER_REPORT, export_format, request.user.profile, start_date, end_date
+                )
+                return redirect('store:report_job', job_id=job.id)
+            
             orders = Order.objects.filter(
                 order_date__gte=start_date,
                 order_date__lte=end_date
@@ -584,37 +611,54 @@ def order_summary(request):
     return render(request, 'store/reports/order_summary.html', {'form': form})
 
 
+@login_required
+@role_required(['admin', 'manager'])
+def report_job(request, job_id):
+    """
+    View to follow a background report job and download its file.
+    
+    The page refreshes itself until the job has finished.
+    """
+    job = get_object_or_404(ReportJob, pk=job_id)
+    
+    return render(request, 'store/reports/report_job.html', {
+        'job': job,
+        'refresh_seconds': 3,
+    })
+
+
 @login_required
 @role_required(['admin', 'manager'])
 def supplier_performance(request):
     """
     View to generate a supplier performance report.
-    """
-    suppliers = Supplier.objects.all()
-    supplier_stats = []
-    
-    for supplier in suppliers:
-        total_orders = Order.objects.filter(supplier=supplier).count()
-        delivered_on_time = Order.objects.filter(
-            supplier=supplier,
-            status='delivered',
-            expected_delivery__gte=F('order_date')
-        ).count()
-        
-        if total_orders > 0:
-            on_time_percentage = (delivered_on_time / total_orders) * 100
-        else:
-            on_time_percentage = 0
-        
-        supplier_stats.append({
-            'supplier': supplier,
-            'total_orders': total_orders,
-            'delivered_on_time': delivered_on_time,
-            'on_time_percentage': on_time_percentage,
-        })
+    
+    Accepts start_date and end_date (without them, or if they are not valid,
+    every order is counted) and sort, one of SUPPLIER_PERFORMANCE_ORDERING,
+    as query parameters. The report is a single query whatever the number of
+    suppliers.
+    """
+    filtered = 'start_date' in request.GET or 'end_date' in request.GET
+    form = DateRangeForm(request.GET if filtered else None)
+    period_start = period_end = None
+    if filtered and form.is_valid():
+        period_start = form.cleaned_data['start_date']
+        period_end = form.cleaned_data['end_date']
+    
+    sort = request.GET.get('sort', 'on_time')
+    if sort not in SUPPLIER_PERFORMANCE_ORDERING:
+        sort = 'on_time'
+    
+    supplier_stats = get_supplier_performance_stats(
+        period_start=period_start, period_end=period_end, ordering=sort,
+        all_time=period_start is None
+    )
     
     return render(request, 'store/reports/supplier_performance.html', {
-        'supplier_stats': supplier_stats
+        'supplier_stats': supplier_stats,
+        'form': form,
+        'sort': sort,
+        'sort_options': SUPPLIER_PERFORMANCE_ORDERING,
     })
 
 
@@ -642,12 +686,276 @@ class InventoryListCreateAPIView(generics.ListCreateAPIView):
     queryset = Inventory.objects.all()
     serializer_class = InventorySerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    
+    @property
+    def keyset_ordering(self):
+        if self.request.query_params.get('search'):
+            return SEARCH_ORDERING
+        return ('item_name', 'id')
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        search = self.request.query_params.get('search', '')
+        if search:
+            queryset = search_inventory(queryset, search)
+        return queryset.order_by(*self.keyset_ordering)
 
 class InventoryRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Inventory.objects.all()
     serializer_class = InventorySerializer
     permission_classes = [permissions.IsAuthenticated]
 
+class OrderListAPIView(generics.ListAPIView):
+    """
+    API view to list orders, newest first.
+    
+    ?summary=1 leaves out each order's items, so the page is read from the
+    orders table alone; item counts and quantities are stored on the orders.
+    """
+    queryset = Order.objects.select_related('supplier')
+    serializer_class = OrderSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-order_date', '-id')
+
+    def is_summary(self):
+        return self.request.query_params.get('summary') in ('1', 'true')
+    
+    def get_serializer_class(self):
+        return OrderSummarySerializer if self.is_summary() else OrderSerializer
+    
+    def get_queryset(self):
+        queryset = super().get_queryset().order_by(*self.keyset_ordering)
+        if not self.is_summary():
+            queryset = queryset.prefetch_related('items__inventory')
+        status = self.request.query_params.get('status')
+        if status:
+            queryset = queryset.filter(status=status)
+        return queryset
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def inventory_stock_api_view(request, pk):
+    """
+    API view to add, remove or adjust the stock of an inventory item.
+    
+    Applied through the stock service, so concurrent requests for the same
+    item never lose an update. Returns 409 if a removal exceeds the stock.
+    """
+    profile = getattr(request.user, 'profile', None)
+    if profile is None or profile.role not in ('admin', 'manager', 'staff'):
+        return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+    
+    serializer = StockMovementSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    
+    try:
+        change = apply_stock_movement(
+            pk,
+            serializer.validated_data['transaction_type'],
+            serializer.validated_data['quantity'],
+            profile
+        )
+    except Inventory.DoesNotExist:
+        return Response({'error': 'Inventory item not found'}, status=status.HTTP_404_NOT_FOUND)
+    except InsufficientStock:
+        return Response({'error': 'Insufficient inventory'}, status=status.HTTP_409_CONFLICT)
+    
+    return Response({
+        'transaction_id': change.transaction.pk,
+        'inventory': pk,
+        'transaction_type': change.transaction.transaction_type,
+        'quantity_used': change.transaction.quantity_used,
+        'quantity': change.quantity,
+    }, status=status.HTTP_201_CREATED)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def inventory_stock_batch_api_view(request):
+    """
+    API view to apply many stock movements in one request.
+    
+    Expects {"lines": [{"inventory", "transaction_type", "quantity"}, ...]}
+    and an optional "all_or_nothing" flag. All lines are applied in a single
+    database transaction; the response has one result per line.
+    """
+    profile = getattr(request.user, 'profile', None)
+    if profile is None or profile.role not in ('admin', 'manager', 'staff'):
+        return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+    
+    serializer = StockMovementBatchSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    
+    results = apply_stock_movements(
+        serializer.validated_data['lines'],
+        profile,
+        all_or_nothing=serializer.validated_data['all_or_nothing']
+    )
+    applied = sum(1 for result in results if result['status'] == 'applied')
+    
+    return Response({
+        'applied': applied,
+        'failed': len(results) - applied,
+        'results': results,
+    })
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def inventory_import_api_view(request):
+    """
+    API view to import inventory items from an uploaded file.
+    
+    Expects a multipart "file" field holding CSV or JSON Lines and an
+    optional "format" field. The upload is streamed in chunks, so large
+    files are not read into memory. Returns the import report.
+    """
+    profile = getattr(request.user, 'profile', None)
+    if profile is None or profile.role not in ('admin', 'manager'):
+        return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+    
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({'error': 'No file uploaded'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    fmt = request.data.get('format') or guess_format(upload.name)
+    if fmt not in IMPORT_FORMATS:
+        return Response({'error': f'Unsupported format: {fmt}'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    report = import_inventory(upload.file, fmt, profile)
+    return Response(report)
+
+
+@api_view(['PATCH'])
+@permission_classes([permissions.IsAuthenticated])
+def update_order_status_api_view(request, order_id):
+    """
+    API view to change the status of an order.
+    
+    Expects {"status": ...}. Returns 400 if the order cannot make the change.
+    """
+    profile = getattr(request.user, 'profile', None)
+    if profile is None or profile.role not in ('admin', 'manager'):
+        return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+    
+    serializer = OrderStatusUpdateSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    
+    order = get_object_or_404(Order, pk=order_id)
+    previous_status = order.status
+    try:
+        transition_order(order, serializer.validated_data['status'])
+    except InvalidTransition as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'order': order.pk,
+        'previous_status': previous_status,
+        'status': order.status,
+    })
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def order_status_batch_api_view(request):
+    """
+    API view to change the status of many orders in one request.
+    
+    Expects {"order_ids": [...], "status": ...}. The allowed changes are
+    applied in a single database transaction; the response has one result
+    per order.
+    """
+    profile = getattr(request.user, 'profile', None)
+    if profile is None or profile.role not in ('admin', 'manager'):
+        return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+    
+    serializer = OrderStatusBatchSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    
+    results = bulk_transition_orders(
+        serializer.validated_data['order_ids'],
+        serializer.validated_data['status']
+    )
+    transitioned = sum(1 for result in results if result['status'] == TRANSITIONED)
+    
+    return Response({
+        'transitioned': transitioned,
+        'failed': len(results) - transitioned,
+        'results': results,
+    })
+
+
+def _can_run_reports(request):
+    profile = getattr(request.user, 'profile', None)
+    return profile is not None and profile.role in ('admin', 'manager')
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def report_jobs_api_view(request):
+    """
+    API view to request a report generated in the background.
+    
+    Expects "report_type", an optional "format" (csv, excel or jsonl),
+    "start_date", "end_date" and, for supplier reports, "by_month". Returns
+    the job: 200 if an up-to-date file already exists, otherwise 202 with
+    the URL to poll.
+    """
+    if not _can_run_reports(request):
+        return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+    
+    serializer = ReportJobRequestSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    options = dict(serializer.validated_data)
+    
+    job = submit_report(
+        options.pop('report_type'), options.pop('format'), request.user.profile, **options
+    )
+    
+    response_status = status.HTTP_200_OK if job.status == ReportJob.DONE else status.HTTP_202_ACCEPTED
+    return Response(ReportJobSerializer(job).data, status=response_status)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def report_job_api_view(request, job_id):
+    """
+    API view to poll a background report job.
+    """
+    if not _can_run_reports(request):
+        return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+    
+    job = get_object_or_404(ReportJob, pk=job_id)
+    return Response(ReportJobSerializer(job).data)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def report_job_download_api_view(request, job_id):
+    """
+    API view to download the file of a finished report job.
+    
+    The file is streamed from disk in blocks.
+    """
+    if not _can_run_reports(request):
+        return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+    
+    job = get_object_or_404(ReportJob, pk=job_id, status=ReportJob.DONE)
+    try:
+        report_file = open(job.file_path, 'rb')
+    except FileNotFoundError:
+        raise Http404("The report file has expired; request the report again.")
+    
+    return FileResponse(
+        report_file,
+        as_attachment=True,
+        filename=job.file_name,
+        content_type=EXPORT_FILE_TYPES[job.format_type][0]
+    )
+
 
 # API Login View
 from django.views.decorators.csrf import csrf_exempt
@@ -666,27 +974,10 @@ def api_login_view(request):
 
             user = authenticate(request, username=email, password=password)
             if user is not None:
-                try:
-                    user_profile = user.userprofile
-                    user_role = user_profile.role
-                except Exception:
-                    user_role = 'admin' if user.is_superuser else 'unknown'
-                
-                # Create a JWT token
-                payload = {
-                    'user_id': user.id,
-                    'email': user.email,
-                    'exp': datetime.utcnow() + timedelta(days=1),
-                    'iat': datetime.utcnow(),
-                    'jti': str(uuid.uuid4())
-                }
-                
-                # Using Django's SECRET_KEY to sign the token
-                token = jwt.encode(payload, settings.SECRET_KEY, algorithm='HS256')
-                
-                # Convert bytes to string if needed (PyJWT < 2.0)
-                if isinstance(token, bytes):
-                    token = token.decode('utf-8')
+                # The token carries the role and supplier as signed claims
+                refresh = issue_tokens(user)
+                token = str(refresh.access_token)
+                user_role = refresh[ROLE_CLAIM] or ('admin' if user.is_superuser else 'unknown')
                 
                 # Create user data to return
                 user_data = {
@@ -701,7 +992,7 @@ def api_login_view(request):
                     'message': 'Login successful',
                     'token': token,     # For Login.tsx
                     'access': token,    # For token storage service
-                    'refresh': token,   # For refresh token functionality 
+                    'refresh': str(refresh),   # For refresh token functionality 
                     'user': user_data,
                     'role': user_role
                 })
@@ -712,6 +1003,51 @@ def api_login_view(request):
     return JsonResponse({'message': 'Invalid request'}, status=405)
 
 
+
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def token_refresh_api_view(request):
+    """
+    API view issuing a new access token for a refresh token.
+    
+    The claims are read from the database again, so a changed role or
+    supplier reaches the API within one access token lifetime.
+    """
+    try:
+        refresh = RefreshToken(request.data.get('refresh', ''))
+    except TokenError as e:
+        return Response({'error': str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+    
+    access = refresh_access_token(refresh)
+    if access is None:
+        return Response({'error': 'Token has been revoked'}, status=status.HTTP_401_UNAUTHORIZED)
+    
+    return Response({'access': str(access), 'token': str(access)})
+
+
+@api_view(['POST'])
+@authentication_classes([ClaimsJWTAuthentication])
+@permission_classes([IsAuthenticated])
+def token_revoke_api_view(request):
+    """
+    API view revoking the request's access token and, if given, its refresh token.
+    """
+    revoke_token(request.auth)
+    
+    if request.data.get('refresh'):
+        try:
+            refresh = RefreshToken(request.data['refresh'])
+        except TokenError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if refresh[api_settings.USER_ID_CLAIM] != request.user.id:
+            return Response({'error': 'Refresh token belongs to another user'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        revoke_token(refresh)
+    
+    return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 # API Dashboard View
 
 from rest_framework.decorators import api_view, permission_classes
@@ -724,7 +1060,8 @@ from .models import UserProfile, Supplier
 # --- New Dashboard API Views ---
 
 @api_view(['GET'])
-@permission_classes([IsAuthenticated])
+@authentication_classes([ClaimsJWTAuthentication, SessionAuthentication])
+@permission_classes([IsAdmin])
 def dashboard_api_view(request):
     """
     Dashboard API view that uses standard DRF authentication.
@@ -732,13 +1069,11 @@ def dashboard_api_view(request):
     """
     print('[dashboard_api_view] User:', request.user)
     try:
-        total_users = User.objects.count()
-        suppliers_count = Supplier.objects.count()
-        roles_count = UserProfile.objects.values('role').distinct().count()
+        payload = get_system_dashboard_payload()
         response_data = {
-            'totalUsers': total_users,
-            'suppliers': suppliers_count,
-            'totalRoles': roles_count,
+            'totalUsers': payload['total_users'],
+            'suppliers': payload['suppliers_count'],
+            'totalRoles': payload['roles_count'],
             'systemUptimeDays': 7
         }
         print('[dashboard_api_view] Response:', response_data)
@@ -756,7 +1091,7 @@ def staff_dashboard_api_view(request):
     """
     print('[staff_dashboard_api_view] User:', request.user)
     try:
-        low_stock_count = Inventory.objects.filter(quantity__lte=F('reorder_level')).count()
+        low_stock_count = Inventory.objects.low_stock().count()
         if hasattr(request.user, 'userprofile'):
             user_transactions = Transaction.objects.filter(
                 user=request.user.userprofile
@@ -1197,29 +1532,6 @@ def supplier_orders_api_view(request):
         return Response({
             'error': str(e)
         }, status=500)
-
-@api_view(['PATCH'])
-@permission_classes([IsAuthenticated])
-def update_order_status(request, order_id):
-    """API view to update order status."""
-    try:
-        # Get the status from request data
-        status = request.data.get('status')
-        
-        if not status:
-            return Response({
-                'error': 'Status is required'
-            }, status=400)
-        
-        # Here you would update the real order in your database
-        # For now, we'll just return a success message
-        return Response({
-            'message': f'Order {order_id} status updated to {status}'
-        })
-    except Exception as e:
-        return Response({
-            'error': str(e)
-        }, status=500)
     
 # Add these to your store/views.py file
 
@@ -1321,7 +1633,6 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.http import JsonResponse
-from django.db.models import F, Count, Sum
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -1332,7 +1643,7 @@ def staff_dashboard_api_view(request):
     try:
         # Get low stock count
         try:
-            low_stock_count = Inventory.objects.filter(quantity__lte=F('reorder_level')).count()
+            low_stock_count = Inventory.objects.low_stock().count()
         except:
             low_stock_count = 7
         
@@ -1372,36 +1683,21 @@ def staff_dashboard_api_view(request):
         })
 
 @api_view(['GET'])
-@permission_classes([IsAuthenticated])
+@authentication_classes([ClaimsJWTAuthentication, SessionAuthentication])
+@permission_classes([IsAdminOrManager])
 def manager_dashboard_api_view(request):
     """
     API view for manager dashboard data.
     """
     try:
-        # Get actual data from your database
-        total_inventory = Inventory.objects.count()
-        
-        # Order statistics - use defaults if models don't have these statuses
-        try:
-            orders_delivered = Order.objects.filter(status='delivered').count()
-        except:
-            orders_delivered = 12
-            
-        try:
-            orders_pending = Order.objects.filter(status='pending').count()
-        except:
-            orders_pending = 5
-            
-        try:
-            orders_shipped = Order.objects.filter(status='shipped').count()
-        except:
-            orders_shipped = 8
+        # Get actual data from your database (cached until inventory or orders change)
+        payload = get_manager_dashboard_payload()
         
         return Response({
-            'totalInventory': total_inventory,
-            'ordersDelivered': orders_delivered,
-            'ordersPending': orders_pending,
-            'ordersShipped': orders_shipped
+            'totalInventory': payload['total_inventory_items'],
+            'ordersDelivered': payload['delivered_orders'],
+            'ordersPending': payload['pending_orders'],
+            'ordersShipped': payload['shipped_orders']
         })
     except Exception as e:
         print(f"Manager Dashboard API error: {str(e)}")
@@ -1414,57 +1710,21 @@ def manager_dashboard_api_view(request):
         })
 
 @api_view(['GET'])
-@permission_classes([IsAuthenticated])
+@authentication_classes([ClaimsJWTAuthentication, SessionAuthentication])
+@permission_classes([IsSupplier])
 def supplier_dashboard_api_view(request):
     """
     API view for supplier dashboard data.
     """
     try:
-        # Try to find the supplier associated with the user
-        supplier_id = None
-        if hasattr(request.user, 'userprofile'):
-            profile = request.user.userprofile
-            if profile.role == 'supplier':
-                # Try to get supplier_id from related models
-                try:
-                    # This depends on your model structure
-                    supplier_profile = request.user.supplierprofile
-                    supplier_id = supplier_profile.supplier_id
-                except:
-                    # Fallback to looking up by supplier name matching user email
-                    try:
-                        supplier = Supplier.objects.filter(
-                            contact_email__icontains=request.user.email
-                        ).first()
-                        if supplier:
-                            supplier_id = supplier.id
-                    except:
-                        pass
+        # The supplier comes from the token's claims or the session's profile
+        order_counts = get_supplier_dashboard_payload(get_user_supplier_id(request))
         
-        # Orders data - either real or placeholder
-        if supplier_id:
-            try:
-                total_orders = Order.objects.filter(supplier_id=supplier_id).count()
-                pending_orders = Order.objects.filter(supplier_id=supplier_id, status='pending').count()
-                delivered_orders = Order.objects.filter(supplier_id=supplier_id, status='delivered').count()
-                in_transit = Order.objects.filter(supplier_id=supplier_id, status='shipped').count()
-            except:
-                total_orders = 42
-                pending_orders = 7
-                delivered_orders = 31
-                in_transit = 4
-        else:
-            # Demo data
-            total_orders = 42
-            pending_orders = 7
-            delivered_orders = 31
-            in_transit = 4
-            
         return Response({
-            'totalOrders': total_orders,
-            'pendingOrders': pending_orders,
-            'deliveredOrders': delivered_orders,
-            'inTransitOrders': in_transit
+            'totalOrders': order_counts['total_orders'],
+            'pendingOrders': order_counts['pending_orders'],
+            'deliveredOrders': order_counts['delivered_orders'],
+            'inTransitOrders': order_counts['shipped_orders']
         })
     except Exception as e:
         print(f"Supplier Dashboard API error: {str(e)}")
@@ -1477,6 +1737,8 @@ def supplier_dashboard_api_view(request):
         })
     
 @api_view(['GET'])
+@authentication_classes([ClaimsJWTAuthentication, SessionAuthentication])
+@permission_classes([IsStoreUser])
 def staff_dashboard_api_view(request):
     """
     API view for staff dashboard data.
@@ -0,0 +1,92 @@
+"""
+Supplier order alerts for the supplier application.
+
+Suppliers are reminded of their pending orders every few hours and of
+shipped orders past their expected delivery date once a day. Each reminder
+is throttled per supplier in the shared throttle cache (see
+restaurant_management.utils.throttle), so workers keep no per-supplier state
+and a reminder is shown once per interval however many workers there are.
+When any reminder is due, the counts for all of them are read in one query.
+"""
+
+from django.contrib import messages
+from django.db.models import Count, Q
+from django.urls import reverse
+from django.utils import timezone
+
+from restaurant_management.utils.throttle import claim_throttle
+from store.models import Order
+
+PENDING_ORDERS = 'pending-orders'
+OVERDUE_SHIPMENTS = 'overdue-shipments'
+
+# Seconds between reminders of each kind for the same supplier
+ALERT_INTERVALS = {
+    PENDING_ORDERS: 6 * 60 * 60,
+    OVERDUE_SHIPMENTS: 24 * 60 * 60,
+}
+
+
+def get_supplier_alert_counts(supplier_id):
+    """
+    Count a supplier's orders that need attention.
+    
+    Args:
+        supplier_id (int): The supplier's primary key.
+    
+    Returns:
+        dict: The number of orders for each alert, keyed by PENDING_ORDERS
+        and OVERDUE_SHIPMENTS.
+    """
+    today = timezone.now().date()
+    return Order.objects.filter(supplier_id=supplier_id).aggregate(**{
+        PENDING_ORDERS: Count('id', filter=Q(status='pending')),
+        OVERDUE_SHIPMENTS: Count('id', filter=Q(status='shipped', expected_delivery__lte=today)),
+    })
+
+
+def add_supplier_alert_messages(request, alerts, counts):
+    """
+    Add alerts to the request's messages.
+    
+    Args:
+        request: The current HTTP request.
+        alerts (list): The alerts to show.
+        counts (dict): Order counts, as returned by get_supplier_alert_counts.
+    """
+    orders_url = reverse('supplier:view_orders')
+    
+    if PENDING_ORDERS in alerts and counts[PENDING_ORDERS] > 0:
+        messages.info(
+            request,
+            f"You have {counts[PENDING_ORDERS]} pending order(s) waiting for processing. "
+            f"<a href='{orders_url}?status=pending'>View pending orders</a>"
+        )
+    
+    if OVERDUE_SHIPMENTS in alerts and counts[OVERDUE_SHIPMENTS] > 0:
+        messages.warning(
+            request,
+            f"You have {counts[OVERDUE_SHIPMENTS]} shipped order(s) that have passed their expected delivery date. "
+            f"<a href='{orders_url}?status=shipped'>Update these orders</a>"
+        )
+
+
+def show_supplier_alerts(request, supplier_id):
+    """
+    Show a supplier the alerts that are due.
+    
+    Args:
+        request: The current HTTP request.
+        supplier_id (int): The supplier's primary key.
+    
+    Returns:
+        list: The alerts that were due; empty if none were, in which case
+        no query was made.
+    """
+    due = [
+        alert for alert, interval in ALERT_INTERVALS.items()
+        if claim_throttle(alert, supplier_id, interval)
+    ]
+    if due:
+        add_supplier_alert_messages(request, due, get_supplier_alert_counts(supplier_id))
+    return due
@@ -0,0 +1,255 @@
+"""
+Incrementally maintained supplier performance counters.
+
+Each SupplierPerformance row counts the orders a supplier was sent in one
+calendar month (by order date) and how many of them were delivered on time or
+late, as calculate_all_supplier_metrics does. Rather than recounting on every
+order save, each write applies the change in counter membership to the row of
+the order's month with F() expressions, inside the caller's transaction.
+
+The previous state of an order is remembered when it is loaded (see
+Order.from_db), so a save needs no extra read, and a save that moves no order
+between counters, such as pending to shipped, makes no query at all.
+Changes the signals cannot see, such as bulk updates or writes made directly
+in MySQL, are corrected by the reconcile_supplier_performance command.
+"""
+
+import datetime
+from collections import defaultdict
+
+from django.db.models import F, Q
+from django.utils import timezone
+
+from restaurant_management.utils.cache import bump_model_version
+from store.models import Order
+from .models import DeliveryNotification, SupplierPerformance
+from .utils import calculate_all_supplier_metrics, recompute_supplier_performance
+
+COUNTER_NAMES = ('total_orders', 'on_time_deliveries', 'late_deliveries')
+
+DELIVERED = 'delivered'
+
+
+def _local_date(value):
+    """Get the date of a datetime in the current time zone, as TruncDate does."""
+    if isinstance(value, datetime.datetime):
+        return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+    return value
+
+
+def month_period(value):
+    """
+    Get the calendar month a date or datetime falls in.
+    
+    Args:
+        value (date or datetime): The date.
+    
+    Returns:
+        tuple: (first day, last day) of the month.
+    """
+    month_start = _local_date(value).replace(day=1)
+    next_month = (month_start + datetime.timedelta(days=32)).replace(day=1)
+    return month_start, next_month - datetime.timedelta(days=1)
+
+
+def _counter_membership(state):
+    """
+    Get the counters an order state contributes to.
+    
+    Args:
+        state (tuple): Order.counter_state plus the delivery date, or None
+            for no order.
+    
+    Returns:
+        tuple: ((supplier_id, period), 0/1 contribution to each counter in
+        COUNTER_NAMES), or (None, None) for no order.
+    """
+    if state is None:
+        return None, None
+    
+    supplier_id, order_date, status, expected_delivery, delivered_on = state
+    
+    # Orders delivered without a notification count from their order date
+    if delivered_on is None:
+        delivered_on = _local_date(order_date)
+    on_time = expected_delivery is not None and delivered_on <= expected_delivery
+    delivered = status == DELIVERED
+    
+    return (supplier_id, month_period(order_date)), (
+        1,
+        int(delivered and on_time),
+        int(delivered and not on_time),
+    )
+
+
+def get_delivery_dates(orders):
+    """
+    Get the dates orders were delivered according to their notifications.
+    
+    Args:
+        orders (list): The orders; cached notifications are used without a
+            query and the rest are read in one query.
+    
+    Returns:
+        dict: {order primary key: notification delivery date, or None if
+        there is none}.
+    """
+    related = Order.delivery_notification.related
+    dates = {}
+    unknown = []
+    for order in orders:
+        if related.is_cached(order):
+            notification = related.get_cached_value(order)
+            dates[order.pk] = notification.delivery_date if notification is not None else None
+        else:
+            dates[order.pk] = None
+            unknown.append(order.pk)
+    
+    if unknown:
+        dates.update(
+            DeliveryNotification.objects.filter(order_id__in=unknown)
+            .values_list('order_id', 'delivery_date')
+        )
+    
+    return dates
+
+
+def record_order_change(order, before, after):
+    """
+    Apply an order write to the performance counters.
+    
+    Args:
+        order (Order): The order that was written.
+        before (tuple): Its counter_state before the write, or None if it was created.
+        after (tuple): Its counter_state after the write, or None if it was deleted.
+    """
+    record_order_changes([(order, before, after)])
+
+
+def record_order_changes(changes):
+    """
+    Apply writes to many orders to the performance counters.
+    
+    Args:
+        changes (iterable): (order, before, after) tuples, as for
+            record_order_change.
+    """
+    changes = [change for change in changes if change[1] != change[2]]
+    
+    # Only delivered orders are split by delivery date
+    delivered = [
+        order for order, before, after in changes
+        if any(state is not None and state[2] == DELIVERED for state in (before, after))
+    ]
+    delivery_dates = get_delivery_dates(delivered) if delivered else {}
+    
+    record_performance_changes([
+        (
+            before + (delivery_dates.get(order.pk),) if before is not None else None,
+            after + (delivery_dates.get(order.pk),) if after is not None else None,
+        )
+        for order, before, after in changes
+    ])
+
+
+def record_delivery_date_change(order, before, after):
+    """
+    Apply a changed delivery date of a delivered order to the counters.
+    
+    Only an order counted as delivered is moved; one that is being marked
+    delivered is counted with the new date when it is saved.
+    
+    Args:
+        order (Order): The order.
+        before (date): The previous notification date, or None if there was none.
+        after (date): The new notification date.
+    """
+    if before == after or order.loaded_status != DELIVERED:
+        return
+    
+    state = order._loaded_counter_state
+    record_performance_changes([(state + (before,), state + (after,))])
+
+
+def record_performance_changes(changes):
+    """
+    Apply order state changes to the counters, one UPDATE per changed month.
+    
+    A month with no counters row yet gets one calculated from the orders
+    table, which already includes the change.
+    
+    Args:
+        changes (iterable): (before, after) pairs of counter states with the
+            delivery date appended, None for a created or deleted order.
+    """
+    deltas = defaultdict(lambda: [0] * len(COUNTER_NAMES))
+    for before, after in changes:
+        for state, sign in ((before, -1), (after, 1)):
+            bucket, membership = _counter_membership(state)
+            if bucket is None:
+                continue
+            for i, value in enumerate(membership):
+                deltas[bucket][i] += sign * value
+    
+    changed = False
+    for (supplier_id, (period_start, period_end)), values in deltas.items():
+        if not any(values):
+            continue
+        
+        updated = SupplierPerformance.objects.filter(
+            supplier_id=supplier_id,
+            period_start=period_start,
+            period_end=period_end
+        ).update(**{
+            name: F(name) + delta for name, delta in zip(COUNTER_NAMES, values) if delta
+        })
+        
+        if updated:
+            changed = True
+        elif any(delta > 0 for delta in values):
+            # Removals from a missing row are skipped, e.g. while its
+            # supplier is being deleted
+            recompute_supplier_performance(
+                [(period_start, period_end)], [supplier_id], force=False
+            )
+    
+    if changed:
+        # Queryset updates send no signals
+        bump_model_version(SupplierPerformance)
+
+
+def find_performance_drift(periods, supplier_ids=None):
+    """
+    Compare the stored counters with the orders table.
+    
+    Args:
+        periods (list): (start, end) date tuples of calendar months.
+        supplier_ids (list, optional): Restrict to these suppliers.
+    
+    Returns:
+        list: (supplier_id, period_start, counter name, stored, actual) for
+        every counter that differs; a missing row counts as zeros.
+    """
+    actual = calculate_all_supplier_metrics(periods, supplier_ids)
+    
+    in_periods = Q()
+    for period_start, period_end in periods:
+        in_periods |= Q(period_start=period_start, period_end=period_end)
+    stored_rows = SupplierPerformance.objects.filter(in_periods)
+    if supplier_ids is not None:
+        stored_rows = stored_rows.filter(supplier_id__in=supplier_ids)
+    stored = {
+        (row['supplier_id'], row['period_start']): row
+        for row in stored_rows.values('supplier_id', 'period_start', *COUNTER_NAMES)
+    }
+    
+    empty = dict.fromkeys(COUNTER_NAMES, 0)
+    drift = []
+    for key in sorted(set(actual) | set(stored)):
+        for name in COUNTER_NAMES:
+            stored_value = stored.get(key, empty)[name]
+            actual_value = actual.get(key, empty)[name]
+            if stored_value != actual_value:
+                drift.append((*key, name, stored_value, actual_value))
+    
+    return drift
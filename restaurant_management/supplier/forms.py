@@ -11,6 +11,7 @@ from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 
 from store.models import Order, Supplier
+from store.order_status import can_transition
 from .models import DeliveryNotification
 
 
@@ -50,7 +51,7 @@ class OrderStatusUpdateForm(forms.ModelForm):
     
     def clean_status(self):
         status = self.cleaned_data.get('status')
-        current_status = self.instance.status
+        current_status = self.instance.loaded_status or self.instance.status
         
         # Enforce logical status progression
         if current_status == 'pending' and status == 'delivered':
@@ -62,6 +63,9 @@ class OrderStatusUpdateForm(forms.ModelForm):
         if current_status == 'cancelled':
             raise ValidationError(_("Cannot update a cancelled order."))
         
+        if not can_transition(current_status, status):
+            raise ValidationError(_("An order cannot move back to an earlier status."))
+        
         return status
 
 
@@ -5,15 +5,14 @@ This module contains middleware classes used to process requests and responses
 for the supplier application.
 """
 
-import datetime
-from django.utils import timezone
 from django.contrib import messages
 from django.urls import reverse, resolve
 from django.http import HttpResponseRedirect
 
 from restaurant_management.utils.constants import SUPPLIER_ROLE
+from store.user_context import get_user_role, get_user_supplier
+from .alerts import show_supplier_alerts
 from .models import SupplierProfile
-from store.models import Order
 
 
 class SupplierAccessMiddleware:
@@ -56,101 +55,37 @@ class SupplierAccessMiddleware:
         return response
 
 
-class PendingOrderAlertMiddleware:
+class SupplierAlertMiddleware:
     """
-    Middleware to check for pending orders and notify suppliers.
+    Middleware to remind suppliers of pending and overdue shipped orders.
+    
+    The reminders are throttled per supplier in the shared throttle cache
+    (see supplier.alerts), so this keeps no state of its own.
     """
     
     def __init__(self, get_response):
         self.get_response = get_response
-        # Keep track of when we last checked for pending orders
-        self.last_check = {}  # Dict to track per supplier
     
     def __call__(self, request):
         # Only check for authenticated supplier users
-        if (
-            request.user.is_authenticated and 
-            hasattr(request.user, 'profile') and 
-            request.user.profile.role == SUPPLIER_ROLE and
-            hasattr(request.user, 'supplier_profile')
-        ):
-            supplier = request.user.supplier_profile.supplier
-            supplier_id = supplier.id
-            
-            # Check if we need to check for this supplier
-            if (
-                supplier_id not in self.last_check or 
-                timezone.now() - self.last_check[supplier_id] > datetime.timedelta(hours=6)
-            ):
-                # Update the last check time
-                self.last_check[supplier_id] = timezone.now()
-                
-                # Check for pending orders
-                pending_count = Order.objects.filter(
-                    supplier=supplier,
-                    status='pending'
-                ).count()
-                
-                # Only add message if there are pending orders
-                if pending_count > 0:
-                    messages.info(
-                        request,
-                        f"You have {pending_count} pending order(s) waiting for processing. "
-                        f"<a href='{reverse('supplier:view_orders')}?status=pending'>View pending orders</a>"
-                    )
+        if request.user.is_authenticated:
+            supplier_id = self.get_supplier_id(request)
+            if supplier_id is not None:
+                show_supplier_alerts(request, supplier_id)
         
         # Process the response
         response = self.get_response(request)
         return response
+    
+    def get_supplier_id(self, request):
+        """Get the id of the request user's supplier, or None if they are not a supplier."""
+        if get_user_role(request) != SUPPLIER_ROLE:
+            return None
+        supplier = get_user_supplier(request)
+        return supplier.pk if supplier is not None else None
 
 
-class ShippedOrderReminderMiddleware:
-    """
-    Middleware to remind suppliers about orders that have been shipped but not delivered.
-    """
-    
-    def __init__(self, get_response):
-        self.get_response = get_response
-        # Keep track of when we last checked for shipped orders
-        self.last_check = {}  # Dict to track per supplier
-    
-    def __call__(self, request):
-        # Only check for authenticated supplier users
-        if (
-            request.user.is_authenticated and 
-            hasattr(request.user, 'profile') and 
-            request.user.profile.role == SUPPLIER_ROLE and
-            hasattr(request.user, 'supplier_profile')
-        ):
-            supplier = request.user.supplier_profile.supplier
-            supplier_id = supplier.id
-            
-            # Check if we need to check for this supplier
-            if (
-                supplier_id not in self.last_check or 
-                timezone.now() - self.last_check[supplier_id] > datetime.timedelta(days=1)
-            ):
-                # Update the last check time
-                self.last_check[supplier_id] = timezone.now()
-                
-                # Check for shipped orders
-                today = timezone.now().date()
-                shipped_orders = Order.objects.filter(
-                    supplier=supplier,
-                    status='shipped',
-                    expected_delivery__lte=today
-                )
-                
-                shipped_count = shipped_orders.count()
-                
-                # Only add message if there are shipped orders past their expected delivery date
-                if shipped_count > 0:
-                    messages.warning(
-                        request,
-                        f"You have {shipped_count} shipped order(s) that have passed their expected delivery date. "
-                        f"<a href='{reverse('supplier:view_orders')}?status=shipped'>Update these orders</a>"
-                    )
-        
-        # Process the response
-        response = self.get_response(request)
-        return response
\ No newline at end of file
+# The pending and shipped reminders are one component now; both names remain
+# so existing MIDDLEWARE settings keep working, and listing both checks once
+PendingOrderAlertMiddleware = SupplierAlertMiddleware
+ShippedOrderReminderMiddleware = SupplierAlertMiddleware
@@ -0,0 +1,52 @@
+from django.db import migrations
+
+# Migration 0001 declares unique_together on (supplier, period_start,
+# period_end), but databases loaded from restaurant_inventory.sql were created
+# without that key. update_supplier_performance --recompute upserts on it, so
+# it is added here for existing MySQL databases that lack it.
+TABLE = 'supplier_supplierperformance'
+KEY_NAME = 'supplier_period_uniq'
+KEY_COLUMNS = ['supplier_id', 'period_start', 'period_end']
+
+
+def _has_period_key(connection):
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, TABLE)
+    return any(
+        constraint['unique'] and constraint['columns'] == KEY_COLUMNS
+        for constraint in constraints.values()
+    )
+
+
+def add_period_key(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'mysql' or _has_period_key(connection):
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'ALTER TABLE `{TABLE}` ADD UNIQUE KEY `{KEY_NAME}` '
+            f'(`supplier_id`, `period_start`, `period_end`)'
+        )
+
+
+def remove_period_key(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'mysql':
+        return
+
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, TABLE)
+        if KEY_NAME in constraints:
+            cursor.execute(f'ALTER TABLE `{TABLE}` DROP KEY `{KEY_NAME}`')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('supplier', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_period_key, remove_period_key),
+    ]
@@ -39,7 +39,7 @@ class SupplierOrder(Order):
         proxy = True
         verbose_name = "Supplier Order"
         verbose_name_plural = "Supplier Orders"
-
+    
     @classmethod
     def get_pending_orders(cls, supplier_id):
         """Get all pending orders for a specific supplier."""
@@ -74,6 +74,14 @@ class DeliveryNotification(models.Model):
     
     def __str__(self):
         return f"Delivery notification for Order #{self.order.id}"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the loaded delivery date so a changed date needs no extra read."""
+        instance = super().from_db(db, field_names, values)
+        if 'delivery_date' in field_names:
+            instance._loaded_delivery_date = instance.delivery_date
+        return instance
 
 
 class SupplierPerformance(models.Model):
@@ -90,19 +90,15 @@ class OrderSupplierSerializer(serializers.ModelSerializer):
     """Serializer for Order model with supplier-specific fields."""
     
     items = OrderItemSupplierSerializer(many=True, read_only=True, source='items.all')
-    total_items = serializers.SerializerMethodField()
+    total_items = serializers.IntegerField(source='total_quantity', read_only=True)
     delivery_notification = DeliveryNotificationSerializer(read_only=True)
     
     class Meta:
         model = Order
         fields = [
             'id', 'status', 'order_date', 'expected_delivery',
-            'items', 'total_items', 'delivery_notification'
+            'items', 'items_count', 'total_items', 'delivery_notification'
         ]
-    
-    def get_total_items(self, obj):
-        """Get the total number of items in the order."""
-        return sum(item.quantity_ordered for item in obj.items.all())
 
 
 class SupplierDashboardSerializer(serializers.Serializer):
@@ -5,14 +5,21 @@ These signals help maintain data integrity and automate certain processes
 specific to supplier operations.
 """
 
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
 from dateutil.relativedelta import relativedelta
 from django.db.models import Count, Q, F
 
+from restaurant_management.utils.cache import bump_model_version
 from store.models import Order, Supplier
-from .models import DeliveryNotification, SupplierPerformance
+from .models import DeliveryNotification, SupplierPerformance, SupplierProfile, SupplierOrder
+from store.order_status import order_status_changed
+from store.tokens import revoke_user_tokens
+from .counters import record_order_change, record_order_changes, record_delivery_date_change
+
+# Field names and attnames that can be passed in update_fields
+ORDER_COUNTER_FIELD_NAMES = {*Order.COUNTER_FIELDS, 'supplier'}
 
 
 @receiver(post_save, sender=DeliveryNotification)
@@ -20,6 +27,9 @@ def update_order_status_on_notification(sender, instance, created, **kwargs):
     """
     Update the associated order's status when a delivery notification is created or updated.
     
+    A new or changed delivery date of an order that is already delivered
+    moves it between the on-time and late counters.
+    
     Args:
         sender: The model class (DeliveryNotification).
         instance: The DeliveryNotification instance that was saved.
@@ -27,6 +37,11 @@ def update_order_status_on_notification(sender, instance, created, **kwargs):
     """
     order = instance.order
     
+    if created or hasattr(instance, '_loaded_delivery_date'):
+        before = None if created else instance._loaded_delivery_date
+        record_delivery_date_change(order, before, instance.delivery_date)
+    instance._loaded_delivery_date = instance.delivery_date
+    
     # If the delivery date is today or in the past, mark as delivered
     if instance.delivery_date <= timezone.now().date() and order.status != 'delivered':
         order.status = 'delivered'
@@ -38,55 +53,56 @@ def update_order_status_on_notification(sender, instance, created, **kwargs):
 
 
 @receiver(post_save, sender=Order)
-def update_supplier_performance(sender, instance, **kwargs):
+def update_supplier_performance(sender, instance, created, update_fields=None, **kwargs):
     """
-    Update or create supplier performance metrics when an order status changes.
+    Apply an order write to the supplier performance counters.
+    
+    The order's state when it was loaded is compared with its state now, so
+    only a real change updates a counter, and it updates the month the order
+    was placed in. Status changes arrive through order_status_changed.
     
     Args:
         sender: The model class (Order).
         instance: The Order instance that was saved.
+        created: Boolean flag indicating if the instance was created.
+        update_fields: The fields that were saved, or None for all fields.
     """
-    supplier = instance.supplier
+    if update_fields is not None and not set(update_fields) & ORDER_COUNTER_FIELD_NAMES:
+        return
     
-    # Only update performance metrics for delivered orders
-    if instance.status == 'delivered':
-        # Get the current month's start and end dates
-        today = timezone.now().date()
-        month_start = today.replace(day=1)
-        next_month = today + relativedelta(months=1)
-        month_end = next_month.replace(day=1) - relativedelta(days=1)
-        
-        # Get or create performance record for current month
-        performance, created = SupplierPerformance.objects.get_or_create(
-            supplier=supplier,
-            period_start=month_start,
-            period_end=month_end,
-            defaults={
-                'total_orders': 0,
-                'on_time_deliveries': 0,
-                'late_deliveries': 0,
-                'quality_rating': 0.00
-            }
-        )
-        
-        # Increment total orders if this is the first time the order was marked as delivered
-        try:
-            old_status = Order.objects.get(pk=instance.pk).status
-            if old_status != 'delivered':
-                performance.total_orders += 1
-                
-                # Check if delivery was on time
-                if hasattr(instance, 'delivery_notification'):
-                    delivery_date = instance.delivery_notification.delivery_date
-                    if delivery_date <= instance.expected_delivery:
-                        performance.on_time_deliveries += 1
-                    else:
-                        performance.late_deliveries += 1
-                
-                performance.save()
-        except Order.DoesNotExist:
-            # New order, shouldn't happen in this context but handle it anyway
-            pass
+    if created:
+        record_order_change(instance, None, instance.counter_state)
+    elif instance.loaded_status == instance.status:
+        # Status changes are applied by update_performance_on_transition
+        record_order_change(instance, instance._loaded_counter_state, instance.counter_state)
+
+
+@receiver(order_status_changed)
+def update_performance_on_transition(sender, transitions, **kwargs):
+    """
+    Apply order status transitions to the supplier performance counters.
+    
+    Args:
+        sender: The model class (Order).
+        transitions (list): The OrderTransition tuples.
+    """
+    record_order_changes([
+        (t.order, t.order._loaded_counter_state, t.order.counter_state)
+        for t in transitions
+    ])
+
+
+@receiver(post_delete, sender=Order)
+def remove_order_from_supplier_performance(sender, instance, **kwargs):
+    """
+    Remove a deleted order from the supplier performance counters.
+    
+    Args:
+        sender: The model class (Order).
+        instance: The Order instance that was deleted.
+    """
+    before = getattr(instance, '_loaded_counter_state', instance.counter_state)
+    record_order_change(instance, before, None)
 
 
 @receiver(post_save, sender=Supplier)
@@ -115,4 +131,42 @@ def initialize_supplier_performance(sender, instance, created, **kwargs):
             on_time_deliveries=0,
             late_deliveries=0,
             quality_rating=0.00
-        )
\ No newline at end of file
+        )
+
+
+@receiver(post_save, sender=SupplierProfile)
+def revoke_tokens_on_supplier_change(sender, instance, created, **kwargs):
+    """
+    Revoke a user's API tokens when their supplier link changes, as they
+    carry the old supplier id.
+    
+    Args:
+        sender: The model class (SupplierProfile).
+        instance: The SupplierProfile instance that was saved.
+        created: Boolean flag indicating if the instance was created.
+    """
+    if not created:
+        revoke_user_tokens(instance.user_id)
+
+
+@receiver(post_delete, sender=SupplierProfile)
+def revoke_tokens_on_supplier_profile_delete(sender, instance, **kwargs):
+    """Revoke the API tokens of a user who no longer works for a supplier."""
+    revoke_user_tokens(instance.user_id)
+
+
+def bump_cache_version(sender, **kwargs):
+    """
+    Invalidate cached payloads that depend on the saved or deleted model.
+    
+    Args:
+        sender: The model class that was saved or deleted.
+    """
+    bump_model_version(sender)
+
+
+for cached_model in (SupplierProfile, SupplierOrder, DeliveryNotification, SupplierPerformance):
+    post_save.connect(bump_cache_version, sender=cached_model,
+                      dispatch_uid=f'bump_cache_version_save_{cached_model.__name__}')
+    post_delete.connect(bump_cache_version, sender=cached_model,
+                        dispatch_uid=f'bump_cache_version_delete_{cached_model.__name__}')
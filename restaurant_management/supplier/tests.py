@@ -13,6 +13,10 @@ import datetime
 
 from store.models import UserProfile, Supplier, Order
 from .models import SupplierProfile, DeliveryNotification, SupplierPerformance
+from .utils import (
+    get_month_periods, calculate_supplier_metrics, calculate_all_supplier_metrics,
+    recompute_supplier_performance
+)
 
 
 class SupplierProfileModelTests(TestCase):
@@ -135,6 +139,187 @@ class SupplierPerformanceModelTests(TestCase):
         self.assertEqual(zero_performance.on_time_percentage, 0)
 
 
+class SupplierPerformanceRecomputeTests(TestCase):
+    """Test cases for the set-based supplier performance calculation."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.periods = get_month_periods(2, datetime.date(2025, 3, 15))
+        self.suppliers = [
+            Supplier.objects.create(name=f'Supplier {i}', email=f's{i}@example.com', phone='1')
+            for i in range(3)
+        ]
+        
+        def order(supplier, day, status, expected, delivered=None):
+            order = Order.objects.create(
+                supplier=supplier,
+                status=status,
+                order_date=timezone.make_aware(datetime.datetime(2025, 2 if day > 0 else 1, abs(day), 12)),
+                expected_delivery=expected
+            )
+            if delivered:
+                DeliveryNotification.objects.create(order=order, message='Delivered', delivery_date=delivered)
+        
+        first, second, _ = self.suppliers
+        # February: on time, late, on time without a notification, pending
+        order(first, 3, 'delivered', datetime.date(2025, 2, 10), datetime.date(2025, 2, 9))
+        order(first, 4, 'delivered', datetime.date(2025, 2, 10), datetime.date(2025, 2, 12))
+        order(first, 5, 'delivered', datetime.date(2025, 2, 10))
+        order(first, 6, 'pending', datetime.date(2025, 2, 10))
+        # January: late without a notification, cancelled
+        order(first, -20, 'delivered', datetime.date(2025, 1, 19))
+        order(second, -31, 'cancelled', datetime.date(2025, 2, 5))
+        order(second, 28, 'delivered', datetime.date(2025, 3, 5), datetime.date(2025, 3, 1))
+    
+    def test_matches_per_supplier_calculation(self):
+        """Test that the grouped query gives the per-supplier counts."""
+        metrics = calculate_all_supplier_metrics(self.periods)
+        empty = {'total_orders': 0, 'on_time_deliveries': 0, 'late_deliveries': 0}
+        
+        for supplier in self.suppliers:
+            for start, end in self.periods:
+                expected = calculate_supplier_metrics(supplier, start, end)
+                actual = metrics.get((supplier.id, start), empty)
+                for field in empty:
+                    self.assertEqual(actual[field], expected[field], (supplier.name, start, field))
+    
+    def test_counters_match_grouped_calculation(self):
+        """Test that the signal-maintained counters agree with a recount."""
+        from .counters import find_performance_drift
+        
+        self.assertEqual(find_performance_drift(self.periods), [])
+    
+    def test_recompute_upserts_every_supplier_month(self):
+        """Test that recompute writes one row per supplier and month in a few queries."""
+        first = self.suppliers[0]
+        february = self.periods[0]
+        # The counters already hold a row for each month with orders
+        SupplierPerformance.objects.update_or_create(
+            supplier=first, period_start=february[0], period_end=february[1],
+            defaults={
+                'total_orders': 99, 'on_time_deliveries': 99, 'late_deliveries': 0,
+                'quality_rating': 4.5,
+            }
+        )
+        supplier_ids = [supplier.id for supplier in self.suppliers]
+        
+        with self.assertNumQueries(4):
+            recompute_supplier_performance(self.periods, supplier_ids)
+        
+        months = [start for start, _ in self.periods]
+        self.assertEqual(SupplierPerformance.objects.filter(period_start__in=months).count(), 6)
+        performance = SupplierPerformance.objects.get(supplier=first, period_start=february[0])
+        self.assertEqual(performance.total_orders, 4)
+        self.assertEqual(performance.on_time_deliveries, 2)
+        self.assertEqual(performance.late_deliveries, 1)
+        self.assertEqual(float(performance.quality_rating), 4.5)
+    
+    def test_recompute_without_force_keeps_existing_rows(self):
+        """Test that existing rows are left alone unless forced."""
+        first = self.suppliers[0]
+        february = self.periods[0]
+        # The counters already hold a row for each month with orders
+        SupplierPerformance.objects.update_or_create(
+            supplier=first, period_start=february[0], period_end=february[1],
+            defaults={
+                'total_orders': 99, 'on_time_deliveries': 99, 'late_deliveries': 0,
+                'quality_rating': 0,
+            }
+        )
+        
+        recompute_supplier_performance(self.periods, force=False)
+        
+        months = [start for start, _ in self.periods]
+        self.assertEqual(SupplierPerformance.objects.filter(period_start__in=months).count(), 6)
+        performance = SupplierPerformance.objects.get(supplier=first, period_start=february[0])
+        self.assertEqual(performance.total_orders, 99)
+
+
+class SupplierPerformanceCounterTests(TestCase):
+    """Test cases for the incrementally maintained performance counters."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.supplier = Supplier.objects.create(name='Counter Supplier', email='c@example.com', phone='1')
+        self.march = (datetime.date(2025, 3, 1), datetime.date(2025, 3, 31))
+        self.order = Order.objects.create(
+            supplier=self.supplier,
+            status='pending',
+            order_date=timezone.make_aware(datetime.datetime(2025, 3, 30, 12)),
+            expected_delivery=datetime.date(2025, 4, 2)
+        )
+    
+    def counters(self, period=None):
+        start, end = period or self.march
+        performance = SupplierPerformance.objects.get(
+            supplier=self.supplier, period_start=start, period_end=end
+        )
+        return performance.total_orders, performance.on_time_deliveries, performance.late_deliveries
+    
+    def test_delivery_counts_in_order_month(self):
+        """Test that only the transition to delivered is counted, in the order's month."""
+        self.assertEqual(self.counters(), (1, 0, 0))
+        
+        order = Order.objects.get(pk=self.order.pk)
+        order.status = 'shipped'
+        with self.assertNumQueries(1):
+            order.save(update_fields=['status'])
+        
+        DeliveryNotification.objects.create(
+            order=order, message='Delivered', delivery_date=datetime.date(2025, 4, 3)
+        )
+        self.assertEqual(self.counters(), (1, 0, 1))
+        
+        order = Order.objects.get(pk=self.order.pk)
+        with self.assertNumQueries(1):
+            order.save()
+        self.assertEqual(self.counters(), (1, 0, 1))
+        self.assertFalse(SupplierPerformance.objects.filter(
+            supplier=self.supplier, period_start=datetime.date(2025, 4, 1)
+        ).exists())
+    
+    def test_changed_delivery_date_moves_order(self):
+        """Test that a corrected notification date moves a delivery to on time."""
+        # Marking the order delivered records a notification dated today
+        self.order.status = 'delivered'
+        self.order.save()
+        self.assertEqual(self.counters(), (1, 0, 1))
+        
+        notification = DeliveryNotification.objects.get(order=self.order)
+        notification.delivery_date = datetime.date(2025, 4, 1)
+        notification.save()
+        self.assertEqual(self.counters(), (1, 1, 0))
+        
+        Order.objects.get(pk=self.order.pk).delete()
+        self.assertEqual(self.counters(), (0, 0, 0))
+    
+    def test_reconcile_repairs_untracked_changes(self):
+        """Test that the reconcile command finds and repairs drift."""
+        from io import StringIO
+        from unittest import mock
+        from django.core.management import call_command
+        from .counters import find_performance_drift
+        
+        # Queryset updates bypass the signals
+        Order.objects.filter(pk=self.order.pk).update(status='delivered')
+        self.assertEqual(
+            find_performance_drift([self.march]),
+            [(self.supplier.id, self.march[0], 'on_time_deliveries', 0, 1)]
+        )
+        
+        with mock.patch('django.utils.timezone.now',
+                        return_value=timezone.make_aware(datetime.datetime(2025, 4, 15, 12))):
+            call_command('reconcile_supplier_performance', '--dry-run', stdout=StringIO())
+            self.assertEqual(self.counters(), (1, 0, 0))
+            
+            output = StringIO()
+            call_command('reconcile_supplier_performance', stdout=output)
+        
+        self.assertIn('on_time_deliveries stored 0, actual 1', output.getvalue())
+        self.assertEqual(self.counters(), (1, 1, 0))
+        self.assertEqual(find_performance_drift([self.march]), [])
+
+
 class SupplierViewTests(TestCase):
     """Test cases for supplier views."""
     
@@ -219,4 +404,57 @@ class SupplierViewTests(TestCase):
         response = self.client.get(reverse('supplier:update_delivery_status', args=[self.order1.id]))
         
         self.assertEqual(response.status_code, 200)
-        self.assertContains(response, 'Update Delivery Status')
\ No newline at end of file
+        self.assertContains(response, 'Update Delivery Status')
+
+class SupplierAlertTests(TestCase):
+    """Test cases for the throttled supplier order alerts."""
+    
+    def setUp(self):
+        """Set up test data."""
+        from django.core.cache import cache
+        cache.clear()
+        
+        self.user = User.objects.create_user(username='supplier', password='supplierpassword')
+        self.user.profile.role = 'supplier'
+        self.user.profile.save()
+        self.supplier = Supplier.objects.create(name='Alert Supplier', email='a@example.com', phone='1')
+        SupplierProfile.objects.create(user=self.user, supplier=self.supplier)
+        
+        today = timezone.now().date()
+        for status, expected_delivery in (
+            ('pending', today), ('pending', None), ('shipped', today - datetime.timedelta(days=1)),
+            ('shipped', today + datetime.timedelta(days=2)), ('delivered', today),
+        ):
+            Order.objects.create(supplier=self.supplier, status=status, expected_delivery=expected_delivery)
+    
+    def make_request(self):
+        from django.contrib.messages.storage.fallback import FallbackStorage
+        from django.contrib.sessions.backends.db import SessionStore
+        from django.test import RequestFactory
+        from store.user_context import load_user_context
+        
+        request = RequestFactory().get('/supplier/')
+        request.user = load_user_context(self.user.pk)
+        request.session = SessionStore()
+        request._messages = FallbackStorage(request)
+        return request
+    
+    def test_alerts_are_counted_in_one_query_and_throttled(self):
+        """Test that both alerts need one query and are shown once per interval."""
+        from django.http import HttpResponse
+        from .middleware import SupplierAlertMiddleware
+        
+        workers = [SupplierAlertMiddleware(lambda request: HttpResponse()) for _ in range(2)]
+        
+        first = self.make_request()
+        with self.assertNumQueries(1):
+            workers[0](first)
+        alerts = [str(message) for message in first._messages]
+        self.assertEqual(len(alerts), 2)
+        self.assertTrue(alerts[0].startswith("You have 2 pending order(s)"))
+        self.assertTrue(alerts[1].startswith("You have 1 shipped order(s)"))
+        
+        second = self.make_request()
+        with self.assertNumQueries(0):
+            workers[1](second)
+        self.assertEqual(len(second._messages), 0)
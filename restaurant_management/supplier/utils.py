@@ -5,18 +5,48 @@ This module contains helper functions and utilities for supplier-specific operat
 such as order management, delivery notifications, and performance metrics.
 """
 
-import csv
 import datetime
-from io import BytesIO
-from django.db.models import Sum, Count, Q, F
+from django.db import connection, connections, transaction
+from django.db.models import Count, Q, F, DateField
+from django.db.models.functions import Coalesce, TruncDate, TruncMonth
 from django.utils import timezone
-from django.http import HttpResponse
-import xlsxwriter
 
-from store.models import Order, OrderItem, Supplier
+from restaurant_management.utils.cache import bump_model_version
+from restaurant_management.utils.export import (
+    STREAMING_FORMATS, excel_export, streaming_export
+)
+from store.models import Order, Supplier
+from store.utils import order_export_rows
 from .models import SupplierPerformance, DeliveryNotification
 
 
+def get_month_periods(months, today=None, include_current=False):
+    """
+    Get the (start, end) dates of the calendar months before the current one.
+    
+    Args:
+        months (int): Number of months, most recent first.
+        today (date, optional): Reference date. Defaults to today.
+        include_current (bool, optional): Start with the current month
+            instead of the one before it. Defaults to False.
+    
+    Returns:
+        list: (first day, last day) date tuples.
+    """
+    if today is None:
+        today = timezone.now().date()
+    
+    periods = []
+    month_end = today.replace(day=1) - datetime.timedelta(days=1)
+    if include_current:
+        month_end = (today.replace(day=1) + datetime.timedelta(days=32)).replace(day=1) - datetime.timedelta(days=1)
+    for _ in range(months):
+        month_start = month_end.replace(day=1)
+        periods.append((month_start, month_end))
+        month_end = month_start - datetime.timedelta(days=1)
+    return periods
+
+
 def calculate_supplier_metrics(supplier, start_date=None, end_date=None):
     """
     Calculate performance metrics for a specific supplier over a given time period.
@@ -112,6 +142,134 @@ def calculate_supplier_metrics(supplier, start_date=None, end_date=None):
     return metrics
 
 
+def calculate_all_supplier_metrics(periods, supplier_ids=None):
+    """
+    Calculate monthly metrics for many suppliers in one grouped query.
+    
+    Gives the same counts as calculate_supplier_metrics for every supplier
+    and calendar month, computed in the database: orders are grouped by
+    supplier and month, and on-time deliveries are counted from a LEFT JOIN
+    on supplier_deliverynotification, falling back to the order date where
+    there is no notification.
+    
+    Args:
+        periods (list): (start, end) date tuples of calendar months, as
+            returned by get_month_periods.
+        supplier_ids (list, optional): Restrict to these suppliers.
+    
+    Returns:
+        dict: {(supplier_id, period_start): {'total_orders',
+        'on_time_deliveries', 'late_deliveries'}} for every supplier/month
+        pair that has orders.
+    """
+    if not periods:
+        return {}
+    
+    orders = Order.objects.filter(
+        order_date__date__gte=min(start for start, _ in periods),
+        order_date__date__lte=max(end for _, end in periods)
+    )
+    if supplier_ids is not None:
+        orders = orders.filter(supplier_id__in=supplier_ids)
+    
+    delivered = Q(status='delivered')
+    on_time = delivered & Q(delivered_on__lte=F('expected_delivery'))
+    
+    rows = orders.annotate(
+        month=TruncMonth('order_date', output_field=DateField()),
+        delivered_on=Coalesce('delivery_notification__delivery_date', TruncDate('order_date')),
+    ).values('supplier_id', 'month').annotate(
+        total_orders=Count('id'),
+        delivered_orders=Count('id', filter=delivered),
+        on_time_deliveries=Count('id', filter=on_time),
+    ).order_by()
+    
+    return {
+        (row['supplier_id'], row['month']): {
+            'total_orders': row['total_orders'],
+            'on_time_deliveries': row['on_time_deliveries'],
+            'late_deliveries': row['delivered_orders'] - row['on_time_deliveries'],
+        }
+        for row in rows
+    }
+
+
+def _calculate_metrics_chunk(args):
+    """Process pool entry point for calculate_all_supplier_metrics."""
+    periods, supplier_ids = args
+    return calculate_all_supplier_metrics(periods, supplier_ids)
+
+
+def recompute_supplier_performance(periods, supplier_ids=None, force=True, workers=1):
+    """
+    Recompute SupplierPerformance rows for many suppliers and months.
+    
+    Metrics come from calculate_all_supplier_metrics and are written with one
+    bulk upsert on (supplier, period_start, period_end). Every supplier gets
+    a row for every period, with zeros for months without orders, as the
+    per-supplier calculation does. quality_rating is never overwritten.
+    
+    Args:
+        periods (list): (start, end) date tuples of calendar months.
+        supplier_ids (list, optional): Restrict to these suppliers.
+        force (bool, optional): Overwrite existing rows. If False, only
+            missing rows are created. Defaults to True.
+        workers (int, optional): Split the suppliers across this many
+            processes for the grouped query. Defaults to 1 (no pool); must
+            be 1 inside a transaction.
+    
+    Returns:
+        list: The SupplierPerformance objects that were written.
+    """
+    if supplier_ids is None:
+        supplier_ids = list(Supplier.objects.order_by('id').values_list('id', flat=True))
+    
+    if workers > 1 and len(supplier_ids) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        
+        # Children must open their own database connections, so this cannot
+        # run inside a transaction
+        connections.close_all()
+        chunks = [(periods, supplier_ids[i::workers]) for i in range(workers)]
+        metrics = {}
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for chunk_metrics in pool.map(_calculate_metrics_chunk, chunks):
+                metrics.update(chunk_metrics)
+    else:
+        metrics = calculate_all_supplier_metrics(periods, supplier_ids)
+    
+    empty = {'total_orders': 0, 'on_time_deliveries': 0, 'late_deliveries': 0}
+    records = [
+        SupplierPerformance(
+            supplier_id=supplier_id,
+            period_start=start,
+            period_end=end,
+            quality_rating=0.00,
+            **metrics.get((supplier_id, start), empty)
+        )
+        for supplier_id in supplier_ids
+        for start, end in periods
+    ]
+    
+    if force:
+        options = {
+            'update_conflicts': True,
+            'update_fields': ['total_orders', 'on_time_deliveries', 'late_deliveries'],
+        }
+        # MySQL upserts on any unique key and cannot name one
+        if connection.features.supports_update_conflicts_with_target:
+            options['unique_fields'] = ['supplier', 'period_start', 'period_end']
+    else:
+        options = {'ignore_conflicts': True}
+    
+    with transaction.atomic():
+        SupplierPerformance.objects.bulk_create(records, batch_size=1000, **options)
+    
+    # Bulk operations send no signals
+    bump_model_version(SupplierPerformance)
+    return records
+
+
 def get_supplier_order_summary(supplier, status=None, start_date=None, end_date=None):
     """
     Get a summary of orders for a supplier with filtering options.
@@ -141,13 +299,35 @@ def get_supplier_order_summary(supplier, status=None, start_date=None, end_date=
     return orders.order_by('-order_date')
 
 
+SUPPLIER_ORDER_EXPORT_HEADERS = [
+    'Order ID', 'Status', 'Order Date', 'Expected Delivery', 'Items', 'Total Quantity'
+]
+
+
+def supplier_order_export_rows(orders):
+    """
+    Map a supplier's orders to export rows, fetching them in chunks.
+    
+    Args:
+        orders (QuerySet): The orders to export.
+    
+    Returns:
+        generator: One row per order, in SUPPLIER_ORDER_EXPORT_HEADERS order.
+    """
+    return order_export_rows(
+        orders, include_supplier=False, no_expected_delivery='Not specified'
+    )
+
+
 def export_supplier_orders(supplier, format_type='csv', status=None, start_date=None, end_date=None):
     """
     Export supplier orders data in the specified format.
     
+    CSV and JSON Lines exports are streamed.
+    
     Args:
         supplier (Supplier): The supplier to export orders for.
-        format_type (str): The format to export to ('csv' or 'excel').
+        format_type (str): The format to export to ('csv', 'jsonl' or 'excel').
         status (str, optional): Filter by order status. Defaults to None.
         start_date (date, optional): Filter by start date. Defaults to None.
         end_date (date, optional): Filter by end date. Defaults to None.
@@ -158,85 +338,17 @@ def export_supplier_orders(supplier, format_type='csv', status=None, start_date=
     # Get filtered orders
     orders = get_supplier_order_summary(supplier, status, start_date, end_date)
     
-    if format_type == 'csv':
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="{supplier.name}_orders.csv"'
-        
-        writer = csv.writer(response)
-        writer.writerow(['Order ID', 'Status', 'Order Date', 'Expected Delivery', 'Items', 'Total Quantity'])
-        
-        for order in orders:
-            # Get order items info
-            items_count = OrderItem.objects.filter(order=order).count()
-            total_quantity = OrderItem.objects.filter(order=order).aggregate(
-                total=Sum('quantity_ordered')
-            )['total'] or 0
-            
-            writer.writerow([
-                order.id,
-                order.status,
-                order.order_date.strftime('%Y-%m-%d %H:%M:%S'),
-                order.expected_delivery.strftime('%Y-%m-%d') if order.expected_delivery else 'Not specified',
-                items_count,
-                total_quantity
-            ])
-        
-        return response
+    if format_type in STREAMING_FORMATS:
+        return streaming_export(
+            f'{supplier.name}_orders', SUPPLIER_ORDER_EXPORT_HEADERS,
+            supplier_order_export_rows(orders), format_type
+        )
     
     elif format_type == 'excel':
-        output = BytesIO()
-        workbook = xlsxwriter.Workbook(output)
-        worksheet = workbook.add_worksheet()
-        
-        # Add header row
-        headers = ['Order ID', 'Status', 'Order Date', 'Expected Delivery', 'Items', 'Total Quantity']
-        
-        header_format = workbook.add_format({
-            'bold': True,
-            'bg_color': '#f0f0f0',
-            'border': 1
-        })
-        
-        for col_num, header in enumerate(headers):
-            worksheet.write(0, col_num, header, header_format)
-        
-        # Add data rows
-        row_num = 1
-        for order in orders:
-            # Get order items info
-            items_count = OrderItem.objects.filter(order=order).count()
-            total_quantity = OrderItem.objects.filter(order=order).aggregate(
-                total=Sum('quantity_ordered')
-            )['total'] or 0
-            
-            worksheet.write(row_num, 0, order.id)
-            worksheet.write(row_num, 1, order.status)
-            worksheet.write(row_num, 2, order.order_date.strftime('%Y-%m-%d %H:%M:%S'))
-            
-            if order.expected_delivery:
-                worksheet.write(row_num, 3, order.expected_delivery.strftime('%Y-%m-%d'))
-            else:
-                worksheet.write(row_num, 3, 'Not specified')
-            
-            worksheet.write(row_num, 4, items_count)
-            worksheet.write(row_num, 5, total_quantity)
-            
-            row_num += 1
-        
-        # Adjust column widths
-        for col_num, header in enumerate(headers):
-            worksheet.set_column(col_num, col_num, len(header) + 5)
-        
-        workbook.close()
-        output.seek(0)
-        
-        response = HttpResponse(
-            output.read(),
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        return excel_export(
+            f'{supplier.name}_orders', SUPPLIER_ORDER_EXPORT_HEADERS,
+            supplier_order_export_rows(orders)
         )
-        response['Content-Disposition'] = f'attachment; filename="{supplier.name}_orders.xlsx"'
-        
-        return response
     
     # Default to CSV if format not recognized
     return export_supplier_orders(supplier, 'csv', status, start_date, end_date)
@@ -253,14 +365,9 @@ def calculate_monthly_performance_history(supplier, months=6):
     Returns:
         list: List of dictionaries containing monthly performance data.
     """
-    today = timezone.now().date()
     performance_history = []
     
-    for i in range(months):
-        # Calculate month period
-        end_date = today.replace(day=1) - datetime.timedelta(days=1) - datetime.timedelta(days=30*i)
-        start_date = end_date.replace(day=1)
-        
+    for start_date, end_date in get_month_periods(months):
         # Get or calculate performance
         try:
             performance = SupplierPerformance.objects.get(
@@ -279,7 +386,7 @@ def calculate_monthly_performance_history(supplier, months=6):
                 'late_deliveries': performance.late_deliveries,
                 'quality_rating': performance.quality_rating,
             }
-            
+        
         except SupplierPerformance.DoesNotExist:
             # Calculate metrics for this period
             metrics_data = calculate_supplier_metrics(supplier, start_date, end_date)
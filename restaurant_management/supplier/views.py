@@ -11,11 +11,12 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Count, Q, F
 from django.http import JsonResponse
-from django.core.paginator import Paginator
 from django.utils import timezone
 from django.db import transaction
 
 from store.models import Order, OrderItem, Supplier
+from store.utils import get_supplier_dashboard_payload
+from restaurant_management.utils.pagination import paginate_queryset, keyset_links
 from .models import SupplierProfile, DeliveryNotification, SupplierPerformance
 from .forms import OrderStatusUpdateForm, DeliveryNotificationForm, SupplierProfileUpdateForm, OrderSearchForm
 
@@ -50,9 +51,7 @@ def supplier_dashboard(request):
     supplier = request.user.supplier_profile.supplier
     
     # Get summary statistics
-    pending_orders = Order.objects.filter(supplier=supplier, status='pending').count()
-    shipped_orders = Order.objects.filter(supplier=supplier, status='shipped').count()
-    delivered_orders = Order.objects.filter(supplier=supplier, status='delivered').count()
+    order_counts = get_supplier_dashboard_payload(supplier.id)
     
     # Get recent orders
     recent_orders = Order.objects.filter(supplier=supplier).order_by('-order_date')[:5]
@@ -67,9 +66,9 @@ def supplier_dashboard(request):
     
     context = {
         'supplier': supplier,
-        'pending_orders': pending_orders,
-        'shipped_orders': shipped_orders,
-        'delivered_orders': delivered_orders,
+        'pending_orders': order_counts['pending_orders'],
+        'shipped_orders': order_counts['shipped_orders'],
+        'delivered_orders': order_counts['delivered_orders'],
         'recent_orders': recent_orders,
         'performance': performance,
     }
@@ -106,14 +105,13 @@ def view_orders(request):
         if status:
             orders = orders.filter(status=status)
     
-    # Pagination
-    paginator = Paginator(orders.order_by('-order_date'), 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Pagination (?pagination=keyset switches to cursor pages)
+    page_obj = paginate_queryset(request, orders, ('-order_date', '-id'), 10)
     
     context = {
         'page_obj': page_obj,
         'form': form,
+        **keyset_links(request, page_obj),
     }
     
     return render(request, 'supplier/view_orders.html', context)
@@ -213,14 +211,15 @@ def past_orders(request):
     delivered_orders = Order.objects.filter(
         supplier=supplier,
         status='delivered'
-    ).order_by('-order_date')
+    )
     
-    # Pagination
-    paginator = Paginator(delivered_orders, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Pagination (?pagination=keyset switches to cursor pages)
+    page_obj = paginate_queryset(request, delivered_orders, ('-order_date', '-id'), 10)
     
-    return render(request, 'supplier/past_orders.html', {'page_obj': page_obj})
+    return render(request, 'supplier/past_orders.html', {
+        'page_obj': page_obj,
+        **keyset_links(request, page_obj),
+    })
 
 
 @login_required